@@ -0,0 +1,71 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Creation of the isolated stress users and projects.
+
+The names start with ``stress_user`` and ``stress_tenant``, so
+:mod:`tempest_stress.cleanup` removes what a crashed run left behind.
+"""
+
+from tempest import config
+from tempest.lib.common import cred_client
+from tempest.lib.common.utils import data_utils
+
+CONF = config.CONF
+
+PASSWORD = "pass"
+
+
+def credentials_client(admin_manager):
+    """Returns the cred_client of the configured identity API version."""
+    if CONF.identity.auth_version == 'v2':
+        identity_client = admin_manager.identity_client
+        projects_client = admin_manager.tenants_client
+        roles_client = admin_manager.roles_client
+        users_client = admin_manager.users_client
+        domains_client = None
+    else:
+        identity_client = admin_manager.identity_v3_client
+        projects_client = admin_manager.projects_client
+        roles_client = admin_manager.roles_v3_client
+        users_client = admin_manager.users_v3_client
+        domains_client = admin_manager.domains_client
+    domain = (identity_client.auth_provider.credentials.
+              get('project_domain_name', 'Default'))
+    return cred_client.get_creds_client(
+        identity_client, projects_client, users_client,
+        roles_client, domains_client, project_domain_name=domain)
+
+
+def create_credentials(admin_manager, client=None):
+    """Creates a project and a user with the tempest roles.
+
+    Returns the credentials of the new user. ``client`` is the
+    cred_client to use, by default one is created from the admin manager.
+    """
+    if client is None:
+        client = credentials_client(admin_manager)
+    username = data_utils.rand_name("stress_user")
+    tenant_name = data_utils.rand_name("stress_tenant")
+    project = client.create_project(name=tenant_name,
+                                    description=tenant_name)
+    user = client.create_user(username, PASSWORD, project, "email")
+    # Add roles specified in config file
+    for conf_role in CONF.auth.tempest_roles:
+        client.assign_user_role(user, project, conf_role)
+    return client.get_credentials(user, project, PASSWORD)
+
+
+def delete_credentials(client, creds):
+    """Deletes the user and the project of ``creds``."""
+    client.delete_user(creds.user_id)
+    client.delete_project(creds.tenant_id)
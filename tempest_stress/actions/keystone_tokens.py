@@ -0,0 +1,99 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Stress the token issuance, validation and revocation of Keystone.
+
+The setUp creates a pool of ``users`` stress users, each in its own
+project (see :mod:`tempest_stress.accounts`). Every run issues a token
+for every user of the pool, validates it and revokes it, with
+``concurrency`` (default: one per user) threads. The latency of every
+operation is recorded as the ``token_issue``, ``token_validate`` and
+``token_revoke`` metrics and the tokens issued per second of the run as
+``tokens_per_second``; the latency percentiles are reported per endpoint
+by the API call tracing.
+
+The action needs ``use_admin``, tokens are validated and revoked with
+the admin credentials. Only the Identity v3 API is supported.
+"""
+
+from concurrent import futures
+import time
+
+from tempest import config
+from tempest.lib import exceptions
+
+from tempest_stress import accounts
+import tempest_stress.stressaction as stressaction
+
+CONF = config.CONF
+
+
+class KeystoneTokenTest(stressaction.StressAction):
+
+    def setUp(self, **kwargs):
+        self.users = kwargs.get('users', 10)
+        self.concurrency = kwargs.get('concurrency', self.users)
+        self.creds = []
+        if CONF.identity.auth_version == 'v2':
+            raise exceptions.InvalidConfiguration(
+                "%s needs the Identity v3 API, [identity] auth_version is "
+                "v2" % self.action)
+        self.token_client = self.manager.token_v3_client
+        self.identity_client = self.manager.identity_v3_client
+        self.credentials_client = accounts.credentials_client(self.manager)
+        self.logger.info("creating %d users", self.users)
+        try:
+            for _ in range(self.users):
+                self.creds.append(accounts.create_credentials(
+                    self.manager, self.credentials_client))
+        except Exception:
+            self.tearDown()
+            raise
+
+    def _issue(self, creds):
+        return self.token_client.get_token(
+            user_id=creds.user_id, password=creds.password,
+            project_id=creds.project_id)
+
+    def _timed(self, metric, call, *args):
+        start = time.time()
+        result = call(*args)
+        self.add_metric(metric, time.time() - start)
+        return result
+
+    def _token_cycle(self, creds):
+        token = self._timed('token_issue', self._issue, creds)
+        self._timed('token_validate', self.identity_client.show_token,
+                    token)
+        self._timed('token_revoke', self.identity_client.delete_token,
+                    token)
+
+    def run(self):
+        start = time.time()
+        with futures.ThreadPoolExecutor(self.concurrency) as executor:
+            cycles = [executor.submit(self._token_cycle, creds)
+                      for creds in self.creds]
+        elapsed = time.time() - start
+        failed = [cycle.exception() for cycle in cycles
+                  if cycle.exception() is not None]
+        if elapsed > 0:
+            self.add_metric('tokens_per_second',
+                            (len(cycles) - len(failed)) / elapsed)
+        if failed:
+            self.logger.info("%d of %d token cycles failed", len(failed),
+                             len(cycles))
+            raise failed[0]
+
+    def tearDown(self):
+        while self.creds:
+            accounts.delete_credentials(self.credentials_client,
+                                        self.creds.pop())
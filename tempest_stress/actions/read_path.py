@@ -0,0 +1,177 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Stress the read path of the compute and volume APIs.
+
+The setUp of every worker creates ``servers`` servers (with one
+multi-create request, see :mod:`tempest_stress.server_batches`) and
+``volumes`` volumes. Every run then lists them in pages of each of the
+``page_sizes`` (0 lists without a limit), lists them filtered by status
+and by name, and shows ``shows`` random ones. The latency of every
+request is recorded as a metric named after the call and the page size
+or filter, e.g. ``list_servers[page=100]``, next to the number of items
+it returned (``list_servers[page=100] items``), and the requests per
+second of the run as ``requests_per_second``.
+
+Compare the metrics of runs with different ``servers``/``volumes`` to
+see how the read path scales with the result-set size.
+
+The servers and volumes exist for the whole run and only serve the
+reads, so they are not counted against [stress] max_instances and
+max_volumes. Mind the quota of the project, every worker creates its
+own.
+"""
+
+import random
+import time
+
+from tempest import config
+from tempest.lib.common.utils import data_utils
+from tempest.lib import exceptions as lib_exc
+
+from tempest_stress import server_batches
+import tempest_stress.stressaction as stressaction
+
+CONF = config.CONF
+
+
+class ReadPathTest(stressaction.StressAction):
+
+    def setUp(self, **kwargs):
+        self.image = CONF.compute.image_ref
+        self.flavor = CONF.compute.flavor_ref
+        self.servers = kwargs.get('servers', 50)
+        self.volumes = kwargs.get('volumes', 0)
+        self.page_sizes = kwargs.get('page_sizes', [0, 10, 100])
+        self.shows = kwargs.get('shows', 10)
+        self.poll_interval = kwargs.get('poll_interval',
+                                        CONF.compute.build_interval)
+        self.name = data_utils.rand_name(self.__class__.__name__)
+        self.server_ids = []
+        self.volume_ids = []
+        self.server_filters = None
+        self._requests = 0
+        try:
+            self._create_servers()
+            self._create_volumes()
+        except Exception:
+            self.tearDown()
+            raise
+
+    def _create_servers(self):
+        if not self.servers:
+            return
+        client = self.manager.servers_client
+        self.logger.info("creating %d servers %s-*", self.servers,
+                         self.name)
+        self.server_filters, expected = server_batches.create_batch(
+            client, self.name + '-instance', self.servers,
+            imageRef=self.image, flavorRef=self.flavor)
+        active, errors = server_batches.wait_for_batch(
+            client, self.server_filters, expected, time.time(),
+            self.poll_interval)
+        if errors:
+            self.logger.warning("%d of the servers %s-* in ERROR",
+                                len(errors), self.name)
+        self.server_ids = sorted(active) + sorted(errors)
+
+    def _create_volumes(self):
+        client = self.manager.volumes_client
+        if self.volumes:
+            self.logger.info("creating %d volumes %s-volume-*",
+                             self.volumes, self.name)
+        for index in range(self.volumes):
+            volume = client.create_volume(
+                display_name='%s-volume-%d' % (self.name, index),
+                size=CONF.volume.volume_size)['volume']
+            self.volume_ids.append(volume['id'])
+        for volume_id in self.volume_ids:
+            client.wait_for_volume_status(volume_id, 'available')
+
+    def _timed(self, metric, call, *args, **kwargs):
+        start = time.time()
+        result = call(*args, **kwargs)
+        self.add_metric(metric, time.time() - start)
+        self._requests += 1
+        return result
+
+    def _list_pages(self, metric, list_page):
+        """Lists all pages of ``metric`` with ``list_page(params)``."""
+        for page_size in self.page_sizes:
+            name = '%s[page=%s]' % (metric, page_size or 'all')
+            params = {}
+            if page_size:
+                params['limit'] = page_size
+            while True:
+                items = self._timed(name, list_page, params)
+                self.add_metric(name + ' items', len(items))
+                if not page_size or len(items) < page_size:
+                    break
+                params['marker'] = items[-1]['id']
+
+    def _list_servers(self, params):
+        return self.manager.servers_client.list_servers(
+            detail=True, **params)['servers']
+
+    def _list_volumes(self, params):
+        return self.manager.volumes_client.list_volumes(
+            detail=True, params=params)['volumes']
+
+    def _read_servers(self):
+        self._list_pages('list_servers', self._list_servers)
+        for name, params in (('list_servers[status]', {'status': 'ACTIVE'}),
+                             ('list_servers[name]',
+                              {'name': '^%s-instance' % self.name})):
+            items = self._timed(name, self._list_servers, params)
+            self.add_metric(name + ' items', len(items))
+        for _ in range(self.shows):
+            self._timed('show_server',
+                        self.manager.servers_client.show_server,
+                        random.choice(self.server_ids))
+
+    def _read_volumes(self):
+        self._list_pages('list_volumes', self._list_volumes)
+        items = self._timed('list_volumes[status]', self._list_volumes,
+                            {'status': 'available'})
+        self.add_metric('list_volumes[status] items', len(items))
+        for _ in range(self.shows):
+            self._timed('show_volume',
+                        self.manager.volumes_client.show_volume,
+                        random.choice(self.volume_ids))
+
+    def run(self):
+        self._requests = 0
+        start = time.time()
+        if self.server_ids:
+            self._read_servers()
+        if self.volume_ids:
+            self._read_volumes()
+        elapsed = time.time() - start
+        if elapsed > 0:
+            self.add_metric('requests_per_second', self._requests / elapsed)
+
+    def tearDown(self):
+        if self.server_filters is not None:
+            self.logger.info("deleting servers %s-*", self.name)
+            server_batches.delete_batch(self.manager.servers_client,
+                                        self.server_filters,
+                                        self.poll_interval)
+            self.server_filters = None
+        client = self.manager.volumes_client
+        for volume_id in self.volume_ids:
+            try:
+                client.delete_volume(volume_id)
+            except lib_exc.NotFound:
+                pass
+        for volume_id in self.volume_ids:
+            client.wait_for_resource_deletion(volume_id)
+        self.volume_ids = []
@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Boot servers in batches to stress the scheduler.
+
+ServerBulkCreateTest boots a batch with one multi-create request
+(``min_count``/``max_count``), ServerConcurrentCreateTest boots it with
+concurrent single create requests for comparison. Both wait for the
+whole batch with one list call per poll interval and record per batch:
+
+* ``batch_create_request``: time until the create request(s) returned
+* ``batch_first_active`` / ``batch_all_active``: time until the first /
+  the last server of the batch was seen ACTIVE
+* ``batch_spread``: time between the first and the last ACTIVE server
+* ``server_active``: time until a server was seen ACTIVE, per server
+* ``build_failure_rate``: fraction of the batch ending in ERROR
+* ``scheduling_failure_rate``: fraction of the batch the scheduler found
+  no valid host for
+
+Times are measured by polling, their resolution is the poll interval.
+"""
+
+import abc
+from concurrent import futures
+import time
+
+from tempest import config
+from tempest import exceptions
+from tempest.lib.common.utils import data_utils
+
+from tempest_stress import admission
+from tempest_stress import server_batches
+import tempest_stress.stressaction as stressaction
+
+CONF = config.CONF
+
+NO_VALID_HOST = 'No valid host'
+
+
+class ServerBatchTest(stressaction.StressAction):
+    """The base of the batch create actions.
+
+    kwargs: ``batch_size`` (default 10) servers per batch, at most
+    [stress] max_instances, ``poll_interval`` (default [compute]
+    build_interval) seconds between two list calls. The INSTANCES slots
+    of a batch are taken at once and given back once the batch is
+    deleted.
+    """
+
+    def setUp(self, **kwargs):
+        self.image = CONF.compute.image_ref
+        self.flavor = CONF.compute.flavor_ref
+        self.batch_size = kwargs.get('batch_size', 10)
+        self.poll_interval = kwargs.get('poll_interval',
+                                        CONF.compute.build_interval)
+        max_instances = admission.limit(admission.INSTANCES)
+        if max_instances and self.batch_size > max_instances:
+            raise ValueError("batch_size %d exceeds [stress] max_instances "
+                             "%d" % (self.batch_size, max_instances))
+
+    @abc.abstractmethod
+    def _create_batch(self, name):
+        """Requests the servers of a batch.
+
+        Returns the filters of list_servers matching the batch and the
+        number of servers expected.
+        """
+
+    def _record_batch(self, start, requested, active, errors):
+        total = len(active) + len(errors)
+        self.add_metric('batch_create_request', requested - start)
+        for seen in active.values():
+            self.add_metric('server_active', seen - start)
+        if active:
+            first = min(active.values())
+            last = max(active.values())
+            self.add_metric('batch_first_active', first - start)
+            self.add_metric('batch_all_active', last - start)
+            self.add_metric('batch_spread', last - first)
+        if total:
+            no_host = len([fault for fault in errors.values()
+                           if NO_VALID_HOST in fault])
+            self.add_metric('build_failure_rate',
+                            float(len(errors)) / total)
+            self.add_metric('scheduling_failure_rate',
+                            float(no_host) / total)
+
+    def run(self):
+        name = data_utils.rand_name(self.__class__.__name__ + "-instance")
+        admission.acquire(admission.INSTANCES, CONF.compute.build_timeout,
+                          count=self.batch_size)
+        client = self.manager.servers_client
+        start = time.time()
+        self.logger.info("creating %d servers %s", self.batch_size, name)
+        try:
+            filters, expected = self._create_batch(name)
+        except Exception:
+            admission.release(admission.INSTANCES, self.batch_size)
+            raise
+        requested = time.time()
+        try:
+            active, errors = server_batches.wait_for_batch(
+                client, filters, expected, start, self.poll_interval)
+            self.logger.info("%d servers %s ACTIVE, %d in ERROR",
+                             len(active), name, len(errors))
+            self._record_batch(start, requested, active, errors)
+        finally:
+            self.logger.info("deleting servers %s", name)
+            server_batches.delete_batch(client, filters, self.poll_interval)
+            # NOTE: the slots are kept if the batch was not deleted
+            admission.release(admission.INSTANCES, self.batch_size)
+        if errors:
+            server_id, fault = sorted(errors.items())[0]
+            raise exceptions.BuildErrorException(
+                "%d of %d servers of the batch in ERROR: %s" % (
+                    len(errors), len(active) + len(errors), fault),
+                server_id=server_id)
+
+
+class ServerBulkCreateTest(ServerBatchTest):
+    """Boots the batch with one multi-create request.
+
+    kwargs: ``min_count`` (default ``batch_size``), the least number of
+    servers nova has to accept for the request to succeed.
+    """
+
+    def setUp(self, **kwargs):
+        super(ServerBulkCreateTest, self).setUp(**kwargs)
+        self.min_count = kwargs.get('min_count', self.batch_size)
+
+    def _create_batch(self, name):
+        return server_batches.create_batch(
+            self.manager.servers_client, name, self.batch_size,
+            self.min_count, imageRef=self.image, flavorRef=self.flavor)
+
+
+class ServerConcurrentCreateTest(ServerBatchTest):
+    """Boots the batch with concurrent single create requests."""
+
+    def _create_one(self, name):
+        return self.manager.servers_client.create_server(
+            name=name, imageRef=self.image, flavorRef=self.flavor)
+
+    def _create_batch(self, name):
+        filters = {'name': '^%s-' % name}
+        with futures.ThreadPoolExecutor(self.batch_size) as executor:
+            requests = [executor.submit(self._create_one,
+                                        '%s-%d' % (name, index))
+                        for index in range(self.batch_size)]
+        failed = [request.exception() for request in requests
+                  if request.exception() is not None]
+        if failed:
+            self.logger.info("%d of %d create requests of %s failed",
+                             len(failed), self.batch_size, name)
+            server_batches.delete_batch(self.manager.servers_client,
+                                        filters, self.poll_interval)
+            raise failed[0]
+        return filters, self.batch_size
@@ -16,6 +16,7 @@ from tempest.common import waiters
 from tempest import config
 from tempest.lib.common.utils import data_utils
 
+from tempest_stress import admission
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
@@ -29,15 +30,19 @@ class ServerCreateDestroyTest(stressaction.StressAction):
 
     def run(self):
         name = data_utils.rand_name(self.__class__.__name__ + "-instance")
+        servers_client = self.manager.servers_client
         self.logger.info("creating %s" % name)
-        server = self.manager.servers_client.create_server(
-            name=name, imageRef=self.image, flavorRef=self.flavor)['server']
+        server = admission.create_server(
+            servers_client, CONF.compute.build_timeout, name=name,
+            imageRef=self.image, flavorRef=self.flavor)
         server_id = server['id']
-        waiters.wait_for_server_status(self.manager.servers_client, server_id,
-                                       'ACTIVE')
+        try:
+            waiters.wait_for_server_status(servers_client, server_id,
+                                           'ACTIVE')
+        except Exception:
+            admission.delete_server_quietly(servers_client, server_id)
+            raise
         self.logger.info("created %s" % server_id)
         self.logger.info("deleting %s" % name)
-        self.manager.servers_client.delete_server(server_id)
-        waiters.wait_for_server_termination(self.manager.servers_client,
-                                            server_id)
+        admission.delete_server(servers_client, server_id)
         self.logger.info("deleted %s" % server_id)
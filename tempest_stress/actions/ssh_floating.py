@@ -10,14 +10,13 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import socket
-import subprocess
-
 from tempest.common import waiters
 from tempest import config
 from tempest.lib.common.utils import data_utils
 from tempest.lib.common.utils import test_utils
 
+from tempest_stress import admission
+from tempest_stress import prober
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
@@ -25,50 +24,36 @@ CONF = config.CONF
 
 class FloatingStress(stressaction.StressAction):
 
-    # from the scenario manager
     def ping_ip_address(self, ip_address):
-        cmd = ['ping', '-c1', '-w1', ip_address]
-
-        proc = subprocess.Popen(cmd,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE)
-        proc.communicate()
-        success = proc.returncode == 0
-        return success
+        result = self.prober.wait_for_icmp([ip_address], 0)
+        return result[ip_address] is not None
 
     def tcp_connect_scan(self, addr, port):
-        # like tcp
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            s.connect((addr, port))
-        except socket.error as exc:
-            self.logger.info("%s(%s): %s", self.server_id, self.floating['ip'],
-                             str(exc))
-            return False
-        self.logger.info("%s(%s): Connected :)", self.server_id,
-                         self.floating['ip'])
-        s.close()
-        return True
+        result = self.prober.wait_for_tcp([addr], port, 0)
+        return result[addr] is not None
+
+    def _wait_reachable(self, check, *args):
+        ip = self.floating['ip']
+        elapsed = check([ip], *args, deadline=self.check_timeout)[ip]
+        if elapsed is not None:
+            self.logger.info("%s(%s): reachable after %.2fs",
+                             self.server_id, ip, elapsed)
+        return elapsed
 
     def check_port_ssh(self):
-        def func():
-            return self.tcp_connect_scan(self.floating['ip'], 22)
-        if not test_utils.call_until_true(func, self.check_timeout,
-                                          self.check_interval):
+        elapsed = self._wait_reachable(self.prober.wait_for_tcp, 22)
+        if elapsed is None:
             raise RuntimeError("Cannot connect to the ssh port.")
+        self.add_metric('ssh_reachable', elapsed)
 
     def check_icmp_echo(self):
         self.logger.info("%s(%s): Pinging..",
                          self.server_id, self.floating['ip'])
-
-        def func():
-            return self.ping_ip_address(self.floating['ip'])
-        if not test_utils.call_until_true(func, self.check_timeout,
-                                          self.check_interval):
-            raise RuntimeError("%s(%s): Cannot ping the machine.",
-                               self.server_id, self.floating['ip'])
-        self.logger.info("%s(%s): pong :)",
-                         self.server_id, self.floating['ip'])
+        elapsed = self._wait_reachable(self.prober.wait_for_icmp)
+        if elapsed is None:
+            raise RuntimeError("%s(%s): Cannot ping the machine." %
+                               (self.server_id, self.floating['ip']))
+        self.add_metric('icmp_reachable', elapsed)
 
     def _create_vm(self):
         self.name = name = data_utils.rand_name(
@@ -77,19 +62,22 @@ class FloatingStress(stressaction.StressAction):
         self.logger.info("creating %s" % name)
         vm_args = self.vm_extra_args.copy()
         vm_args['security_groups'] = [self.sec_grp]
-        server = servers_client.create_server(name=name, imageRef=self.image,
-                                              flavorRef=self.flavor,
-                                              **vm_args)['server']
+        server = admission.create_server(
+            servers_client, CONF.compute.build_timeout, name=name,
+            imageRef=self.image, flavorRef=self.flavor, **vm_args)
         self.server_id = server['id']
         if self.wait_after_vm_create:
-            waiters.wait_for_server_status(self.manager.servers_client,
-                                           self.server_id, 'ACTIVE')
+            try:
+                waiters.wait_for_server_status(servers_client,
+                                               self.server_id, 'ACTIVE')
+            except Exception:
+                admission.delete_server_quietly(servers_client,
+                                                self.server_id)
+                raise
 
     def _destroy_vm(self):
         self.logger.info("deleting %s" % self.server_id)
-        self.manager.servers_client.delete_server(self.server_id)
-        waiters.wait_for_server_termination(self.manager.servers_client,
-                                            self.server_id)
+        admission.delete_server(self.manager.servers_client, self.server_id)
         self.logger.info("deleted %s" % self.server_id)
 
     def _create_sec_group(self):
@@ -134,6 +122,9 @@ class FloatingStress(stressaction.StressAction):
                                             'check_icmp_echo'))
         self.check_timeout = kwargs.get('check_timeout', 120)
         self.check_interval = kwargs.get('check_interval', 1)
+        self.probe_timeout = kwargs.get('probe_timeout', 1)
+        self.prober = prober.Prober(timeout=self.probe_timeout,
+                                    interval=self.check_interval)
         self.wait_for_disassociate = kwargs.get('wait_for_disassociate',
                                                 True)
 
@@ -178,12 +169,18 @@ class FloatingStress(stressaction.StressAction):
             self._create_floating_ip()
         if self.new_vm:
             self._create_vm()
-        if self.reboot:
-            self.manager.servers_client.reboot(self.server_id, 'HARD')
-            waiters.wait_for_server_status(self.manager.servers_client,
-                                           self.server_id, 'ACTIVE')
-
-        self.run_core()
+        try:
+            if self.reboot:
+                self.manager.servers_client.reboot(self.server_id, 'HARD')
+                waiters.wait_for_server_status(self.manager.servers_client,
+                                               self.server_id, 'ACTIVE')
+
+            self.run_core()
+        except Exception:
+            if self.new_vm:
+                admission.delete_server_quietly(self.manager.servers_client,
+                                                self.server_id)
+            raise
 
         if self.new_vm:
             self._destroy_vm()
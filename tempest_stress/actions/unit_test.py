@@ -10,12 +10,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
+
+from oslo_log import log as logging
 from oslo_utils import importutils
 from tempest_stress import config
 
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
+LOG = logging.getLogger(__name__)
 
 
 class SetUpClassRunTime(object):
@@ -32,6 +36,51 @@ class SetUpClassRunTime(object):
             raise KeyError("\'%s\' not a valid option" % name)
 
 
+class FixtureCache(object):
+    """Keeps the class level fixture of a test class across iterations.
+
+    The fixture (``setUpClass``) is reused as long as it is valid: it is
+    rebuilt after ``max_uses`` iterations, after a failed iteration and
+    whenever ``check`` (a callable on the test class) returns False.
+    """
+
+    def __init__(self, klass, check=None, max_uses=None):
+        self.klass = klass
+        self.check = check
+        self.max_uses = max_uses
+        self.uses = 0
+        self.ready = False
+
+    def valid(self):
+        if not self.ready:
+            return False
+        if self.max_uses is not None and self.uses >= self.max_uses:
+            return False
+        if self.check is not None:
+            try:
+                return bool(self.check())
+            except Exception:
+                LOG.exception("Fixture check of %s failed",
+                              self.klass.__name__)
+                return False
+        return True
+
+    def acquire(self):
+        if not self.valid():
+            self.release()
+            self.klass.setUpClass()
+            self.ready = True
+            self.uses = 0
+        self.uses += 1
+
+    def release(self, dirty=False):
+        """Drops the fixture, without tearDownClass if ``dirty`` is set."""
+        if self.ready:
+            self.ready = False
+            if not dirty:
+                self.klass.tearDownClass()
+
+
 class UnitTest(stressaction.StressAction):
     """This is a special action for running existing unittests as stress test.
 
@@ -43,6 +92,16 @@ class UnitTest(stressaction.StressAction):
            ``process``: once in the worker process lifetime
            ``action``: on each action
        Not all combination working in every case.
+
+       Optional ``kwargs``:
+       ``fixture_cache``: reuse the class fixture across iterations
+       (``process`` and ``action`` only) while it is valid, see
+       :class:`FixtureCache`
+       ``fixture_check``: name of a callable on the test class returning
+       whether the cached class fixture is still usable
+       ``fixture_max_uses``: number of iterations a cached fixture is used
+       ``concurrency``: number of test method instances run concurrently
+       in threads on each iteration
     """
 
     def setUp(self, **kwargs):
@@ -58,22 +117,55 @@ class UnitTest(stressaction.StressAction):
             self.klass.setUpClass()
         self.setupclass_called = False
 
+        self.fixture_cache = None
+        if (kwargs.get('fixture_cache', False) and
+                self.class_setup_per != SetUpClassRunTime.application):
+            check = kwargs.get('fixture_check')
+            if check is not None:
+                check = getattr(self.klass, check)
+            self.fixture_cache = FixtureCache(
+                self.klass, check=check,
+                max_uses=kwargs.get('fixture_max_uses'))
+        self.concurrency = kwargs.get('concurrency', 1)
+        # NOTE: the executor is created in the worker process on first use
+        self._executor = None
+
     @property
     def action(self):
         if self.test_method:
             return self.test_method
         return super(UnitTest, self).action
 
+    def _run_test(self):
+        return self.klass(self.test_method).run()
+
     def run_core(self):
-        res = self.klass(self.test_method).run()
-        if res.errors:
-            raise RuntimeError(res.errors[0][1])
+        if self.concurrency > 1:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    max_workers=self.concurrency)
+            results = [f.result() for f in
+                       [self._executor.submit(self._run_test)
+                        for _ in range(self.concurrency)]]
+        else:
+            results = [self._run_test()]
+        for res in results:
+            if res.errors:
+                raise RuntimeError(res.errors[0][1])
 
-        if res.failures:
-            raise RuntimeError(res.failures[0][1])
+            if res.failures:
+                raise RuntimeError(res.failures[0][1])
 
     def run(self):
-        if self.class_setup_per != SetUpClassRunTime.application:
+        if self.fixture_cache is not None:
+            self.fixture_cache.acquire()
+            try:
+                self.run_core()
+            except Exception:
+                self.fixture_cache.release(
+                    dirty=CONF.stress.leave_dirty_stack)
+                raise
+        elif self.class_setup_per != SetUpClassRunTime.application:
             if (self.class_setup_per == SetUpClassRunTime.action
                or self.setupclass_called is False):
                 self.klass.setUpClass()
@@ -89,5 +181,9 @@ class UnitTest(stressaction.StressAction):
             self.run_core()
 
     def tearDown(self):
-        if self.class_setup_per != SetUpClassRunTime.action:
+        if self._executor is not None:
+            self._executor.shutdown()
+        if self.fixture_cache is not None:
+            self.fixture_cache.release()
+        elif self.class_setup_per != SetUpClassRunTime.action:
             self.klass.tearDownClass()
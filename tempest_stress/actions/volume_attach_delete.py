@@ -15,57 +15,86 @@ from tempest.common import waiters
 from tempest import config
 from tempest.lib.common.utils import data_utils
 
+from tempest_stress import admission
+from tempest_stress import attachments
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
 
 
 class VolumeAttachDeleteTest(stressaction.StressAction):
+    """Attaches volumes to a new server and deletes the server.
+
+    kwargs: ``volumes`` (default 1) volumes attached concurrently per
+    run, see :mod:`tempest_stress.attachments`.
+    """
 
     def setUp(self, **kwargs):
         self.image = CONF.compute.image_ref
         self.flavor = CONF.compute.flavor_ref
+        self.volumes = kwargs.get('volumes', 1)
 
     def run(self):
-        # Step 1: create volume
-        name = data_utils.rand_name(self.__class__.__name__ + "-volume")
-        self.logger.info("creating volume: %s" % name)
-        volume = self.manager.volumes_client.create_volume(
-            display_name=name, size=CONF.volume.volume_size)['volume']
-        self.manager.volumes_client.wait_for_volume_status(volume['id'],
-                                                           'available')
-        self.logger.info("created volume: %s" % volume['id'])
+        volume_ids = []
+        try:
+            self._run(volume_ids)
+        except Exception:
+            for volume_id in volume_ids:
+                admission.delete_volume_quietly(self.manager.volumes_client,
+                                                volume_id)
+            raise
+
+        # Step 5: delete volumes
+        self.logger.info("deleting volumes: %s" % ', '.join(volume_ids))
+        admission.delete_volumes(self.manager.volumes_client, volume_ids)
+        self.logger.info("deleted volumes: %s" % ', '.join(volume_ids))
+
+    def _run(self, volume_ids):
+        # Step 1: create volumes
+        for _ in range(self.volumes):
+            name = data_utils.rand_name(self.__class__.__name__ + "-volume")
+            self.logger.info("creating volume: %s" % name)
+            volume = admission.create_volume(
+                self.manager.volumes_client, CONF.volume.build_timeout,
+                display_name=name, size=CONF.volume.volume_size)
+            volume_ids.append(volume['id'])
+        for volume_id in volume_ids:
+            self.manager.volumes_client.wait_for_volume_status(volume_id,
+                                                               'available')
+            self.logger.info("created volume: %s" % volume_id)
 
         # Step 2: create vm instance
         vm_name = data_utils.rand_name(self.__class__.__name__ + "-instance")
         self.logger.info("creating vm: %s" % vm_name)
-        server = self.manager.servers_client.create_server(
-            name=vm_name, imageRef=self.image, flavorRef=self.flavor)['server']
+        servers_client = self.manager.servers_client
+        server = admission.create_server(
+            servers_client, CONF.compute.build_timeout, name=vm_name,
+            imageRef=self.image, flavorRef=self.flavor)
         server_id = server['id']
-        waiters.wait_for_server_status(self.manager.servers_client, server_id,
-                                       'ACTIVE')
-        self.logger.info("created vm %s" % server_id)
-
-        # Step 3: attach volume to vm
-        self.logger.info("attach volume (%s) to vm %s" %
-                         (volume['id'], server_id))
-        self.manager.servers_client.attach_volume(server_id,
-                                                  volumeId=volume['id'],
-                                                  device='/dev/vdc')
-        self.manager.volumes_client.wait_for_volume_status(volume['id'],
-                                                           'in-use')
-        self.logger.info("volume (%s) attached to vm %s" %
-                         (volume['id'], server_id))
+        try:
+            self._attach(server_id, volume_ids)
+        except Exception:
+            # NOTE: deleting the server detaches the volumes
+            admission.delete_server_quietly(servers_client, server_id)
+            raise
 
         # Step 4: delete vm
         self.logger.info("deleting vm: %s" % vm_name)
-        self.manager.servers_client.delete_server(server_id)
-        waiters.wait_for_server_termination(self.manager.servers_client,
-                                            server_id)
+        admission.delete_server(servers_client, server_id)
         self.logger.info("deleted vm: %s" % server_id)
 
-        # Step 5: delete volume
-        self.logger.info("deleting volume: %s" % volume['id'])
-        self.manager.volumes_client.delete_volume(volume['id'])
-        self.manager.volumes_client.wait_for_resource_deletion(volume['id'])
-        self.logger.info("deleted volume: %s" % volume['id'])
+    def _attach(self, server_id, volume_ids):
+        waiters.wait_for_server_status(self.manager.servers_client, server_id,
+                                       'ACTIVE')
+        self.logger.info("created vm %s" % server_id)
+
+        # Step 3: attach the volumes to vm
+        self.logger.info("attach volumes (%s) to vm %s" %
+                         (', '.join(volume_ids), server_id))
+        # NOTE: a single volume keeps the device of the original test
+        device = '/dev/vdc' if len(volume_ids) == 1 else None
+        attachments.attach_volumes(self, server_id, volume_ids, device,
+                                   attachments.host_of(self.manager,
+                                                       server_id))
+        self.logger.info("volumes (%s) attached to vm %s" %
+                         (', '.join(volume_ids), server_id))
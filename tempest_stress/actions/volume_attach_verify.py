@@ -12,16 +12,25 @@
 
 import re
 
-from tempest.common.utils.linux import remote_client
 from tempest.common import waiters
 from tempest import config
+from tempest.lib.common import ssh
 from tempest.lib.common.utils import data_utils
 from tempest.lib.common.utils import test_utils
 
+from tempest_stress import admission
+from tempest_stress import attachments
+from tempest_stress import ssh_session
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
 
+# Prints the /proc/partitions entries (';' separated) on every change
+PARTITIONS_WATCH = ('prev=; while :; do '
+                    'cur=$(tail -n +3 /proc/partitions | tr "\\n" ";"); '
+                    'if [ "$cur" != "$prev" ]; then echo "$cur"; '
+                    'prev=$cur; fi; sleep %s; done')
+
 
 class VolumeVerifyStress(stressaction.StressAction):
 
@@ -41,18 +50,23 @@ class VolumeVerifyStress(stressaction.StressAction):
         vm_args = self.vm_extra_args.copy()
         vm_args['security_groups'] = [self.sec_grp]
         vm_args['key_name'] = self.key['name']
-        server = servers_client.create_server(name=name, imageRef=self.image,
-                                              flavorRef=self.flavor,
-                                              **vm_args)['server']
+        server = admission.create_server(
+            servers_client, CONF.compute.build_timeout, name=name,
+            imageRef=self.image, flavorRef=self.flavor, **vm_args)
         self.server_id = server['id']
-        waiters.wait_for_server_status(self.manager.servers_client,
-                                       self.server_id, 'ACTIVE')
+        self.host = None
+        try:
+            waiters.wait_for_server_status(servers_client, self.server_id,
+                                           'ACTIVE')
+            self.host = attachments.host_of(self.manager, self.server_id)
+        except Exception:
+            admission.delete_server_quietly(servers_client, self.server_id)
+            raise
 
     def _destroy_vm(self):
         self.logger.info("deleting server: %s" % self.server_id)
-        self.manager.servers_client.delete_server(self.server_id)
-        waiters.wait_for_server_termination(self.manager.servers_client,
-                                            self.server_id)
+        admission.delete_server(self.manager.servers_client, self.server_id)
+        self.host = None
         self.logger.info("deleted server: %s" % self.server_id)
 
     def _create_sec_group(self):
@@ -82,22 +96,52 @@ class VolumeVerifyStress(stressaction.StressAction):
         cli.wait_for_resource_deletion(self.floating['id'])
         self.logger.info("Deleted Floating IP %s", str(self.floating['ip']))
 
-    def _create_volume(self):
-        name = data_utils.rand_name(self.__class__.__name__ + "-volume")
-        self.logger.info("creating volume: %s" % name)
+    def _create_volumes(self):
         volumes_client = self.manager.volumes_client
-        self.volume = volumes_client.create_volume(
-            display_name=name, size=CONF.volume.volume_size)['volume']
-        volumes_client.wait_for_volume_status(self.volume['id'],
-                                              'available')
-        self.logger.info("created volume: %s" % self.volume['id'])
-
-    def _delete_volume(self):
-        self.logger.info("deleting volume: %s" % self.volume['id'])
+        self.volume_ids = []
+        try:
+            for _ in range(self.volumes):
+                name = data_utils.rand_name(
+                    self.__class__.__name__ + "-volume")
+                self.logger.info("creating volume: %s" % name)
+                volume = admission.create_volume(
+                    volumes_client, CONF.volume.build_timeout,
+                    display_name=name, size=CONF.volume.volume_size)
+                self.volume_ids.append(volume['id'])
+            for volume_id in self.volume_ids:
+                volumes_client.wait_for_volume_status(volume_id, 'available')
+                self.logger.info("created volume: %s" % volume_id)
+        except Exception:
+            self._delete_volumes(quietly=True)
+            raise
+
+    def _delete_volumes(self, quietly=False):
         volumes_client = self.manager.volumes_client
-        volumes_client.delete_volume(self.volume['id'])
-        volumes_client.wait_for_resource_deletion(self.volume['id'])
-        self.logger.info("deleted volume: %s" % self.volume['id'])
+        self.logger.info("deleting volumes: %s" % ', '.join(self.volume_ids))
+        volume_ids, self.volume_ids = self.volume_ids, []
+        if quietly:
+            for volume_id in volume_ids:
+                admission.delete_volume_quietly(volumes_client, volume_id)
+        else:
+            admission.delete_volumes(volumes_client, volume_ids)
+        self.logger.info("deleted volumes: %s" % ', '.join(volume_ids))
+
+    def _discard_volumes(self):
+        """Deletes the volumes of a failed run.
+
+        They are detached first if the server is kept.
+        """
+        if not self.new_server:
+            for volume_id in self.volume_ids:
+                try:
+                    self.manager.servers_client.detach_volume(
+                        self.server_id, volume_id)
+                    self.manager.volumes_client.wait_for_volume_status(
+                        volume_id, 'available')
+                except Exception as exc:
+                    self.logger.info("volume %s not detached: %s" %
+                                     (volume_id, exc))
+        self._delete_volumes(quietly=True)
 
     def _wait_disassociate(self):
         cli = self.manager.compute_floating_ips_client
@@ -111,15 +155,34 @@ class VolumeVerifyStress(stressaction.StressAction):
                                           CONF.compute.build_interval):
             raise RuntimeError("IP disassociate timeout!")
 
+    def _open_session(self):
+        self._close_session()
+        self.session = ssh_session.SSHSession(self.ssh_client)
+        self.partitions_watch = self.session.watch(
+            PARTITIONS_WATCH % self.watch_interval)
+
+    def _close_session(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
     def new_server_ops(self):
         self._create_vm()
-        cli = self.manager.compute_floating_ips_client
-        cli.associate_floating_ip_to_server(self.floating['ip'],
+        try:
+            cli = self.manager.compute_floating_ips_client
+            cli.associate_floating_ip_to_server(self.floating['ip'],
+                                                self.server_id)
+            if self.enable_ssh_verify:
+                self._open_session()
+                if self.ssh_test_before_attach:
+                    self.logger.info("Scanning for block devices via ssh on "
+                                     "%s" % self.server_id)
+                    self.part_wait(self.detach_match_count)
+        except Exception:
+            self._close_session()
+            admission.delete_server_quietly(self.manager.servers_client,
                                             self.server_id)
-        if self.ssh_test_before_attach and self.enable_ssh_verify:
-            self.logger.info("Scanning for block devices via ssh on %s"
-                             % self.server_id)
-            self.part_wait(self.detach_match_count)
+            raise
 
     def setUp(self, **kwargs):
         """Note able configuration combinations:
@@ -144,6 +207,12 @@ class VolumeVerifyStress(stressaction.StressAction):
                 new_volume = True
                 enable_ssh_verify = True
                 ssh_test_before_attach = True
+
+        ``volumes`` (default 1) volumes are attached and detached
+        concurrently per run, see :mod:`tempest_stress.attachments`.
+        The guest has to report ``attach_match_count`` (default
+        ``detach_match_count`` + ``volumes``) matching partitions once
+        they are attached.
         """
         self.image = CONF.compute.image_ref
         self.flavor = CONF.compute.flavor_ref
@@ -155,72 +224,115 @@ class VolumeVerifyStress(stressaction.StressAction):
         self.ssh_test_before_attach = kwargs.get('ssh_test_before_attach',
                                                  False)
         self.part_line_re = re.compile(kwargs.get('part_line_re', '.*vd.*'))
+        self.volumes = kwargs.get('volumes', 1)
         self.detach_match_count = kwargs.get('detach_match_count', 1)
-        self.attach_match_count = kwargs.get('attach_match_count', 2)
+        self.attach_match_count = kwargs.get(
+            'attach_match_count', self.detach_match_count + self.volumes)
         self.part_name = kwargs.get('part_name', '/dev/vdc')
+        self.watch_interval = kwargs.get('watch_interval', 0.2)
+        self.session = None
+        self.volume_ids = []
+        self.host = None
 
         self._create_floating_ip()
         self._create_sec_group()
         self._create_keypair()
         private_key = self.key['private_key']
         username = CONF.validation.image_ssh_user
-        self.remote_client = remote_client.RemoteClient(self.floating['ip'],
-                                                        username,
-                                                        pkey=private_key)
+        self.ssh_client = ssh.Client(self.floating['ip'], username,
+                                     pkey=private_key,
+                                     timeout=CONF.validation.ssh_timeout)
         if not self.new_volume:
-            self._create_volume()
+            self._create_volumes()
         if not self.new_server:
             self.new_server_ops()
 
     # now we just test that the number of partitions has increased or decreased
-    def part_wait(self, num_match):
-        def _part_state():
-            self.partitions = self.remote_client.get_partitions().split('\n')
+    def part_wait(self, num_match, seen=None):
+        """Waits for the guest to report ``num_match`` matching partitions.
+
+        Returns the time the guest side watch reported the change. If
+        ``seen`` is given, every number of matching partitions reported
+        meanwhile is mapped to the time it was first reported.
+        """
+        def _part_state(line):
+            self.partitions = line.split(';')
             matching = 0
-            for part_line in self.partitions[1:]:
+            for part_line in self.partitions:
                 if self.part_line_re.match(part_line):
                     matching += 1
+            if seen is not None:
+                seen.setdefault(matching, self.partitions_watch.changed_at)
             return matching == num_match
-        if test_utils.call_until_true(_part_state,
-                                      CONF.compute.build_timeout,
-                                      CONF.compute.build_interval):
-            return
-        else:
-            raise RuntimeError("Unexpected partitions: %s",
+        seen_at = self.partitions_watch.wait_for(_part_state,
+                                                 CONF.compute.build_timeout)
+        if seen_at is None:
+            raise RuntimeError("Unexpected partitions: %s" %
                                str(self.partitions))
+        return seen_at
+
+    def _guest_latencies(self, metric, seen, start, counts, reached):
+        """Records when the guest reported each of the ``counts``."""
+        for count in counts:
+            self.add_metric(metric, min(
+                seen_at for matching, seen_at in seen.items()
+                if reached(matching, count)) - start)
 
     def run(self):
         if self.new_server:
             self.new_server_ops()
+        try:
+            self._run()
+        except Exception:
+            if self.new_server:
+                self._close_session()
+                admission.delete_server_quietly(self.manager.servers_client,
+                                                self.server_id)
+            if self.new_volume:
+                self._discard_volumes()
+            raise
+        if self.new_server:
+            self._close_session()
+            self._destroy_vm()
+
+    def _run(self):
         if self.new_volume:
-            self._create_volume()
-        servers_client = self.manager.servers_client
-        self.logger.info("attach volume (%s) to vm %s" %
-                         (self.volume['id'], self.server_id))
-        servers_client.attach_volume(self.server_id,
-                                     volumeId=self.volume['id'],
-                                     device=self.part_name)
-        self.manager.volumes_client.wait_for_volume_status(self.volume['id'],
-                                                           'in-use')
+            self._create_volumes()
+        count = len(self.volume_ids)
+        self.logger.info("attach volumes (%s) to vm %s" %
+                         (', '.join(self.volume_ids), self.server_id))
+        # NOTE: a single volume keeps the configured device
+        device = self.part_name if count == 1 else None
+        attach_start = attachments.attach_volumes(
+            self, self.server_id, self.volume_ids, device, self.host)
         if self.enable_ssh_verify:
-            self.logger.info("Scanning for new block device on %s"
+            self.logger.info("Scanning for new block devices on %s"
                              % self.server_id)
-            self.part_wait(self.attach_match_count)
+            seen = {}
+            self.part_wait(self.attach_match_count, seen)
+            self._guest_latencies(
+                'guest_attach_latency', seen, attach_start,
+                range(self.attach_match_count - count + 1,
+                      self.attach_match_count + 1),
+                lambda matching, wanted: matching >= wanted)
 
-        servers_client.detach_volume(self.server_id,
-                                     self.volume['id'])
-        self.manager.volumes_client.wait_for_volume_status(self.volume['id'],
-                                                           'available')
+        detach_start = attachments.detach_volumes(
+            self, self.server_id, self.volume_ids, self.host)
         if self.enable_ssh_verify:
             self.logger.info("Scanning for block device disappearance on %s"
                              % self.server_id)
-            self.part_wait(self.detach_match_count)
+            seen = {}
+            self.part_wait(self.detach_match_count, seen)
+            self._guest_latencies(
+                'guest_detach_latency', seen, detach_start,
+                range(self.detach_match_count + count - 1,
+                      self.detach_match_count - 1, -1),
+                lambda matching, wanted: matching <= wanted)
         if self.new_volume:
-            self._delete_volume()
-        if self.new_server:
-            self._destroy_vm()
+            self._delete_volumes()
 
     def tearDown(self):
+        self._close_session()
         cli = self.manager.compute_floating_ips_client
         cli.disassociate_floating_ip_from_server(self.floating['ip'],
                                                  self.server_id)
@@ -231,4 +343,4 @@ class VolumeVerifyStress(stressaction.StressAction):
         self._destroy_floating_ip()
         self._destroy_sec_grp()
         if not self.new_volume:
-            self._delete_volume()
+            self._delete_volumes()
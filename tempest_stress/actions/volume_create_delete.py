@@ -13,6 +13,7 @@
 from tempest import config
 from tempest.lib.common.utils import data_utils
 
+from tempest_stress import admission
 import tempest_stress.stressaction as stressaction
 
 CONF = config.CONF
@@ -24,12 +25,16 @@ class VolumeCreateDeleteTest(stressaction.StressAction):
         name = data_utils.rand_name("volume")
         self.logger.info("creating %s" % name)
         volumes_client = self.manager.volumes_client
-        volume = volumes_client.create_volume(
-            display_name=name, size=CONF.volume.volume_size)['volume']
+        volume = admission.create_volume(
+            volumes_client, CONF.volume.build_timeout, display_name=name,
+            size=CONF.volume.volume_size)
         vol_id = volume['id']
-        volumes_client.wait_for_volume_status(vol_id, 'available')
+        try:
+            volumes_client.wait_for_volume_status(vol_id, 'available')
+        except Exception:
+            admission.delete_volume_quietly(volumes_client, vol_id)
+            raise
         self.logger.info("created %s" % volume['id'])
         self.logger.info("deleting %s" % name)
-        volumes_client.delete_volume(vol_id)
-        volumes_client.wait_for_resource_deletion(vol_id)
+        admission.delete_volume(volumes_client, vol_id)
         self.logger.info("deleted %s" % vol_id)
@@ -0,0 +1,192 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Admission control for the resources created by the stress actions.
+
+The driver configures one counting semaphore per resource kind before the
+workers are forked, so the number of live resources of a kind never
+exceeds its limit across all workers. Actions take a slot before creating
+a resource and give it back once the resource is gone.
+
+Servers are created and deleted with create_server() and delete_server(),
+which apply that rule: the slot of a server is given back if its
+creation failed or once it is confirmed deleted, but kept if the
+deletion failed, as the server still counts against the quota.
+create_volume(), delete_volume() and delete_volumes() do the same for
+volumes.
+"""
+
+import multiprocessing
+import time
+
+from oslo_log import log as logging
+from tempest.common import waiters
+from tempest.lib import exceptions
+
+from tempest_stress import stressaction
+
+LOG = logging.getLogger(__name__)
+
+INSTANCES = 'instances'
+VOLUMES = 'volumes'
+
+_slots = {}
+_limits = {}
+# taken while acquiring several slots at once, see acquire()
+_batch_locks = {}
+
+
+def configure(limits):
+    """Sets up the slots; ``limits`` maps a kind to its limit (0: none)."""
+    _slots.clear()
+    _limits.clear()
+    _batch_locks.clear()
+    for kind, limit in limits.items():
+        if limit:
+            LOG.info("Admission control: at most %d %s", limit, kind)
+            _slots[kind] = multiprocessing.BoundedSemaphore(limit)
+            _limits[kind] = limit
+            _batch_locks[kind] = multiprocessing.Lock()
+
+
+def limit(kind):
+    """Returns the limit of ``kind``, 0 if it is not limited."""
+    return _limits.get(kind, 0)
+
+
+def acquire(kind, timeout=None, count=1):
+    """Takes ``count`` slots for resources of ``kind``.
+
+    Blocks until the slots are free and records the time waited as the
+    ``<kind>_slot_wait`` metric. Raises RuntimeError if they did not
+    become free within ``timeout`` seconds. Several slots are taken
+    atomically: only one process at a time collects slots this way, so
+    two processes holding part of their slots never wait on each other.
+    """
+    slots = _slots.get(kind)
+    if slots is None:
+        return 0.0
+    if count > _limits[kind]:
+        raise ValueError("%d %s requested, the limit is %d" %
+                         (count, kind, _limits[kind]))
+    start = time.time()
+    deadline = None if timeout is None else start + timeout
+
+    def _remaining():
+        return None if deadline is None else max(deadline - time.time(), 0)
+
+    if count == 1:
+        taken = int(slots.acquire(timeout=timeout))
+    else:
+        taken = 0
+        batch_lock = _batch_locks[kind]
+        if batch_lock.acquire(timeout=timeout):
+            try:
+                while taken < count and slots.acquire(timeout=_remaining()):
+                    taken += 1
+            finally:
+                batch_lock.release()
+    if taken < count:
+        release(kind, taken)
+        if count == 1:
+            raise RuntimeError("No free %s slot after %s seconds" %
+                               (kind, timeout))
+        raise RuntimeError("No %d free %s slots after %s seconds" %
+                           (count, kind, timeout))
+    waited = time.time() - start
+    stressaction.record_metric('%s_slot_wait' % kind, waited)
+    return waited
+
+
+def release(kind, count=1):
+    slots = _slots.get(kind)
+    if slots is None:
+        return
+    try:
+        for _ in range(count):
+            slots.release()
+    except ValueError:
+        LOG.warning("Released more %s slots than taken", kind)
+
+
+def create_server(servers_client, timeout=None, **kwargs):
+    """Takes an INSTANCES slot and creates a server, returns the server.
+
+    The slot is given back if the create request fails, otherwise the
+    server has to be deleted with delete_server().
+    """
+    acquire(INSTANCES, timeout)
+    try:
+        return servers_client.create_server(**kwargs)['server']
+    except Exception:
+        release(INSTANCES)
+        raise
+
+
+def delete_server(servers_client, server_id):
+    """Deletes a server and gives back its slot once it is gone."""
+    try:
+        servers_client.delete_server(server_id)
+    except exceptions.NotFound:
+        pass
+    waiters.wait_for_server_termination(servers_client, server_id)
+    release(INSTANCES)
+
+
+def delete_server_quietly(servers_client, server_id):
+    """Deletes a server on an error path, logging instead of raising."""
+    try:
+        delete_server(servers_client, server_id)
+    except Exception:
+        LOG.exception("Error while deleting server %s", server_id)
+
+
+def create_volume(volumes_client, timeout=None, **kwargs):
+    """Takes a VOLUMES slot and creates a volume, returns the volume.
+
+    The slot is given back if the create request fails, otherwise the
+    volume has to be deleted with delete_volume() or delete_volumes().
+    """
+    acquire(VOLUMES, timeout)
+    try:
+        return volumes_client.create_volume(**kwargs)['volume']
+    except Exception:
+        release(VOLUMES)
+        raise
+
+
+def delete_volumes(volumes_client, volume_ids):
+    """Deletes volumes and gives back the slot of each once it is gone.
+
+    All deletions are requested before waiting for the first one.
+    """
+    for volume_id in volume_ids:
+        try:
+            volumes_client.delete_volume(volume_id)
+        except exceptions.NotFound:
+            pass
+    for volume_id in volume_ids:
+        volumes_client.wait_for_resource_deletion(volume_id)
+        release(VOLUMES)
+
+
+def delete_volume(volumes_client, volume_id):
+    """Deletes a volume and gives back its slot once it is gone."""
+    delete_volumes(volumes_client, [volume_id])
+
+
+def delete_volume_quietly(volumes_client, volume_id):
+    """Deletes a volume on an error path, logging instead of raising."""
+    try:
+        delete_volume(volumes_client, volume_id)
+    except Exception:
+        LOG.exception("Error while deleting volume %s", volume_id)
@@ -0,0 +1,65 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Hooks into the HTTP request path of the tempest REST clients.
+
+A hook is a callable ``hook(client, method, url, call)`` that wraps a
+single HTTP request of a ``RestClient``; it has to return ``call()``.
+Hooks are installed on the class, so they are active in the driver and
+in every worker forked after they were registered.
+"""
+
+import collections
+import functools
+import re
+from urllib import parse as urlparse
+
+from tempest.lib.common import rest_client
+
+_hooks = collections.OrderedDict()
+_raw_request = None
+
+_ID_RE = re.compile(r'^(?:[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+                    r'[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}|[0-9a-fA-F]{32,}|'
+                    r'\d+)$')
+
+
+def normalize_path(url):
+    """Returns the path of ``url`` with resource IDs replaced by ``{id}``."""
+    path = urlparse.urlsplit(url).path
+    return '/'.join('{id}' if _ID_RE.match(part) else part
+                    for part in path.split('/'))
+
+
+def _hooked_raw_request(client, url, method, *args, **kwargs):
+    call = functools.partial(_raw_request, client, url, method, *args,
+                             **kwargs)
+    for hook in reversed(list(_hooks.values())):
+        call = functools.partial(hook, client, method, url, call)
+    return call()
+
+
+def register(name, hook):
+    """Registers (or replaces) the hook called ``name``.
+
+    Hooks are called in registration order, the first one is the
+    outermost.
+    """
+    global _raw_request
+    if _raw_request is None:
+        _raw_request = rest_client.RestClient.raw_request
+        rest_client.RestClient.raw_request = _hooked_raw_request
+    _hooks[name] = hook
+
+
+def unregister(name):
+    _hooks.pop(name, None)
@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Concurrent attachment of several volumes to one server.
+
+The volumes are attached (detached) by one thread each. The time from
+the request until a volume is ``in-use`` (``available``) is recorded
+per volume as the ``attach_latency`` (``detach_latency``) metric of the
+action, the volumes handled per second of the whole fan-out as
+``attachments_per_second`` (``detachments_per_second``) and, if the
+compute host of the server is known, also per host, e.g.
+``attachments_per_second[compute-1]``.
+"""
+
+from concurrent import futures
+import time
+
+HOST_ATTR = 'OS-EXT-SRV-ATTR:host'
+
+
+def host_of(manager, server_id):
+    """Returns the compute host of a server, None if not visible."""
+    return manager.servers_client.show_server(server_id)['server'].get(
+        HOST_ATTR)
+
+
+def fan_out(call, volume_ids):
+    """Runs ``call(volume_id)`` for all volumes concurrently.
+
+    Returns the results in the order of ``volume_ids``. If calls failed,
+    the first error is raised once all calls ended.
+    """
+    with futures.ThreadPoolExecutor(max(len(volume_ids), 1)) as executor:
+        calls = [executor.submit(call, volume_id)
+                 for volume_id in volume_ids]
+    for done in calls:
+        if done.exception() is not None:
+            raise done.exception()
+    return [done.result() for done in calls]
+
+
+def _record(action, metric, rate_metric, latencies, elapsed, host):
+    for latency in latencies:
+        action.add_metric(metric, latency)
+    if elapsed > 0:
+        rate = len(latencies) / elapsed
+        action.add_metric(rate_metric, rate)
+        if host:
+            action.add_metric('%s[%s]' % (rate_metric, host), rate)
+
+
+def attach_volumes(action, server_id, volume_ids, device=None, host=None):
+    """Attaches the volumes to the server, returns the start time."""
+    manager = action.manager
+
+    def attach(volume_id):
+        start = time.time()
+        kwargs = {'volumeId': volume_id}
+        if device:
+            kwargs['device'] = device
+        manager.servers_client.attach_volume(server_id, **kwargs)
+        manager.volumes_client.wait_for_volume_status(volume_id, 'in-use')
+        return time.time() - start
+
+    start = time.time()
+    latencies = fan_out(attach, volume_ids)
+    _record(action, 'attach_latency', 'attachments_per_second', latencies,
+            time.time() - start, host)
+    return start
+
+
+def detach_volumes(action, server_id, volume_ids, host=None):
+    """Detaches the volumes from the server, returns the start time."""
+    manager = action.manager
+
+    def detach(volume_id):
+        start = time.time()
+        manager.servers_client.detach_volume(server_id, volume_id)
+        manager.volumes_client.wait_for_volume_status(volume_id,
+                                                      'available')
+        return time.time() - start
+
+    start = time.time()
+    latencies = fan_out(detach, volume_ids)
+    _record(action, 'detach_latency', 'detachments_per_second', latencies,
+            time.time() - start, host)
+    return start
@@ -0,0 +1,176 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Circuit breaker backing off the load of a failing cloud.
+
+Workers count their runs, failures and the duration of the successful
+runs in counters shared by all processes. The driver checks them over a
+sliding window: once the error rate or the mean latency of the window
+crosses its limit the breaker opens and, depending on its action, the
+workers pause before their next run, are throttled to one run per
+``throttle_delay`` seconds each, or the run is aborted. After
+``cooldown`` seconds the breaker is half-open: the workers run
+throttled and once ``min_runs`` runs were done the breaker closes again
+if they were within the limits, otherwise it opens again.
+"""
+
+import collections
+import multiprocessing
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+PAUSE = 'pause'
+THROTTLE = 'throttle'
+ABORT = 'abort'
+ACTIONS = (PAUSE, THROTTLE, ABORT)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """Run gate shared by all processes forked after its creation."""
+
+    def __init__(self, window, max_error_rate=None, max_latency=None,
+                 min_runs=10, action=PAUSE, cooldown=60,
+                 throttle_delay=5.0):
+        if action not in ACTIONS:
+            raise ValueError("Unknown circuit breaker action %s" % action)
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.max_latency = max_latency
+        self.min_runs = min_runs
+        self.action = action
+        self.cooldown = cooldown
+        self.throttle_delay = throttle_delay
+        # checked often enough to trip within a tenth of the window
+        self.interval = max(window / 10.0, 1.0)
+        self.state = CLOSED
+        # the state changes as dicts of the time, the new state and the
+        # runs, error rate and mean latency of the window
+        self.changes = []
+        # runs, failed runs and the total duration of the successful runs
+        self._counters = multiprocessing.Array('d', 3)
+        self._closed = multiprocessing.Event()
+        self._closed.set()
+        self._delay = multiprocessing.Value('d', 0.0)
+        self._snapshots = collections.deque()
+        self._opened_at = None
+
+    def record(self, duration, failed):
+        """Counts a run of a worker."""
+        with self._counters.get_lock():
+            self._counters[0] += 1
+            if failed:
+                self._counters[1] += 1
+            else:
+                self._counters[2] += duration
+
+    def wait(self):
+        """Holds a worker back while the breaker is not closed.
+
+        Returns the seconds waited.
+        """
+        start = time.time()
+        held = not self._closed.is_set()
+        if held:
+            self._closed.wait()
+        delay = self._delay.value
+        if delay > 0:
+            time.sleep(delay)
+        elif not held:
+            return 0.0
+        return time.time() - start
+
+    @property
+    def aborted(self):
+        return self.action == ABORT and self.state == OPEN
+
+    def _measure(self, now):
+        """Returns the runs, error rate and mean latency of the window."""
+        counters = tuple(self._counters[:])
+        self._snapshots.append((now, counters))
+        while (len(self._snapshots) > 1 and
+               self._snapshots[1][0] <= now - self.window):
+            self._snapshots.popleft()
+        base = self._snapshots[0][1]
+        runs, fails, duration = [c - b for c, b in zip(counters, base)]
+        if not runs:
+            return 0, 0.0, None
+        latency = None
+        if runs > fails:
+            latency = duration / (runs - fails)
+        return int(runs), fails / runs, latency
+
+    def _healthy(self, error_rate, latency):
+        if (self.max_error_rate is not None and
+                error_rate > self.max_error_rate):
+            return False
+        if (self.max_latency is not None and latency is not None and
+                latency > self.max_latency):
+            return False
+        return True
+
+    def _change(self, state, now, runs, error_rate, latency):
+        LOG.warning("Circuit breaker %s: %d runs, error rate %.2f, mean "
+                    "latency %s in the last %ss", state, runs, error_rate,
+                    '-' if latency is None else '%.3fs' % latency,
+                    self.window)
+        self.state = state
+        self.changes.append({'time': now, 'state': state, 'runs': runs,
+                             'error_rate': error_rate,
+                             'latency': latency})
+        if state == CLOSED:
+            self._delay.value = 0.0
+            self._closed.set()
+        elif state == HALF_OPEN or self.action == THROTTLE:
+            self._delay.value = self.throttle_delay
+            self._closed.set()
+        else:
+            self._closed.clear()
+        # NOTE: the next decision only looks at runs after the change
+        self._snapshots.clear()
+        self._snapshots.append((now, tuple(self._counters[:])))
+
+    def check(self, now=None):
+        """Updates the state from the runs of the window, returns it."""
+        now = time.time() if now is None else now
+        runs, error_rate, latency = self._measure(now)
+        if self.state == OPEN:
+            if now - self._opened_at >= self.cooldown:
+                self._change(HALF_OPEN, now, runs, error_rate, latency)
+        elif runs >= self.min_runs:
+            if not self._healthy(error_rate, latency):
+                self._opened_at = now
+                self._change(OPEN, now, runs, error_rate, latency)
+            elif self.state == HALF_OPEN:
+                self._change(CLOSED, now, runs, error_rate, latency)
+        return self.state
+
+    def time_open(self, end):
+        """Returns the seconds the breaker was not closed until ``end``."""
+        total = 0.0
+        since = None
+        for change in self.changes:
+            if change['state'] == CLOSED:
+                if since is not None:
+                    total += change['time'] - since
+                since = None
+            elif since is None:
+                since = change['time']
+        if since is not None:
+            total += end - since
+        return total
@@ -0,0 +1,41 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""A number of runs shared by all workers of a stress run.
+
+Unlike ``max_runs``, which limits the runs of every worker, the budget
+is the total number of runs: workers claim one run at a time from a
+shared counter and end once it is exhausted, so exactly ``total`` runs
+are done however many workers there are.
+"""
+
+import multiprocessing
+
+
+class RunBudget(object):
+    """Run counter shared by all processes forked after its creation."""
+
+    def __init__(self, total):
+        self.total = total
+        self._left = multiprocessing.Value('q', total)
+
+    def claim(self):
+        """Claims one run, returns False if the budget is exhausted."""
+        with self._left.get_lock():
+            if self._left.value <= 0:
+                return False
+            self._left.value -= 1
+            return True
+
+    @property
+    def left(self):
+        return self._left.value
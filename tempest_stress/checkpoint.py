@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Crash-safe checkpoints of a running stress test.
+
+The driver periodically writes the run metadata (tests, duration, the
+time already run) and the statistics of every worker to a JSON file. The
+file is replaced atomically, so it always holds a complete checkpoint
+even if the driver is killed while writing it. A run is resumed from a
+checkpoint by running the remaining duration with the worker statistics
+seeded from it.
+"""
+
+import json
+import os
+import threading
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+def save(path, data):
+    """Atomically replaces the checkpoint at ``path`` with ``data``."""
+    data = dict(data, version=VERSION)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _restore_statistic(statistic):
+    """Restores the types JSON does not keep (tuples, integer keys)."""
+    statistic['metrics'] = dict(
+        (name, tuple(value))
+        for name, value in statistic.get('metrics', {}).items())
+    for stats in statistic.get('actions', {}).values():
+        stats['metrics'] = dict((name, tuple(value))
+                                for name, value in stats['metrics'].items())
+    for entry in statistic.get('api_calls', {}).values():
+        entry['buckets'] = dict((int(index), count)
+                                for index, count in entry['buckets'].items())
+    return statistic
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != VERSION:
+        raise ValueError("Unsupported checkpoint version in %s" % path)
+    for process in data['processes']:
+        _restore_statistic(process['statistic'])
+    return data
+
+
+class Checkpointer(object):
+    """Saves the result of ``snapshot()`` every ``interval`` seconds."""
+
+    def __init__(self, path, interval, snapshot):
+        self.path = path
+        self.interval = interval
+        self.snapshot = snapshot
+        self._stop = threading.Event()
+        self._thread = None
+
+    def save(self, **extra):
+        try:
+            save(self.path, dict(self.snapshot(), **extra))
+        except Exception:
+            LOG.exception("Failed to write the checkpoint %s", self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name='checkpointer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, **extra):
+        """Stops the periodic checkpoints and saves a final one."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.save(**extra)
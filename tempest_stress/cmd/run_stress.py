@@ -15,61 +15,42 @@
 #    limitations under the License.
 
 import argparse
-import inspect
 import json
 import sys
-try:
-    from unittest import loader
-except ImportError:
-    # unittest in python 2.6 does not contain loader, so uses unittest2
-    from unittest2 import loader
 
 from oslo_log import log as logging
 from tempest import config
-from testtools import testsuite
 
+from tempest_stress import checkpoint
 from tempest_stress import config as stress_cfg
+from tempest_stress import discovery
 from tempest_stress import driver
+from tempest_stress import schedule
 
 LOG = logging.getLogger(__name__)
 
 
-def discover_stress_tests(path="./", filter_attr=None, call_inherited=False):
-    """Discovers all tests and create action out of them."""
+def discover_stress_tests(path="./", filter_attr=None, call_inherited=False,
+                          index_path=None):
+    """Discovers all tests and create action out of them.
+
+    Test modules are not imported, see :mod:`tempest_stress.discovery`.
+    """
 
     LOG.info("Start test discovery")
     tests = []
-    testloader = loader.TestLoader()
-    list = testloader.discover(path)
-    for func in (testsuite.iterate_tests(list)):
-        attrs = []
-        try:
-            method_name = getattr(func, '_testMethodName')
-            full_name = "%s.%s.%s" % (func.__module__,
-                                      func.__class__.__name__,
-                                      method_name)
-            test_func = getattr(func, method_name)
-            # NOTE(mkoderer): this contains a list of all type attributes
-            attrs = getattr(test_func, "__testtools_attrs")
-        except Exception:
-            next
-        if 'stress' in attrs:
-            if filter_attr is not None and filter_attr not in attrs:
-                continue
-            class_setup_per = getattr(test_func, "st_class_setup_per")
-
-            action = {'action':
-                      "tempest_stress.actions.unit_test.UnitTest",
-                      'kwargs': {"test_method": full_name,
-                                 "class_setup_per": class_setup_per
-                                 }
-                      }
-            if (not call_inherited and
-               getattr(test_func, "st_allow_inheritance") is not True):
-                class_structure = inspect.getmro(test_func.im_class)
-                if test_func.__name__ not in class_structure[0].__dict__:
-                    continue
-            tests.append(action)
+    index = discovery.StressTestIndex(path, index_path)
+    index.load()
+    index.update()
+    index.save()
+    for full_name, tags in index.stress_tests(filter_attr, call_inherited):
+        action = {'action':
+                  "tempest_stress.actions.unit_test.UnitTest",
+                  'kwargs': {"test_method": full_name,
+                             "class_setup_per": tags['class_setup_per']
+                             }
+                  }
+        tests.append(action)
     return tests
 
 
@@ -85,6 +66,10 @@ parser.add_argument('-S', '--stop', action='store_true',
                     default=False, help="Stop on first error")
 parser.add_argument('-n', '--number', type=int,
                     help="How often an action is executed for each process")
+parser.add_argument('-b', '--budget', type=int,
+                    help="Total number of runs shared by all processes, "
+                         "the test ends once they are done (split across "
+                         "the tests in serial mode)")
 group = parser.add_mutually_exclusive_group(required=True)
 group.add_argument('-a', '--all', action='store_true',
                    help="Execute all stress tests")
@@ -95,6 +80,90 @@ parser.add_argument('-i', '--call-inherited', action='store_true',
                     help="Call also inherited function with stress attribute")
 group.add_argument('-t', "--tests", nargs='?',
                    help="Name of the file with test description")
+parser.add_argument('-r', '--results-dir', metavar='DIR',
+                    help="Directory to record the duration of every run "
+                         "and the action metrics in")
+parser.add_argument('--profile', nargs='?', metavar='DIR',
+                    const='stress-profile',
+                    help="Profile the runs of every worker and write the "
+                         "merged profile (pstats and collapsed stacks) to "
+                         "DIR (default: stress-profile)")
+parser.add_argument('--checkpoint', metavar='PATH',
+                    help="Checkpoint the statistics of the run to PATH "
+                         "every [stress] checkpoint_interval seconds")
+group.add_argument('--resume', metavar='PATH',
+                   help="Resume the run checkpointed in PATH for its "
+                        "remaining duration, merging the statistics")
+group.add_argument('--replay', metavar='DIR',
+                   help="Replay the schedule of the last run recorded in "
+                        "the results directory DIR: the same tests, and "
+                        "per worker the same runs at the same offsets with "
+                        "the same random seeds")
+parser.add_argument('--discovery-index', metavar='PATH',
+                    help="Index file used to cache the discovered stress "
+                         "tests (default: in ~/.cache/tempest_stress)")
+
+
+def run_serial(tests, duration, max_runs, stop, results_dir, profile_dir,
+               checkpoint_path, budget, first=0, result=0):
+    """Runs the tests one after another, starting with ``tests[first]``.
+
+    ``duration`` is the duration of every test, the ``budget`` of runs
+    is split across all tests. The position in the tests is part of the
+    checkpoints, so a resumed run continues with the remaining tests.
+    """
+    for index in range(first, len(tests)):
+        step_budget = None
+        if budget is not None:
+            step_budget = budget // len(tests) + (
+                index < budget % len(tests))
+        step_result = driver.stress_openstack(
+            [tests[index]], duration, max_runs, stop, results_dir,
+            profile_dir, checkpoint_path, budget=step_budget,
+            serial={'tests': tests, 'index': index, 'duration': duration,
+                    'budget': budget})
+        # NOTE(mkoderer): we just save the last result code
+        if (step_result != 0):
+            result = step_result
+            if stop:
+                return result
+    return result
+
+
+def resume_run(ns):
+    """Resumes the run checkpointed in ``ns.resume``."""
+    resume = checkpoint.load(ns.resume)
+    serial = resume.get('serial')
+    results_dir = ns.results_dir or resume['results_dir']
+    checkpoint_path = ns.checkpoint or ns.resume
+    result = 0
+    if resume.get('finished'):
+        if serial is None or serial['index'] + 1 >= len(serial['tests']):
+            LOG.error("The run checkpointed in %s already finished",
+                      ns.resume)
+            return 1
+    else:
+        budget = resume.get('budget')
+        if budget is not None:
+            budget = max(budget - sum(p['statistic']['runs']
+                                      for p in resume['processes']), 0)
+        result = driver.stress_openstack(
+            resume['tests'],
+            max(resume['duration'] - resume['elapsed'], 0),
+            resume['max_runs'],
+            ns.stop,
+            results_dir,
+            ns.profile,
+            checkpoint_path,
+            resume,
+            budget=budget,
+            serial=serial)
+        if serial is None or (result != 0 and ns.stop):
+            return result
+    return run_serial(serial['tests'], serial['duration'],
+                      resume['max_runs'], ns.stop, results_dir, ns.profile,
+                      checkpoint_path, serial['budget'],
+                      first=serial['index'] + 1, result=result)
 
 
 def main():
@@ -104,30 +173,39 @@ def main():
         tempest_config = ns.config_file_path + "/tempest.conf"
         config.CONF.set_config_path(tempest_config)
         stress_cfg.CONF.set_config_path(ns.config_file_path)
+    if ns.resume:
+        return resume_run(ns)
+    if ns.replay:
+        step, schedules = schedule.load(ns.replay)
+        return driver.stress_openstack(step['tests'],
+                                       step['duration'],
+                                       step['max_runs'],
+                                       ns.stop,
+                                       ns.results_dir,
+                                       ns.profile,
+                                       ns.checkpoint,
+                                       replay=schedules)
     if not ns.all:
         tests = json.load(open(ns.tests, 'r'))
     else:
         tests = discover_stress_tests(filter_attr=ns.type,
-                                      call_inherited=ns.call_inherited)
+                                      call_inherited=ns.call_inherited,
+                                      index_path=ns.discovery_index)
 
     if ns.serial:
         # Duration is total time
-        duration = ns.duration / len(tests)
-        for test in tests:
-            step_result = driver.stress_openstack([test],
-                                                  duration,
-                                                  ns.number,
-                                                  ns.stop)
-            # NOTE(mkoderer): we just save the last result code
-            if (step_result != 0):
-                result = step_result
-                if ns.stop:
-                    return result
+        result = run_serial(tests, ns.duration / len(tests), ns.number,
+                            ns.stop, ns.results_dir, ns.profile,
+                            ns.checkpoint, ns.budget)
     else:
         result = driver.stress_openstack(tests,
                                          ns.duration,
                                          ns.number,
-                                         ns.stop)
+                                         ns.stop,
+                                         ns.results_dir,
+                                         ns.profile,
+                                         ns.checkpoint,
+                                         budget=ns.budget)
     return result
 
 
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import argparse
+import os
+import sys
+
+from oslo_log import log as logging
+
+from tempest_stress import compare
+from tempest_stress import report
+from tempest_stress import results
+
+LOG = logging.getLogger(__name__)
+
+
+def _fmt(value, fmt="%.3f"):
+    if value is None:
+        return "-"
+    return fmt % value
+
+
+def _fmt_delta(value):
+    if value is None:
+        return "-"
+    return "%+.1f%%" % (value * 100)
+
+
+def do_baseline(ns):
+    summary = results.summarize(ns.results_dir)
+    if not summary:
+        print("No runs recorded in %s" % ns.results_dir)
+        return 1
+    compare.save_baseline(ns.baseline,
+                          compare.make_baseline(summary, ns.max_samples))
+    for action, stats in sorted(summary.items()):
+        print("%s: %d runs (%d failed), %.3f runs/s, p50 %ss p99 %ss" % (
+            action, stats['runs'], stats['fails'], stats['throughput'],
+            _fmt(compare.percentile(stats['latencies'], 50)),
+            _fmt(compare.percentile(stats['latencies'], 99))))
+    return 0
+
+
+def do_compare(ns):
+    baseline = compare.load_baseline(ns.baseline)
+    summary = results.summarize(ns.results_dir)
+    rows = compare.compare(baseline, summary, alpha=ns.alpha,
+                           threshold=ns.threshold,
+                           max_samples=ns.max_samples)
+    regressed = False
+    for row in rows:
+        status = "REGRESSED" if row['regressed'] else "ok"
+        regressed = regressed or row['regressed']
+        if row['missing']:
+            print("%s: %s (not run)" % (row['action'], status))
+            continue
+        print("%s: %s (p=%s)" % (row['action'], status,
+                                 _fmt(row['p_value'], "%.4f")))
+        for pct, base, current, delta in row['percentiles']:
+            print("    p%d: %ss -> %ss (%s)" % (
+                pct, _fmt(base), _fmt(current), _fmt_delta(delta)))
+        print("    throughput: %s/s -> %s/s (%s)" % (
+            _fmt(row['throughput'][0]), _fmt(row['throughput'][1]),
+            _fmt_delta(row['throughput_delta'])))
+    return 1 if regressed else 0
+
+
+def do_report(ns):
+    run_report = report.build_report(report.RunData(ns.results_dir),
+                                     interval=ns.interval)
+    json_path = ns.json or os.path.join(ns.results_dir, 'report.json')
+    html_path = ns.html or os.path.join(ns.results_dir, 'report.html')
+    report.write_json(run_report, json_path)
+    report.write_html(run_report, html_path)
+    print("%d records, %d runs (%d failed)" % (run_report['records'],
+                                               run_report.get('runs', 0),
+                                               run_report.get('fails', 0)))
+    print("Report written to %s and %s" % (json_path, html_path))
+    return 0
+
+
+parser = argparse.ArgumentParser(
+    description='Evaluate the results recorded by run-tempest-stress -r')
+subparsers = parser.add_subparsers(dest='command')
+subparsers.required = True
+
+baseline_parser = subparsers.add_parser(
+    'baseline', help="Store the latency distributions and throughput of "
+                     "a run as baseline")
+baseline_parser.add_argument('results_dir',
+                             help="Results directory of the run")
+baseline_parser.add_argument('baseline', help="Baseline file to write")
+baseline_parser.set_defaults(func=do_baseline)
+
+compare_parser = subparsers.add_parser(
+    'compare', help="Compare a run against a baseline, exits non-zero on "
+                    "significant regressions")
+compare_parser.add_argument('results_dir',
+                            help="Results directory of the run")
+compare_parser.add_argument('baseline', help="Baseline file to compare to")
+compare_parser.add_argument('--alpha', type=float, default=0.01,
+                            help="Significance level of the Mann-Whitney U "
+                                 "test (default: 0.01)")
+compare_parser.add_argument('--threshold', type=float, default=0.1,
+                            help="Relative percentile increase or "
+                                 "throughput decrease counted as "
+                                 "regression (default: 0.1)")
+compare_parser.set_defaults(func=do_compare)
+
+report_parser = subparsers.add_parser(
+    'report', help="Write a JSON and HTML report of a run")
+report_parser.add_argument('results_dir',
+                           help="Results directory of the run")
+report_parser.add_argument('--json', metavar='PATH',
+                           help="JSON report file (default: report.json "
+                                "in the results directory)")
+report_parser.add_argument('--html', metavar='PATH',
+                           help="HTML report file (default: report.html "
+                                "in the results directory)")
+report_parser.add_argument('--interval', type=float, default=10.0,
+                           help="Interval in seconds of the throughput "
+                                "over time (default: 10)")
+report_parser.set_defaults(func=do_report)
+
+for sub in (baseline_parser, compare_parser):
+    sub.add_argument('--max-samples', type=int, default=10000,
+                     help="Number of latency samples kept per action "
+                          "(default: 10000)")
+
+
+def main():
+    ns = parser.parse_args()
+    return ns.func(ns)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception:
+        LOG.exception("Failure in the stress results tool")
+        sys.exit(1)
@@ -0,0 +1,152 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Comparison of stress runs against a stored baseline.
+
+A baseline keeps, per action, the run latency distribution (downsampled
+to at most ``max_samples`` order statistics) and the throughput of a
+run. Latencies of a new run are compared with a one-sided Mann-Whitney U
+test; an action regressed when its latencies are significantly higher
+and a percentile grew by more than the threshold, or when its throughput
+dropped by more than the threshold.
+"""
+
+import json
+import math
+
+BASELINE_VERSION = 1
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Returns the ``pct`` percentile of the sorted ``values``."""
+    if not values:
+        return None
+    rank = (len(values) - 1) * pct / 100.0
+    low = int(math.floor(rank))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def downsample(values, max_samples):
+    """Returns at most ``max_samples`` evenly spaced order statistics."""
+    if len(values) <= max_samples:
+        return list(values)
+    step = (len(values) - 1) / float(max_samples - 1)
+    return [values[int(round(i * step))] for i in range(max_samples)]
+
+
+def mann_whitney_greater(current, baseline):
+    """One-sided Mann-Whitney U test of ``current`` > ``baseline``.
+
+    Tests whether ``current`` is stochastically greater, using the normal
+    approximation with tie correction. Returns the p value, or None if a
+    sample is empty.
+    """
+    n1 = len(current)
+    n2 = len(baseline)
+    if not n1 or not n2:
+        return None
+    combined = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    n = n1 + n2
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2.0 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        rank_sum += rank * sum(1 for k in range(i, j + 1)
+                               if combined[k][1] == 0)
+        i = j + 1
+    u = rank_sum - n1 * (n1 + 1) / 2.0
+    mean = n1 * n2 / 2.0
+    if n < 2:
+        return 1.0
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1.0)))
+    if variance <= 0:
+        return 1.0
+    # continuity correction
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def make_baseline(summary, max_samples=10000):
+    """Builds a baseline from a :func:`results.summarize` result."""
+    actions = {}
+    for action, stats in summary.items():
+        actions[action] = {
+            'runs': stats['runs'],
+            'fails': stats['fails'],
+            'throughput': stats['throughput'],
+            'latencies': downsample(stats['latencies'], max_samples)}
+    return {'version': BASELINE_VERSION, 'actions': actions}
+
+
+def save_baseline(path, baseline):
+    with open(path, 'w') as f:
+        json.dump(baseline, f)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError("Unsupported baseline version in %s" % path)
+    return baseline
+
+
+def _delta(current, base):
+    if current is None or base is None or not base:
+        return None
+    return (current - base) / base
+
+
+def compare(baseline, summary, alpha=0.01, threshold=0.1,
+            max_samples=10000):
+    """Compares a run summary with a baseline.
+
+    Returns a list with one dict per action of the baseline holding the
+    baseline and current percentiles, their relative deltas, the
+    throughput delta, the p value and whether the action ``regressed``.
+    """
+    rows = []
+    for action, base in sorted(baseline['actions'].items()):
+        stats = summary.get(action)
+        current = downsample(stats['latencies'], max_samples) if stats else []
+        row = {'action': action, 'percentiles': [], 'regressed': False,
+               'missing': stats is None}
+        for pct in PERCENTILES:
+            b_value = percentile(base['latencies'], pct)
+            c_value = percentile(current, pct)
+            row['percentiles'].append((pct, b_value, c_value,
+                                       _delta(c_value, b_value)))
+        row['p_value'] = mann_whitney_greater(current, base['latencies'])
+        row['throughput'] = (base['throughput'],
+                             stats['throughput'] if stats else 0.0)
+        row['throughput_delta'] = _delta(row['throughput'][1],
+                                         base['throughput'])
+        slower = any(delta is not None and delta > threshold
+                     for _pct, _b, _c, delta in row['percentiles'])
+        if (row['p_value'] is not None and row['p_value'] < alpha and
+                slower):
+            row['regressed'] = True
+        if (row['throughput_delta'] is not None and
+                row['throughput_delta'] < -threshold):
+            row['regressed'] = True
+        if row['missing']:
+            row['regressed'] = True
+        rows.append(row)
+    return rows
@@ -27,7 +27,14 @@ StressGroup = [
                help='Directory containing log files on the compute nodes'),
     cfg.IntOpt('max_instances',
                default=16,
-               help='Maximum number of instances to create during test.'),
+               help='Maximum number of instances existing at the same time '
+                    'across all workers. Actions wait for a free slot '
+                    'before booting a server. 0 disables the limit.'),
+    cfg.IntOpt('max_volumes',
+               default=16,
+               help='Maximum number of volumes existing at the same time '
+                    'across all workers. Actions wait for a free slot '
+                    'before creating a volume. 0 disables the limit.'),
     cfg.StrOpt('controller',
                help='Controller host.'),
     # new stress options
@@ -50,6 +57,96 @@ StressGroup = [
                 help='Prevent the cleaning (tearDownClass()) between'
                      ' each stress test run if an exception occurs'
                      ' during this run.'),
+    cfg.MultiStrOpt('api_rate_limit',
+                    default=[],
+                    help='Rate limit shared by all workers for the API '
+                         'requests of a service or of a single operation. '
+                         'Format: SERVICE[ OPERATION]=RATE[/BURST], the '
+                         'service is matched against the REST client '
+                         'service name, the operation against "METHOD '
+                         'path" with IDs replaced by {id}, both are shell '
+                         'style patterns, e.g. "compute=20" or "compute '
+                         'POST */servers=2/5". RATE is in requests per '
+                         'second. May be given multiple times.'),
+    cfg.BoolOpt('trace_api_calls',
+                default=True,
+                help='Record the latency of every API call per endpoint '
+                     '(service, method and path with IDs replaced by '
+                     '{id}) and report their percentiles.'),
+    cfg.IntOpt('failure_tracebacks',
+               default=3,
+               help='The number of tracebacks logged per failure signature '
+                    '(exception type, normalized message and location) '
+                    'across all workers, further failures with the same '
+                    'signature are only counted.'),
+    cfg.IntOpt('log_buffer_size',
+               default=10000,
+               help='Workers send their log records to the driver in '
+                    'batches instead of writing the logs themselves. This '
+                    'is the number of records a worker buffers, beyond it '
+                    'debug records are dropped and counted. 0 lets every '
+                    'worker write its logs directly.'),
+    cfg.IntOpt('http_pool_size',
+               default=10,
+               help='Number of keep-alive connections per host shared by '
+                    'the REST clients of a worker process, 0 keeps the '
+                    'tempest behaviour of a new connection per request.'),
+    cfg.IntOpt('checkpoint_interval',
+               default=60,
+               help='Interval in seconds the statistics of a run are '
+                    'checkpointed at, if a checkpoint file is given.'),
+    cfg.IntOpt('recycle_after_runs',
+               default=0,
+               help='Replace a worker process by a fresh one after it ran '
+                    'this many actions, 0 disables it. The action is torn '
+                    'down and its statistics are carried over to the new '
+                    'process. Can be overridden per test.'),
+    cfg.IntOpt('recycle_max_rss',
+               default=0,
+               help='Replace a worker process by a fresh one once its '
+                    'resident set size exceeds this many MiB, 0 disables '
+                    'it. Can be overridden per test.'),
+    cfg.IntOpt('loadgen_sample_interval',
+               default=10,
+               help='Interval in seconds the CPU time, memory, open file '
+                    'descriptors and context switches of the driver and '
+                    'the workers are sampled at, 0 disables it.'),
+    cfg.FloatOpt('loadgen_cpu_bound',
+                 default=0.9,
+                 help='Fraction of a CPU a worker has to use in a sample '
+                      'to count as CPU-bound.'),
+    cfg.IntOpt('breaker_window',
+               default=0,
+               help='Sliding window in seconds of the circuit breaker '
+                    'checking the error rate and the mean latency of the '
+                    'runs of all workers, 0 disables it.'),
+    cfg.FloatOpt('breaker_max_error_rate',
+                 default=0.5,
+                 help='The circuit breaker opens once the fraction of '
+                      'failed runs in its window exceeds this.'),
+    cfg.FloatOpt('breaker_max_latency',
+                 default=0.0,
+                 help='The circuit breaker opens once the mean duration '
+                      'in seconds of the successful runs in its window '
+                      'exceeds this, 0 does not check the latency.'),
+    cfg.IntOpt('breaker_min_runs',
+               default=10,
+               help='The least number of runs in the window of the circuit '
+                    'breaker before it decides on its state.'),
+    cfg.StrOpt('breaker_action',
+               default='pause',
+               choices=['pause', 'throttle', 'abort'],
+               help='What an open circuit breaker does: pause the workers, '
+                    'throttle them to one run per breaker_throttle_delay '
+                    'seconds each, or abort the run as failed.'),
+    cfg.IntOpt('breaker_cooldown',
+               default=60,
+               help='Seconds an open circuit breaker waits before it lets '
+                    'the workers run throttled to check for recovery.'),
+    cfg.FloatOpt('breaker_throttle_delay',
+                 default=5.0,
+                 help='Seconds a worker waits before every run while the '
+                      'circuit breaker throttles the load.'),
     cfg.BoolOpt('full_clean_stack',
                 default=False,
                 help='Allows a full cleaning process after a stress test.'
@@ -0,0 +1,268 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Static discovery of stress tests.
+
+Test modules are parsed with :mod:`ast` instead of being imported, and the
+tags found on test methods (``attr(type=...)`` and ``stresstest(...)``
+decorators) are kept in an on-disk index, so only files that changed since
+the last discovery are parsed again.
+"""
+
+import ast
+import fnmatch
+import hashlib
+import json
+import os
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join('~', '.cache', 'tempest_stress')
+TEST_PATTERN = 'test*.py'
+
+
+def default_index_path(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(os.path.expanduser(DEFAULT_INDEX_DIR),
+                        'discovery-%s.json' % digest[:16])
+
+
+def _decorator_name(node):
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _literal(node, default=None):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return default
+
+
+def _method_tags(func):
+    """Returns the stress relevant tags of a test method or None."""
+    attrs = []
+    tags = {}
+    for decorator in func.decorator_list:
+        if not isinstance(decorator, ast.Call):
+            continue
+        name = _decorator_name(decorator)
+        keywords = dict((k.arg, k.value) for k in decorator.keywords)
+        if name == 'attr' and 'type' in keywords:
+            value = _literal(keywords['type'], [])
+            if isinstance(value, str):
+                value = [value]
+            attrs.extend(value)
+        elif name == 'stresstest':
+            attrs.append('stress')
+            tags['class_setup_per'] = _literal(
+                keywords.get('class_setup_per'), 'process') or 'process'
+            tags['allow_inheritance'] = bool(_literal(
+                keywords.get('allow_inheritance'), False))
+    if not attrs:
+        return None
+    tags['attrs'] = attrs
+    tags.setdefault('class_setup_per', 'process')
+    tags.setdefault('allow_inheritance', False)
+    return tags
+
+
+def _module_imports(tree, module):
+    package = module.rsplit('.', 1)[0] if '.' in module else ''
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    imports[alias.asname] = alias.name
+                else:
+                    head = alias.name.split('.')[0]
+                    imports[head] = head
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                parts = package.split('.')
+                if node.level > 1:
+                    parts = parts[:-(node.level - 1)]
+                base = '.'.join(p for p in parts + [base] if p)
+            for alias in node.names:
+                imports[alias.asname or alias.name] = '%s.%s' % (base,
+                                                                 alias.name)
+    return imports
+
+
+def _qualified_name(node, module, imports):
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.insert(0, node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    if node.id in imports:
+        head = imports[node.id]
+    elif names:
+        head = node.id
+    else:
+        head = '%s.%s' % (module, node.id)
+    return '.'.join([head] + names)
+
+
+def parse_module(source, module):
+    """Returns the index entry of the classes defined in a module."""
+    tree = ast.parse(source)
+    imports = _module_imports(tree, module)
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        methods = {}
+        for item in node.body:
+            if (isinstance(item, ast.FunctionDef) and
+                    item.name.startswith('test')):
+                methods[item.name] = _method_tags(item)
+        bases = [_qualified_name(b, module, imports) for b in node.bases]
+        classes.append({'name': node.name,
+                        'bases': [b for b in bases if b],
+                        'methods': methods})
+    return classes
+
+
+class StressTestIndex(object):
+    """On-disk index of the stress tests found below ``path``.
+
+    Entries are keyed by file and validated with the file's mtime and
+    size, falling back to a content hash so touched but unchanged files
+    are not parsed again.
+    """
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or default_index_path(path)
+        self.files = {}
+        self.scanned = 0
+
+    def load(self):
+        try:
+            with open(self.index_path) as index_file:
+                data = json.load(index_file)
+        except (IOError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.files = data['files']
+
+    def save(self):
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir and not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as index_file:
+            json.dump({'version': INDEX_VERSION, 'files': self.files},
+                      index_file)
+        os.rename(tmp_path, self.index_path)
+
+    def _iter_sources(self):
+        for root, dirs, files in os.walk(self.path):
+            dirs[:] = sorted(d for d in dirs
+                             if os.path.isfile(os.path.join(root, d,
+                                                            '__init__.py')))
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    yield os.path.join(root, name)
+
+    def _module_name(self, file_path):
+        rel_path = os.path.relpath(file_path, self.path)
+        module = os.path.splitext(rel_path)[0].replace(os.sep, '.')
+        if module.endswith('.__init__'):
+            module = module[:-len('.__init__')]
+        return module
+
+    def _entry(self, file_path, old_entry):
+        stat = os.stat(file_path)
+        if (old_entry and old_entry['mtime'] == stat.st_mtime_ns and
+                old_entry['size'] == stat.st_size):
+            return old_entry
+        with open(file_path, 'rb') as source_file:
+            source = source_file.read()
+        digest = hashlib.sha1(source).hexdigest()
+        if old_entry and old_entry['sha1'] == digest:
+            classes = old_entry['classes']
+        else:
+            self.scanned += 1
+            module = self._module_name(file_path)
+            try:
+                classes = parse_module(source, module)
+            except (SyntaxError, ValueError):
+                LOG.warning("Cannot parse %s, skipping it", file_path)
+                classes = []
+        return {'mtime': stat.st_mtime_ns, 'size': stat.st_size,
+                'sha1': digest, 'module': self._module_name(file_path),
+                'classes': classes}
+
+    def update(self):
+        """Re-scans the files changed since the index was written."""
+        files = {}
+        for file_path in self._iter_sources():
+            files[file_path] = self._entry(file_path,
+                                           self.files.get(file_path))
+        self.files = files
+        LOG.info("Stress test index: %d files, %d parsed",
+                 len(files), self.scanned)
+
+    def _classes(self):
+        classes = {}
+        for entry in self.files.values():
+            for klass in entry['classes']:
+                classes['%s.%s' % (entry['module'], klass['name'])] = klass
+        return classes
+
+    def _inherited_methods(self, klass, classes, seen):
+        methods = {}
+        for base in reversed(klass['bases']):
+            if base in classes and base not in seen:
+                seen.add(base)
+                base_class = classes[base]
+                methods.update(self._inherited_methods(base_class, classes,
+                                                       seen))
+                methods.update(base_class['methods'])
+        return methods
+
+    def stress_tests(self, filter_attr=None, call_inherited=False):
+        """Yields (test_name, tags) for every stress test in the index."""
+        classes = self._classes()
+        for file_path in sorted(self.files):
+            if not fnmatch.fnmatch(os.path.basename(file_path), TEST_PATTERN):
+                continue
+            entry = self.files[file_path]
+            for klass in entry['classes']:
+                inherited = self._inherited_methods(klass, classes, set())
+                methods = dict(inherited, **klass['methods'])
+                for name in sorted(methods):
+                    tags = methods[name]
+                    if tags is None or 'stress' not in tags['attrs']:
+                        continue
+                    if (filter_attr is not None and
+                            filter_attr not in tags['attrs']):
+                        continue
+                    if (name not in klass['methods'] and
+                            not call_inherited and
+                            not tags['allow_inheritance']):
+                        continue
+                    yield ('%s.%s.%s' % (entry['module'], klass['name'],
+                                         name), tags)
@@ -12,9 +12,14 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import functools
+import json
 import multiprocessing
+from multiprocessing import connection
 import os
+import shutil
 import signal
+import tempfile
 import time
 
 from oslo_log import log as logging
@@ -23,12 +28,28 @@ from tempest import clients
 from tempest.common import credentials_factory as credentials
 from tempest import config
 from tempest import exceptions
-from tempest.lib.common import cred_client
 from tempest.lib.common import ssh
-from tempest.lib.common.utils import data_utils
 
+from tempest_stress import accounts
+from tempest_stress import admission
+from tempest_stress import api_hooks
+from tempest_stress import breaker as circuit_breaker
+from tempest_stress import budget as run_budget
+from tempest_stress import checkpoint
 from tempest_stress import cleanup
 from tempest_stress import config as stress_cfg
+from tempest_stress import failures
+from tempest_stress import histogram
+from tempest_stress import http_pool
+from tempest_stress import logqueue
+from tempest_stress import procstat
+from tempest_stress import profiling
+from tempest_stress import ratelimit
+from tempest_stress import results
+from tempest_stress import schedule
+from tempest_stress import sla
+from tempest_stress import stressaction
+from tempest_stress import tracing
 
 CONF = config.CONF
 STRESS_CONF = stress_cfg.CONF
@@ -36,6 +57,9 @@ STRESS_CONF = stress_cfg.CONF
 LOG = logging.getLogger(__name__)
 processes = []
 
+# log record batches the driver queues before the workers buffer them
+LOG_QUEUE_BATCHES = 1000
+
 
 def do_ssh(command, host, ssh_user, ssh_key=None):
     ssh_client = ssh.Client(host, ssh_user, key_filename=ssh_key)
@@ -85,14 +109,19 @@ def sigchld_handler(signalnum, frame):
     """Signal handler (only active if stop_on_error is True)."""
     for process in processes:
         if (not process['process'].is_alive() and
-                process['process'].exitcode != 0):
+                process['process'].exitcode not in
+                (0, stressaction.RECYCLE_EXIT_CODE)):
             signal.signal(signalnum, signal.SIG_DFL)
             terminate_all_processes()
             break
 
 
 def terminate_all_processes(check_interval=20):
-    """Goes through the process list and terminates all child processes."""
+    """Goes through the process list and terminates all child processes.
+
+    Workers still alive ``check_interval`` seconds after SIGTERM are
+    killed. Returns as soon as all workers ended.
+    """
     LOG.info("Stopping all processes.")
     for process in processes:
         if process['process'].is_alive():
@@ -100,7 +129,11 @@ def terminate_all_processes(check_interval=20):
                 process['process'].terminate()
             except Exception:
                 pass
-    time.sleep(check_interval)
+    deadline = time.time() + check_interval
+    for process in processes:
+        remaining = deadline - time.time()
+        if remaining > 0 and process['process'].is_alive():
+            process['process'].join(remaining)
     for process in processes:
         if process['process'].is_alive():
             try:
@@ -112,9 +145,377 @@ def terminate_all_processes(check_interval=20):
         process['process'].join()
 
 
-def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
-    """Workload driver. Executes an action function against a nova-cluster."""
+def _merge_metrics(metrics, action, process_metrics):
+    """Merges the metric aggregates of one process per action."""
+    for name, (count, total, low, high) in process_metrics.items():
+        key = (action, name)
+        if key in metrics:
+            m_count, m_total, m_low, m_high = metrics[key]
+            count += m_count
+            total += m_total
+            low = min(low, m_low)
+            high = max(high, m_high)
+        metrics[key] = (count, total, low, high)
+
+
+def _print_metrics(metrics):
+    if not metrics:
+        return
+    print("Metrics:")
+    for (action, name), (count, total, low, high) in sorted(metrics.items()):
+        print("%s %s: %d samples (avg %.3f, min %.3f, max %.3f)" % (
+            action, name, count, total / count, low, high))
+
+
+def _required_services(test):
+    services = list(test.get('required_services', []))
+    for entry in test.get('mix', []):
+        services.extend(entry.get('required_services', []))
+    return services
+
+
+def _build_action(test, manager, max_runs, stop_on_error):
+    """Creates and sets up the action of a test entry.
+
+    An entry with a ``mix`` list instead of an ``action`` becomes an
+    ActionMix of its entries, chosen by their ``weight`` on each
+    iteration. Raises ValueError if a weight is negative or all are 0.
+    """
+    if 'mix' in test:
+        weights = [entry.get('weight', 1) for entry in test['mix']]
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("Invalid mix weights %s: they must not be "
+                             "negative and their sum must be positive" %
+                             weights)
+        actions = [_build_action(entry, manager, max_runs, stop_on_error)
+                   for entry in test['mix']]
+        test_run = stressaction.ActionMix(manager, actions, weights,
+                                          max_runs, stop_on_error)
+    else:
+        test_obj = importutils.import_class(test['action'])
+        test_run = test_obj(manager, max_runs, stop_on_error)
+
+    kwargs = test.get('kwargs', {})
+    test_run.setUp(**kwargs)
+    return test_run
+
+
+def _execute_fresh(test, manager, max_runs, stop_on_error, *args, **kwargs):
+    """Sets up a new action in a recycled worker and executes it."""
+    test_run = _build_action(test, manager, max_runs, stop_on_error)
+    test_run.execute(*args, **kwargs)
+
+
+def _run_worker(target, log_queue, log_buffer_size, *args, **kwargs):
+    """Routes the logging of the worker to the driver and runs it."""
+    logqueue.install(log_queue, log_buffer_size)
+    try:
+        target(*args, **kwargs)
+    finally:
+        logqueue.drain()
+
+
+def _start_process(process, test_run=None):
+    """Starts the worker of a process entry.
+
+    Without ``test_run`` (the replacement of a recycled worker) the
+    action is built and set up again in the new process. With a
+    ``log_queue`` the worker logs through the driver, see
+    :mod:`tempest_stress.logqueue`.
+    """
+    args = (process['statistic'],)
+    if test_run is not None:
+        target = test_run.execute
+    else:
+        target = _execute_fresh
+        args = (process['test'], process['manager'], process['max_runs'],
+                process['stop_on_error']) + args
+    if process['log_queue'] is not None:
+        args = (target, process['log_queue'],
+                STRESS_CONF.stress.log_buffer_size) + args
+        target = _run_worker
+    process['process'] = multiprocessing.Process(
+        target=target, args=args, kwargs=process['options'])
+    process['process'].start()
+
+
+def _recycle_processes(timeout, until_done=False):
+    """Waits ``timeout`` seconds, replacing the recycled workers.
+
+    Blocks on the process sentinels, so a retired worker is replaced as
+    soon as it exited. With ``until_done`` it returns as soon as all
+    workers ended.
+    """
+    deadline = time.time() + timeout
+    while True:
+        for process in processes:
+            if (process['process'].exitcode ==
+                    stressaction.RECYCLE_EXIT_CODE):
+                process['process'].join()
+                process['recycled'] += 1
+                LOG.info("Replacing recycled process %d (%s)",
+                         process['p_number'], process['action'])
+                _start_process(process)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        sentinels = [process['process'].sentinel for process in processes
+                     if process['process'].is_alive()]
+        if not sentinels:
+            if not until_done:
+                time.sleep(remaining)
+            return
+        connection.wait(sentinels, remaining)
+
+
+def _sample_targets():
+    targets = {'driver': os.getpid()}
+    for index, process in enumerate(processes):
+        if process['process'].pid is not None:
+            targets[index] = process['process'].pid
+    return targets
+
+
+def _print_load_generator(sampler):
+    if not sampler.stats:
+        return
+    mib = 1048576.0
+    print("Load generator:")
+    for key, stats in sorted(sampler.stats.items(),
+                             key=lambda item: -1 if item[0] == 'driver'
+                             else item[0]):
+        if key == 'driver':
+            label = 'Driver'
+        else:
+            label = "Process %d (%s)" % (processes[key]['p_number'],
+                                         processes[key]['action'])
+        samples = stats['samples'] or 1
+        print("%s: CPU %.1fs (avg %.0f%%, max %.0f%%), RSS %.1f MiB "
+              "(max %.1f), %d FDs (max %d), %d/%d context switches" % (
+                  label, stats['cpu'], stats['util_total'] / samples * 100,
+                  stats['max_util'] * 100, stats['rss'] / mib,
+                  stats['max_rss'] / mib, stats['fds'], stats['max_fds'],
+                  stats['voluntary_ctxt_switches'],
+                  stats['nonvoluntary_ctxt_switches']))
+        if stats['busy'] * 2 >= samples and stats['busy']:
+            print("    CPU-bound in %d of %d samples, the load generator "
+                  "may limit the throughput" % (stats['busy'],
+                                                stats['samples']))
+    if sampler.host_busy:
+        print("Load generator host CPU saturated in %d of %d samples" % (
+            sampler.host_busy, sampler.host_samples))
+
+
+def _print_api_calls(api_calls):
+    if not api_calls:
+        return
+    print("API calls:")
+    for name, entry in sorted(api_calls.items()):
+        print("%s: %d calls (%d failed), avg %.3f, p50 %.3f, p95 %.3f, "
+              "p99 %.3f, max %.3f" % (
+                  name, entry['count'], entry['errors'],
+                  entry['total'] / entry['count'],
+                  histogram.percentile(entry, 50),
+                  histogram.percentile(entry, 95),
+                  histogram.percentile(entry, 99), entry['max']))
+
+
+def _print_failures(all_failures, results_dir=None, step=None):
+    if not all_failures:
+        return
+    print("Failures (by signature):")
+    for sig, entry in sorted(all_failures.items(),
+                             key=lambda item: -item[1]['count']):
+        print("%6d  %s" % (entry['count'], sig))
+        for action, count in sorted(entry['actions'].items()):
+            print("        %s: %d" % (action, count))
+    if results_dir:
+        path = os.path.join(results_dir, '%d-failures.json' % step)
+        with open(path, 'w') as f:
+            json.dump(all_failures, f, indent=2, sort_keys=True)
+        print("Tracebacks of the failures written to %s" % path)
+
+
+def _print_profile(profile_dir, limit=20):
+    stats = profiling.merge(profile_dir)
+    if stats is None:
+        return
+    print("Profile (top %d functions by own time, written to %s):" % (
+        limit, profile_dir))
+    stats.sort_stats('tottime').print_stats(limit)
+
+
+def _action_slas(test, test_run, action_slas):
+    """Adds the SLA criteria of the actions of a test entry.
+
+    The runs are recorded by action, so an action given different SLAs
+    by several entries raises ValueError.
+    """
+    if 'mix' in test:
+        slas = [(action.action, entry['sla'])
+                for entry, action in zip(test['mix'], test_run.actions)
+                if 'sla' in entry]
+    elif 'sla' in test:
+        slas = [(test_run.action, test['sla'])]
+    else:
+        slas = []
+    for action, criteria in slas:
+        if action_slas.setdefault(action, criteria) != criteria:
+            raise ValueError("Different SLAs for the runs of action %s" %
+                             action)
+
+
+def _recorded_runs(results_dir, step):
+    """Yields (action, time, duration, error) of the runs of a step."""
+    for (record_step, _worker, action, name, timestamp, value,
+         error) in results.iter_records(results_dir):
+        if record_step == step and name == results.RUN_NAME:
+            yield action, timestamp, value, error
+
+
+def _print_sla(rows):
+    if not rows:
+        return
+    print("SLA:")
+    print("%-36s %-20s %-14s %10s %10s  %s" % (
+        "Action", "Scope", "Criterion", "Limit", "Value", "Result"))
+    for row in rows:
+        result = "PASS" if row['passed'] else "FAIL"
+        if row.get('failed'):
+            result += " (%d windows)" % len(row['failed'])
+        value = "-" if row['value'] is None else "%.3f" % row['value']
+        print("%-36s %-20s %-14s %10.3f %10s  %s" % (
+            row['action'], row['scope'], row['criterion'], row['limit'],
+            value, result))
+    print("SLA %s" % ("passed" if sla.passed(rows) else "FAILED"))
+
+
+def _circuit_breaker():
+    """Returns the configured circuit breaker, None if it is disabled."""
+    conf = STRESS_CONF.stress
+    if conf.breaker_window <= 0:
+        return None
+    return circuit_breaker.CircuitBreaker(
+        conf.breaker_window, max_error_rate=conf.breaker_max_error_rate,
+        max_latency=conf.breaker_max_latency or None,
+        min_runs=conf.breaker_min_runs, action=conf.breaker_action,
+        cooldown=conf.breaker_cooldown,
+        throttle_delay=conf.breaker_throttle_delay)
+
+
+def _print_breaker(breaker, end, results_dir=None, step=None):
+    if not breaker.changes:
+        return
+    opened = len([c for c in breaker.changes
+                  if c['state'] == circuit_breaker.OPEN])
+    print("Circuit breaker (%s): opened %d times, not closed for %.0f "
+          "seconds" % (breaker.action, opened, breaker.time_open(end)))
+    if results_dir:
+        path = os.path.join(results_dir, '%d-breaker.json' % step)
+        with open(path, 'w') as f:
+            json.dump(breaker.changes, f, indent=2)
+        print("State changes of the circuit breaker written to %s" % path)
+
+
+def _checkpoint_state(tests, duration, max_runs, budget, results_dir,
+                      serial, elapsed, run_start, first_process):
+    """Returns the checkpoint of the running driver invocation."""
+    if run_start is not None:
+        elapsed += time.time() - run_start
+    return {'tests': tests,
+            'serial': serial,
+            'duration': duration,
+            'max_runs': max_runs,
+            'budget': budget,
+            'results_dir': results_dir,
+            'elapsed': elapsed,
+            'processes': [{'t_number': process['t_number'],
+                           'p_number': process['p_number'],
+                           'action': process['action'],
+                           'statistic': process['statistic'].copy()}
+                          for process in processes[first_process:]]}
+
+
+def _action_statistics(process):
+    """Returns (action, statistic) of every action run by a process.
+
+    The metrics recorded outside of the actions of a mix, e.g. the time
+    waited for the rate limiter, are reported under the mix itself.
+    """
+    statistic = process['statistic']
+    own = (process['action'], {'runs': statistic['runs'],
+                               'fails': statistic['fails'],
+                               'metrics': statistic.get('metrics', {})})
+    actions = statistic.get('actions')
+    if actions:
+        if own[1]['metrics']:
+            return sorted(actions.items()) + [own]
+        return sorted(actions.items())
+    return [own]
+
+
+def stress_openstack(tests, duration, max_runs=None, stop_on_error=False,
+                     results_dir=None, profile_dir=None, checkpoint_path=None,
+                     resume=None, replay=None, budget=None, serial=None):
+    """Workload driver. Executes an action function against a nova-cluster.
+
+    If ``results_dir`` is given, every worker records the duration of
+    each run and the metric samples of its action there, see
+    :mod:`tempest_stress.results`. If ``profile_dir`` is given, the
+    workers profile their runs and the merged profile is written there,
+    see :mod:`tempest_stress.profiling`.
+
+    If ``checkpoint_path`` is given, the run and the worker statistics
+    are checkpointed there, see :mod:`tempest_stress.checkpoint`. A
+    loaded checkpoint passed as ``resume`` seeds the worker statistics,
+    ``duration`` is then the remaining duration of the resumed run. In
+    serial mode ``serial`` holds all tests and the position of ``tests``
+    in them, it is checkpointed to resume the remaining tests as well.
+
+    With a ``results_dir`` the schedule of every worker is recorded, see
+    :mod:`tempest_stress.schedule`. ``replay`` maps (test number, worker
+    number) to a recorded schedule to re-issue instead, the run then ends
+    when all workers are done.
+
+    ``budget`` is the total number of runs shared by all workers, the run
+    ends once they are done, see :mod:`tempest_stress.budget`.
+
+    If the ``breaker_window`` option is set, a circuit breaker pauses,
+    throttles or aborts the load while the error rate or the latency of
+    the runs is too high, see :mod:`tempest_stress.breaker`. Its state
+    changes are written to the results.
+
+    The ``sla`` criteria of the test entries are checked against the
+    recorded runs (in a temporary directory without ``results_dir``),
+    see :mod:`tempest_stress.sla`. A violated SLA fails the run.
+    """
+    rate_limiter = ratelimit.RateLimiter.from_config(
+        STRESS_CONF.stress.api_rate_limit)
+    if rate_limiter.limits:
+        api_hooks.register('rate_limit', rate_limiter)
+    else:
+        api_hooks.unregister('rate_limit')
+    # NOTE: registered after the rate limiter, so the throttling wait is
+    # not part of the API call latency
+    if STRESS_CONF.stress.trace_api_calls:
+        api_hooks.register('trace', tracing.trace)
+    else:
+        api_hooks.unregister('trace')
+    if STRESS_CONF.stress.http_pool_size > 0:
+        api_hooks.register('pool', http_pool.Pooling(
+            STRESS_CONF.stress.http_pool_size))
+    else:
+        api_hooks.unregister('pool')
+    admission.configure({admission.INSTANCES: STRESS_CONF.stress.max_instances,
+                         admission.VOLUMES: STRESS_CONF.stress.max_volumes})
+    failures.configure(STRESS_CONF.stress.failure_tracebacks)
     admin_manager = credentials.AdminManager()
+    log_queue = None
+    log_listener = None
+    if STRESS_CONF.stress.log_buffer_size > 0:
+        log_queue = multiprocessing.Queue(LOG_QUEUE_BATCHES)
+        log_listener = logqueue.LogListener(log_queue)
+        log_listener.start()
 
     ssh_user = STRESS_CONF.stress.target_ssh_user
     ssh_key = STRESS_CONF.stress.target_private_key_path
@@ -127,9 +528,48 @@ def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
         computes = _get_compute_nodes(controller, ssh_user, ssh_key)
         for node in computes:
             do_ssh("rm -f %s" % logfiles, node, ssh_user, ssh_key)
+    entry_slas = sla.entry_slas(tests)
+    for criteria in entry_slas:
+        sla.validate(criteria)
+    sla_dir = None
+    if entry_slas and not results_dir:
+        # NOTE: the SLA is checked against the recorded runs, without a
+        # results_dir they are only recorded in a scratch directory
+        sla_dir = tempfile.mkdtemp(prefix='stress-sla-')
+    record_dir = results_dir or sla_dir
+    action_slas = {}
+    if record_dir:
+        step = results.add_step(record_dir, start=None, end=None,
+                                duration=duration, max_runs=max_runs,
+                                tests=tests)
+    run_start = None
     skip = False
-    for test in tests:
-        for service in test.get('required_services', []):
+    mib = 1024 * 1024
+    first_process = len(processes)
+    shared_budget = None
+    if budget is not None:
+        shared_budget = run_budget.RunBudget(budget)
+    breaker = _circuit_breaker()
+    until_done = (max_runs is not None or replay is not None or
+                  budget is not None)
+    # schedule offsets are relative to the start of the invocation
+    epoch = time.time()
+    saved_statistics = {}
+    if resume:
+        LOG.info("Resuming the run after %.0f seconds",
+                 resume['elapsed'])
+        saved_statistics = dict(((p['t_number'], p['p_number']),
+                                 p['statistic'])
+                                for p in resume['processes'])
+    if profile_dir:
+        if os.path.isdir(profile_dir):
+            # NOTE: the worker profiles are named by pid, so the ones of
+            # earlier runs would be merged into the profile of this run
+            profiling.clean(profile_dir)
+        else:
+            os.makedirs(profile_dir)
+    for t_number, test in enumerate(tests):
+        for service in _required_services(test):
             if not CONF.service_available.get(service):
                 skip = True
                 break
@@ -144,43 +584,12 @@ def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
             raise NotImplementedError('Non admin tests are not supported')
         for p_number in range(test.get('threads', default_thread_num)):
             if test.get('use_isolated_tenants', False):
-                username = data_utils.rand_name("stress_user")
-                tenant_name = data_utils.rand_name("stress_tenant")
-                password = "pass"
-                if CONF.identity.auth_version == 'v2':
-                    identity_client = admin_manager.identity_client
-                    projects_client = admin_manager.tenants_client
-                    roles_client = admin_manager.roles_client
-                    users_client = admin_manager.users_client
-                    domains_client = None
-                else:
-                    identity_client = admin_manager.identity_v3_client
-                    projects_client = admin_manager.projects_client
-                    roles_client = admin_manager.roles_v3_client
-                    users_client = admin_manager.users_v3_client
-                    domains_client = admin_manager.domains_client
-                domain = (identity_client.auth_provider.credentials.
-                          get('project_domain_name', 'Default'))
-                credentials_client = cred_client.get_creds_client(
-                    identity_client, projects_client, users_client,
-                    roles_client, domains_client, project_domain_name=domain)
-                project = credentials_client.create_project(
-                    name=tenant_name, description=tenant_name)
-                user = credentials_client.create_user(username, password,
-                                                      project, "email")
-                # Add roles specified in config file
-                for conf_role in CONF.auth.tempest_roles:
-                    credentials_client.assign_user_role(user, project,
-                                                        conf_role)
-                creds = credentials_client.get_credentials(user, project,
-                                                           password)
+                creds = accounts.create_credentials(admin_manager)
                 manager = clients.Manager(credentials=creds)
 
-            test_obj = importutils.import_class(test['action'])
-            test_run = test_obj(manager, max_runs, stop_on_error)
-
-            kwargs = test.get('kwargs', {})
-            test_run.setUp(**kwargs)
+            test_run = _build_action(test, manager, max_runs, stop_on_error)
+            if p_number == 0:
+                _action_slas(test, test_run, action_slas)
 
             LOG.debug("calling Target Object %s" %
                       test_run.__class__.__name__)
@@ -189,25 +598,85 @@ def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
             shared_statistic = mp_manager.dict()
             shared_statistic['runs'] = 0
             shared_statistic['fails'] = 0
-
-            p = multiprocessing.Process(target=test_run.execute,
-                                        args=(shared_statistic,))
-
-            process = {'process': p,
+            shared_statistic.update(saved_statistics.get((t_number,
+                                                          p_number), {}))
+
+            recorder = None
+            if record_dir:
+                recorder = results.RecordWriter(
+                    os.path.join(record_dir, '%d-%d-%d%s' % (
+                        step, t_number, p_number, results.RECORD_SUFFIX)),
+                    step=step, worker=p_number)
+            profiler = None
+            if profile_dir:
+                profiler = profiling.WorkerProfiler(
+                    os.path.join(profile_dir, '%d-%d' % (t_number,
+                                                         p_number)))
+            options = {'recorder': recorder,
+                       'recycle_runs': test.get(
+                           'recycle_after_runs',
+                           STRESS_CONF.stress.recycle_after_runs),
+                       'recycle_rss': test.get(
+                           'recycle_max_rss',
+                           STRESS_CONF.stress.recycle_max_rss) * mib,
+                       'profiler': profiler}
+            if results_dir:
+                options['schedule'] = schedule.ScheduleWriter(
+                    schedule.schedule_path(results_dir, step, t_number,
+                                           p_number), epoch)
+            if shared_budget is not None:
+                options['budget'] = shared_budget
+            if breaker is not None:
+                options['breaker'] = breaker
+            if replay is not None:
+                options['replay'] = schedule.Replay(
+                    replay.get((t_number, p_number), []), epoch)
+            process = {'t_number': t_number,
                        'p_number': p_number,
                        'action': test_run.action,
-                       'statistic': shared_statistic}
+                       'statistic': shared_statistic,
+                       'options': options,
+                       'test': test,
+                       'manager': manager,
+                       'max_runs': max_runs,
+                       'stop_on_error': stop_on_error,
+                       'log_queue': log_queue,
+                       'recycled': 0}
 
             processes.append(process)
-            p.start()
+            _start_process(process, test_run)
+            if run_start is None:
+                run_start = time.time()
     if stop_on_error:
         # NOTE(mkoderer): only the parent should register the handler
         signal.signal(signal.SIGCHLD, sigchld_handler)
+    sampler = None
+    if STRESS_CONF.stress.loadgen_sample_interval > 0:
+        sampler = procstat.Sampler(
+            _sample_targets, STRESS_CONF.stress.loadgen_sample_interval,
+            STRESS_CONF.stress.loadgen_cpu_bound)
+        sampler.start()
+    checkpointer = None
+    if checkpoint_path:
+        elapsed_before = resume['elapsed'] if resume else 0.0
+        checkpointer = checkpoint.Checkpointer(
+            checkpoint_path, STRESS_CONF.stress.checkpoint_interval,
+            functools.partial(
+                _checkpoint_state, tests,
+                resume['duration'] if resume else duration, max_runs,
+                resume.get('budget') if resume else budget, results_dir,
+                serial, elapsed_before, run_start, first_process))
+        checkpointer.start()
     end_time = time.time() + duration
+    check_interval = log_check_interval
+    if breaker is not None:
+        check_interval = min(check_interval, breaker.interval)
+    next_log_check = time.time() + log_check_interval
     had_errors = False
+    interrupted = False
     try:
         while True:
-            if max_runs is None:
+            if not until_done:
                 remaining = end_time - time.time()
                 if remaining <= 0:
                     break
@@ -215,33 +684,60 @@ def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
                 remaining = log_check_interval
                 all_proc_term = True
                 for process in processes:
-                    if process['process'].is_alive():
+                    if (process['process'].is_alive() or
+                            process['process'].exitcode ==
+                            stressaction.RECYCLE_EXIT_CODE):
                         all_proc_term = False
                         break
                 if all_proc_term:
                     break
 
-            time.sleep(min(remaining, log_check_interval))
+            _recycle_processes(min(remaining, check_interval), until_done)
             if stop_on_error:
                 if any([True for proc in processes
                         if proc['statistic']['fails'] > 0]):
                     break
+            if breaker is not None:
+                breaker.check()
+                if breaker.aborted:
+                    LOG.error("Aborting the run, the circuit breaker "
+                              "opened")
+                    had_errors = True
+                    break
 
-            if not logfiles:
+            if not logfiles or time.time() < next_log_check:
                 continue
+            next_log_check = time.time() + log_check_interval
             if _has_error_in_logs(logfiles, computes, ssh_user, ssh_key,
                                   stop_on_error):
                 had_errors = True
                 break
     except KeyboardInterrupt:
         LOG.warning("Interrupted, going to print statistics and exit ...")
+        interrupted = True
 
     if stop_on_error:
         signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    run_end = time.time()
+    if sampler is not None:
+        sampler.stop()
     terminate_all_processes()
+    failures.shutdown()
+    if log_listener is not None:
+        log_listener.stop()
+    if checkpointer is not None:
+        checkpointer.stop(finished=not interrupted,
+                          elapsed=elapsed_before + run_end -
+                          (run_start or run_end))
 
     sum_fails = 0
     sum_runs = 0
+    sum_throttled = 0
+    metrics = {}
+    api_calls = {}
+    all_failures = {}
+    requests = 0
+    opened = 0
 
     LOG.info("Statistics (per process):")
     for process in processes:
@@ -249,18 +745,73 @@ def stress_openstack(tests, duration, max_runs=None, stop_on_error=False):
             had_errors = True
         sum_runs += process['statistic']['runs']
         sum_fails += process['statistic']['fails']
+        sum_throttled += process['statistic'].get('throttled', 0)
+        stressaction.aggregate_api_calls(
+            api_calls, process['statistic'].get('api_calls', {}))
+        failures.merge(all_failures, process['statistic'].get('failures', {}),
+                       STRESS_CONF.stress.failure_tracebacks)
+        connections = process['statistic'].get('connections', {})
+        requests += connections.get('requests', 0)
+        opened += connections.get('opened', 0)
         print("Process %d (%s): Run %d actions (%d failed)" % (
             process['p_number'],
             process['action'],
             process['statistic']['runs'],
             process['statistic']['fails']))
+        if process['recycled']:
+            print("    recycled %d times" % process['recycled'])
+        for action, statistic in _action_statistics(process):
+            if action != process['action']:
+                print("    %s: Run %d actions (%d failed)" % (
+                    action, statistic['runs'], statistic['fails']))
+            _merge_metrics(metrics, action, statistic['metrics'])
     print("Summary:")
     print("Run %d actions (%d failed)" % (sum_runs, sum_fails))
+    if shared_budget is not None:
+        print("Run budget: %d of %d runs used" % (
+            shared_budget.total - shared_budget.left, shared_budget.total))
+    if record_dir:
+        results.update_step(record_dir, step, start=run_start, end=run_end,
+                            runs=sum_runs, fails=sum_fails)
+    if sum_throttled:
+        print("%d actions were rate limited by the API" % sum_throttled)
+    _print_failures(all_failures, results_dir,
+                    step if results_dir else None)
+    if breaker is not None:
+        _print_breaker(breaker, run_end, results_dir,
+                       step if results_dir else None)
+    _print_metrics(metrics)
+    _print_api_calls(api_calls)
+    if requests:
+        reused = max(requests - opened, 0)
+        print("HTTP connections: %d opened, reused for %d of %d requests "
+              "(%.1f%%)" % (opened, reused, requests,
+                            100.0 * reused / requests))
+    if sampler is not None:
+        _print_load_generator(sampler)
+    if log_listener is not None and log_listener.dropped:
+        print("Logging: %d debug records of the workers dropped under "
+              "load" % sum(log_listener.dropped.values()))
+    if profile_dir:
+        _print_profile(profile_dir)
+    sla_failed = False
+    if action_slas:
+        sla_rows = sla.evaluate(action_slas,
+                                _recorded_runs(record_dir, step),
+                                run_start or run_end, run_end)
+        _print_sla(sla_rows)
+        sla_failed = not sla.passed(sla_rows)
+        if results_dir:
+            with open(os.path.join(results_dir, '%d-sla.json' % step),
+                      'w') as f:
+                json.dump(sla_rows, f, indent=2)
+    if sla_dir is not None:
+        shutil.rmtree(sla_dir, ignore_errors=True)
 
     if not had_errors and STRESS_CONF.stress.full_clean_stack:
         LOG.info("cleaning up")
         cleanup.cleanup()
-    if had_errors:
+    if had_errors or sla_failed:
         return 1
     else:
         return 0
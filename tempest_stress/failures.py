@@ -0,0 +1,149 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Aggregation of run failures by signature.
+
+The signature of a failure is the exception type, its message with IDs,
+addresses and numbers masked, and the innermost frame outside of
+tempest.lib, the standard library and third party packages, i.e. the
+line of the stress action or tempest helper that failed. Workers count
+their failures per signature and action in the ``failures`` entry of
+their shared statistic. Only the first ``max_tracebacks`` tracebacks of
+a signature across all workers are logged and kept with it.
+"""
+
+import multiprocessing
+import os
+import re
+import sysconfig
+import traceback
+
+MAX_MESSAGE = 160
+
+_MASKS = (
+    (re.compile(r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?'
+                r'[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}'), '<id>'),
+    (re.compile(r'\b[0-9a-fA-F]{32,}\b'), '<id>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<ip>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<n>'),
+)
+_SPACES = re.compile(r'\s+')
+
+_STDLIB = sysconfig.get_paths()['stdlib']
+_TEMPEST_LIB = os.path.join('tempest', 'lib', '')
+
+# signature -> tracebacks logged, shared by all workers once configured
+_logged = {}
+_lock = None
+_manager = None
+_max_tracebacks = 3
+
+
+def configure(max_tracebacks):
+    """Shares the logged tracebacks with the workers forked later."""
+    global _logged, _lock, _manager, _max_tracebacks
+    shutdown()
+    _max_tracebacks = max_tracebacks
+    _manager = multiprocessing.Manager()
+    _logged = _manager.dict()
+    _lock = multiprocessing.Lock()
+
+
+def shutdown():
+    """Stops sharing the logged tracebacks, once the workers ended."""
+    global _logged, _manager
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+    _logged = {}
+
+
+def normalize(message):
+    """Masks the parts of a message varying between failures."""
+    message = _SPACES.sub(' ', message).strip()
+    for regex, mask in _MASKS:
+        message = regex.sub(mask, message)
+    if len(message) > MAX_MESSAGE:
+        message = message[:MAX_MESSAGE - 3] + '...'
+    return message
+
+
+def _is_library(filename):
+    if _TEMPEST_LIB in filename:
+        return True
+    if 'site-packages' in filename or 'dist-packages' in filename:
+        return 'tempest' not in filename
+    return filename.startswith(_STDLIB)
+
+
+def location(tb):
+    """Returns ``file:line in function`` of the frame that failed."""
+    frames = traceback.extract_tb(tb)
+    if not frames:
+        return None
+    frame = frames[-1]
+    for candidate in reversed(frames):
+        if not _is_library(candidate.filename):
+            frame = candidate
+            break
+    return '%s:%d in %s' % (os.path.basename(frame.filename), frame.lineno,
+                            frame.name)
+
+
+def signature(exc):
+    """Returns the signature of an exception raised by a run."""
+    name = exc.__class__.__name__
+    message = normalize(str(exc))
+    if message:
+        name = '%s: %s' % (name, message)
+    where = location(exc.__traceback__)
+    if where:
+        name = '%s (at %s)' % (name, where)
+    return name
+
+
+def should_log(sig):
+    """Counts a traceback of ``sig``, False once the limit is reached."""
+    if _lock is None:
+        count = _logged.get(sig, 0)
+        _logged[sig] = count + 1
+    else:
+        with _lock:
+            count = _logged.get(sig, 0)
+            _logged[sig] = count + 1
+    return count < _max_tracebacks
+
+
+def record(failures, sig, action, tb_text=None):
+    """Adds one failure to the ``failures`` aggregate and returns it."""
+    entry = failures.setdefault(sig, {'count': 0, 'actions': {},
+                                      'tracebacks': []})
+    entry['count'] += 1
+    entry['actions'][action] = entry['actions'].get(action, 0) + 1
+    if tb_text is not None:
+        entry['tracebacks'].append(tb_text)
+    return failures
+
+
+def merge(failures, process_failures, max_tracebacks=None):
+    """Merges the failures of one process into ``failures``."""
+    for sig, sample in process_failures.items():
+        entry = failures.setdefault(sig, {'count': 0, 'actions': {},
+                                          'tracebacks': []})
+        entry['count'] += sample['count']
+        for action, count in sample['actions'].items():
+            entry['actions'][action] = entry['actions'].get(action,
+                                                            0) + count
+        entry['tracebacks'].extend(sample['tracebacks'])
+        if max_tracebacks is not None:
+            del entry['tracebacks'][max_tracebacks:]
+    return failures
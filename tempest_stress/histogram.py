@@ -0,0 +1,68 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Log-bucketed latency histograms.
+
+A histogram is a plain dict, so it can be kept in the shared statistic
+of a worker and merged by the driver. Bucket ``i`` counts the latencies
+up to ``MIN_LATENCY * GROWTH ** i``, so percentiles are accurate to
+``GROWTH`` (5%) independent of the number of samples.
+"""
+
+import math
+
+MIN_LATENCY = 0.0001
+GROWTH = 1.05
+_LOG_GROWTH = math.log(GROWTH)
+
+
+def new():
+    return {'count': 0, 'total': 0.0, 'max': 0.0, 'buckets': {}}
+
+
+def bucket(latency):
+    if latency <= MIN_LATENCY:
+        return 0
+    return int(math.ceil(math.log(latency / MIN_LATENCY) / _LOG_GROWTH))
+
+
+def add(histogram, latency):
+    histogram['count'] += 1
+    histogram['total'] += latency
+    histogram['max'] = max(histogram['max'], latency)
+    index = bucket(latency)
+    histogram['buckets'][index] = histogram['buckets'].get(index, 0) + 1
+    return histogram
+
+
+def merge(histogram, other):
+    """Adds the samples of ``other`` to ``histogram``, returns it."""
+    histogram['count'] += other['count']
+    histogram['total'] += other['total']
+    histogram['max'] = max(histogram['max'], other['max'])
+    for index, count in other['buckets'].items():
+        histogram['buckets'][index] = histogram['buckets'].get(index,
+                                                               0) + count
+    return histogram
+
+
+def percentile(histogram, pct):
+    """Returns the upper bound of the bucket of the ``pct`` percentile."""
+    if not histogram['count']:
+        return None
+    rank = histogram['count'] * pct / 100.0
+    seen = 0
+    for index in sorted(histogram['buckets']):
+        seen += histogram['buckets'][index]
+        if seen >= rank:
+            return min(MIN_LATENCY * GROWTH ** index, histogram['max'])
+    return histogram['max']
@@ -0,0 +1,141 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Keep-alive HTTP connection pools shared by the REST clients of a worker.
+
+The tempest REST clients close the connection after every request. The
+pooling hook (see :mod:`tempest_stress.api_hooks`) replaces the HTTP
+object of every client by a keep-alive pool manager shared by all the
+clients of a process with the same TLS and timeout settings, so a worker
+keeps at most ``maxsize`` connections per host open and reuses them.
+Pools are never shared across processes, a forked worker creates its
+own.
+"""
+
+import os
+import threading
+
+from tempest.lib.common import http
+import urllib3
+from urllib3 import connectionpool
+
+# requests and new connections of this process since the last take
+_counters = {'pid': None, 'requests': 0, 'opened': 0}
+_lock = threading.Lock()
+
+
+def _check_pid():
+    if _counters['pid'] != os.getpid():
+        # forked, the requests of the parent are not ours
+        _counters.update(pid=os.getpid(), requests=0, opened=0)
+
+
+def _count(counter):
+    with _lock:
+        _check_pid()
+        _counters[counter] += 1
+
+
+def take_counters():
+    """Returns and resets (requests, opened connections) of this process."""
+    with _lock:
+        _check_pid()
+        counters = (_counters['requests'], _counters['opened'])
+        _counters['requests'] = _counters['opened'] = 0
+    return counters
+
+
+class _HTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    def _new_conn(self):
+        _count('opened')
+        return super(_HTTPConnectionPool, self)._new_conn()
+
+
+class _HTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    def _new_conn(self):
+        _count('opened')
+        return super(_HTTPSConnectionPool, self)._new_conn()
+
+
+class KeepAliveHttp(urllib3.PoolManager):
+    """A drop-in replacement of tempest's ClosingHttp keeping connections."""
+
+    def __init__(self, follow_redirects=True, num_pools=10, maxsize=10,
+                 **connection_pool_kw):
+        super(KeepAliveHttp, self).__init__(num_pools=num_pools,
+                                            maxsize=maxsize,
+                                            **connection_pool_kw)
+        self.follow_redirects = follow_redirects
+        self.pid = os.getpid()
+        self.pool_classes_by_scheme = {'http': _HTTPConnectionPool,
+                                       'https': _HTTPSConnectionPool}
+
+    def request(self, url, method, *args, **kwargs):
+
+        class Response(dict):
+            def __init__(self, info):
+                for key, value in info.getheaders().items():
+                    self[str(key).lower()] = value
+                self.status = info.status
+                self['status'] = str(self.status)
+                self.reason = info.reason
+                self.version = info.version
+                self['content-location'] = url
+
+        _count('requests')
+        if self.follow_redirects:
+            retry = urllib3.util.Retry(raise_on_redirect=False, redirect=5)
+        else:
+            retry = urllib3.util.Retry(redirect=False)
+        r = super(KeepAliveHttp, self).request(method, url, retries=retry,
+                                               *args, **kwargs)
+        if not kwargs.get('preload_content', True):
+            return r, b''
+        return Response(r), r.data
+
+
+class Pooling(object):
+    """The REST client hook sharing keep-alive pools within a process."""
+
+    def __init__(self, maxsize=10):
+        self.maxsize = maxsize
+        self._pid = None
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool_for(self, http_obj):
+        """Returns the shared pool matching the settings of ``http_obj``."""
+        settings = dict(http_obj.connection_pool_kw)
+        settings.pop('maxsize', None)
+        key = (http_obj.follow_redirects,
+               tuple(sorted((k, repr(v)) for k, v in settings.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked, the connections of the parent are not ours
+                self._pid = os.getpid()
+                self._pools = {}
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = KeepAliveHttp(
+                    follow_redirects=http_obj.follow_redirects,
+                    maxsize=self.maxsize, **settings)
+                self._pools[key] = pool
+        return pool
+
+    def __call__(self, client, method, url, call):
+        http_obj = client.http_obj
+        # NOTE: clients going through a proxy keep their own connections
+        if (type(http_obj) is http.ClosingHttp or
+                (isinstance(http_obj, KeepAliveHttp) and
+                 http_obj.pid != os.getpid())):
+            client.http_obj = self.pool_for(http_obj)
+        return call()
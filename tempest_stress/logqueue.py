@@ -0,0 +1,202 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Centralized, non-blocking logging of the workers.
+
+Every worker replaces the handlers of its root logger by a
+:class:`QueueHandler`. Logging a record only formats its message and
+appends it to an in-memory buffer, a background thread of the worker
+sends the buffered records in batches to the queue of the driver, where
+a :class:`LogListener` thread hands them to the handlers configured by
+oslo.log. Action threads never wait for the log files or the console.
+
+Under back-pressure (the driver does not keep up and the buffer of a
+worker is full) debug records are dropped and counted, records of a
+higher level are always kept.
+"""
+
+import collections
+import logging
+import os
+import pickle
+import queue as queue_mod
+import threading
+
+# attributes kept when a record with extra attributes cannot be pickled
+_RECORD_ATTRS = ('name', 'msg', 'levelname', 'levelno', 'pathname',
+                 'filename', 'module', 'lineno', 'funcName', 'created',
+                 'msecs', 'relativeCreated', 'thread', 'threadName',
+                 'processName', 'process', 'exc_text', 'stack_info')
+
+_formatter = logging.Formatter()
+_handler = None
+
+
+class QueueHandler(logging.Handler):
+    """Buffers the records of a worker and sends them in batches.
+
+    At most ``capacity`` records are buffered before debug records are
+    dropped. A batch is sent every ``interval`` seconds or as soon as
+    ``batch_size`` records are buffered.
+    """
+
+    def __init__(self, queue, capacity=10000, batch_size=100,
+                 interval=0.1):
+        super(QueueHandler, self).__init__()
+        self.queue = queue
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._buffer = collections.deque()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prepare(self, record):
+        """Merges the message and the traceback into the record."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        # NOTE: called with self.lock held, see logging.Handler.handle
+        if (len(self._buffer) >= self.capacity and
+                record.levelno <= logging.DEBUG):
+            self.dropped += 1
+            return
+        try:
+            self._buffer.append(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _take(self):
+        with self.lock:
+            records = list(self._buffer)
+            self._buffer.clear()
+            dropped = self.dropped
+            self.dropped = 0
+        return records, dropped
+
+    def _send(self, timeout=None):
+        records, dropped = self._take()
+        if not records and not dropped:
+            return
+        try:
+            batch = pickle.dumps((os.getpid(), dropped, records))
+        except Exception:
+            batch = pickle.dumps((os.getpid(), dropped,
+                                  [_plain(record) for record in records]))
+        try:
+            self.queue.put(batch, timeout=timeout)
+        except queue_mod.Full:
+            # NOTE: the driver does not keep up, give the records back
+            with self.lock:
+                self._buffer.extendleft(reversed(records))
+                self.dropped += dropped
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self._send(timeout=self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-sender')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def drain(self):
+        """Stops the sender and sends the buffered records."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            if self._thread is not threading.current_thread():
+                self._thread.join()
+            self._thread = None
+        self._send(timeout=5)
+
+
+def _plain(record):
+    """Returns a copy of a record without its extra attributes."""
+    return logging.makeLogRecord(dict(
+        (name, getattr(record, name, None)) for name in _RECORD_ATTRS))
+
+
+def install(queue, capacity, **kwargs):
+    """Routes the logging of this (worker) process to the driver.
+
+    ``kwargs`` are passed on to :class:`QueueHandler`.
+    """
+    global _handler
+    handler = QueueHandler(queue, capacity, **kwargs)
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    handler.start()
+    _handler = handler
+
+
+def drain():
+    """Sends the buffered records of this process, if installed."""
+    if _handler is not None:
+        _handler.drain()
+
+
+class LogListener(object):
+    """Hands the records sent by the workers to the driver's loggers."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.received = 0
+        self.dropped = collections.Counter()
+        self._thread = None
+
+    def handle(self, batch):
+        pid, dropped, records = pickle.loads(batch)
+        if dropped:
+            self.dropped[pid] += dropped
+        for record in records:
+            self.received += 1
+            # NOTE: the worker checked the level already
+            logging.getLogger(record.name).handle(record)
+
+    def _run(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            try:
+                self.handle(batch)
+            except Exception:
+                logging.getLogger(__name__).exception(
+                    "Failed to handle the log records of a worker")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name='log-listener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Handles the records queued so far and stops the listener."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
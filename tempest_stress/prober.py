@@ -0,0 +1,176 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import asyncio
+import itertools
+import os
+import socket
+import struct
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+_icmp_seq = itertools.count(1)
+_icmp_socket_type = None
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _icmp_echo_packet(ident, seq):
+    payload = struct.pack('!d', 0.0)
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + payload)
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, ident,
+                         seq)
+    return header + payload
+
+
+def _get_icmp_socket_type():
+    """Returns the ICMP socket type usable by this process.
+
+    Unprivileged ICMP (SOCK_DGRAM) is preferred, it is allowed when the
+    group of the process is in net.ipv4.ping_group_range. Raw sockets need
+    CAP_NET_RAW. None means that neither is available and the ``ping``
+    binary is used as a fallback.
+    """
+    global _icmp_socket_type
+    if _icmp_socket_type is None:
+        _icmp_socket_type = False
+        for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type,
+                                     socket.IPPROTO_ICMP)
+            except (OSError, AttributeError):
+                continue
+            sock.close()
+            _icmp_socket_type = sock_type
+            break
+        LOG.debug("ICMP socket type: %s", _icmp_socket_type)
+    return _icmp_socket_type or None
+
+
+class Prober(object):
+    """Non-blocking reachability prober for many addresses at once.
+
+    Every address is checked in its own coroutine on a single event loop,
+    so probing does not fork a process or block a worker for the
+    duration of a connect. ``timeout`` bounds a single attempt and
+    ``interval`` is the minimal time between two attempts to the same
+    address.
+    """
+
+    def __init__(self, timeout=1, interval=1):
+        self.timeout = timeout
+        self.interval = interval
+
+    async def tcp_connect(self, address, port):
+        try:
+            _reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(address, port), self.timeout)
+        except (OSError, asyncio.TimeoutError) as exc:
+            LOG.debug("%s:%s: %s", address, port, exc)
+            return False
+        writer.close()
+        return True
+
+    async def icmp_echo(self, address):
+        sock_type = _get_icmp_socket_type()
+        if sock_type is None or ':' in address:
+            return await self._ping_binary(address)
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        ident = os.getpid() & 0xffff
+        seq = next(_icmp_seq) & 0xffff
+        reply = loop.create_future()
+
+        def _on_readable():
+            try:
+                data, peer = sock.recvfrom(1024)
+            except OSError:
+                return
+            if sock_type == socket.SOCK_RAW:
+                # raw sockets deliver the IP header as well
+                data = data[(data[0] & 0x0f) * 4:]
+                if data[4:6] != struct.pack('!H', ident):
+                    return
+            if (peer[0] == address and len(data) >= 8 and
+                    data[0] == ICMP_ECHO_REPLY and
+                    data[6:8] == struct.pack('!H', seq) and
+                    not reply.done()):
+                reply.set_result(True)
+
+        loop.add_reader(sock.fileno(), _on_readable)
+        try:
+            sock.sendto(_icmp_echo_packet(ident, seq), (address, 0))
+            return await asyncio.wait_for(reply, self.timeout)
+        except (OSError, asyncio.TimeoutError) as exc:
+            LOG.debug("%s: %s", address, exc)
+            return False
+        finally:
+            loop.remove_reader(sock.fileno())
+            sock.close()
+
+    async def _ping_binary(self, address):
+        proc = await asyncio.create_subprocess_exec(
+            'ping', '-c1', '-w%d' % max(1, int(self.timeout)), address,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL)
+        return await proc.wait() == 0
+
+    async def _wait_reachable(self, check, address, deadline):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            attempt = loop.time()
+            if await check(address):
+                return loop.time() - start
+            if loop.time() - start >= deadline:
+                return None
+            await asyncio.sleep(
+                max(0, self.interval - (loop.time() - attempt)))
+
+    async def _wait_all(self, check, addresses, deadline):
+        addresses = list(addresses)
+        results = await asyncio.gather(
+            *[self._wait_reachable(check, address, deadline)
+              for address in addresses])
+        return dict(zip(addresses, results))
+
+    def wait_for_tcp(self, addresses, port, deadline):
+        """Waits until a TCP port accepts connections on every address.
+
+        Returns a dict mapping each address to the time in seconds it took
+        to become reachable, or None if it did not within ``deadline``.
+        """
+        async def check(address):
+            return await self.tcp_connect(address, port)
+        return asyncio.run(self._wait_all(check, addresses, deadline))
+
+    def wait_for_icmp(self, addresses, deadline):
+        """Waits until every address answers an ICMP echo request.
+
+        Returns the same mapping as :meth:`wait_for_tcp`.
+        """
+        return asyncio.run(self._wait_all(self.icmp_echo, addresses,
+                                          deadline))
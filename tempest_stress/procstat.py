@@ -0,0 +1,159 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Resource usage of the load generator processes.
+
+The driver samples the CPU time, resident set size, open file descriptors
+and context switches of itself and of every worker from ``/proc`` in a
+background thread. A worker using a whole CPU for most of the run is
+CPU-bound, i.e. the load generator and not the cloud may limit the
+throughput.
+"""
+
+import os
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# counters growing over the life of a process
+COUNTERS = ('cpu', 'voluntary_ctxt_switches', 'nonvoluntary_ctxt_switches')
+
+
+def read(pid):
+    """Returns the resource usage of a process, None if it is gone.
+
+    The dict holds the ``cpu`` time (user and system) in seconds, the
+    ``rss`` in bytes, the number of open ``fds`` and the context switch
+    counters.
+    """
+    base = '/proc/%s' % pid
+    try:
+        with open(base + '/stat') as f:
+            # the command name may contain spaces and parentheses
+            fields = f.read().rsplit(')', 1)[1].split()
+        if fields[0] == 'Z':
+            return None
+        usage = {'cpu': (int(fields[11]) + int(fields[12])) /
+                 float(os.sysconf('SC_CLK_TCK'))}
+        with open(base + '/status') as f:
+            for line in f:
+                key, _sep, value = line.partition(':')
+                if key == 'VmRSS':
+                    usage['rss'] = int(value.split()[0]) * 1024
+                elif key in COUNTERS:
+                    usage[key] = int(value)
+        usage['fds'] = len(os.listdir(base + '/fd'))
+    except (OSError, IOError, IndexError, ValueError):
+        return None
+    usage.setdefault('rss', 0)
+    for key in COUNTERS:
+        usage.setdefault(key, 0)
+    return usage
+
+
+class Sampler(object):
+    """Samples the resource usage of a set of processes at an interval.
+
+    ``targets`` is a callable returning a dict mapping a key to the pid
+    sampled for it. When the pid of a key changes (a recycled worker),
+    the counters of the previous process are carried over. A sample
+    where a process used at least ``cpu_bound`` of a CPU counts as busy.
+    """
+
+    def __init__(self, targets, interval=10, cpu_bound=0.9, reader=read):
+        self.targets = targets
+        self.interval = interval
+        self.cpu_bound = cpu_bound
+        self.reader = reader
+        self.stats = {}
+        self.host_samples = 0
+        self.host_busy = 0
+        self._last = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stats(self, key):
+        return self.stats.setdefault(key, dict(
+            [(c, 0) for c in COUNTERS], samples=0, busy=0, util_total=0.0,
+            max_util=0.0, rss=0, max_rss=0, fds=0, max_fds=0))
+
+    def sample(self, now=None):
+        """Takes one sample of all targets, returns the CPU utilizations."""
+        if now is None:
+            now = time.time()
+        utilization = {}
+        for key, pid in self.targets().items():
+            usage = self.reader(pid)
+            if usage is None:
+                continue
+            stats = self._stats(key)
+            last = self._last.get(key)
+            if last is not None and last[0] == pid:
+                _pid, last_time, last_usage = last
+                elapsed = now - last_time
+                if elapsed > 0:
+                    util = (usage['cpu'] - last_usage['cpu']) / elapsed
+                    utilization[key] = util
+                    stats['samples'] += 1
+                    stats['util_total'] += util
+                    stats['max_util'] = max(stats['max_util'], util)
+                    if util >= self.cpu_bound:
+                        stats['busy'] += 1
+                for counter in COUNTERS:
+                    stats[counter] += usage[counter] - last_usage[counter]
+            else:
+                for counter in COUNTERS:
+                    stats[counter] += usage[counter]
+            stats['rss'] = usage['rss']
+            stats['fds'] = usage['fds']
+            stats['max_rss'] = max(stats['max_rss'], usage['rss'])
+            stats['max_fds'] = max(stats['max_fds'], usage['fds'])
+            self._last[key] = (pid, now, usage)
+        if utilization:
+            self.host_samples += 1
+            if (sum(utilization.values()) >=
+                    self.cpu_bound * (os.cpu_count() or 1)):
+                self.host_busy += 1
+        return utilization
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            utilization = self.sample()
+            if not utilization:
+                continue
+            workers = [u for key, u in utilization.items() if key != 'driver']
+            LOG.info("Load generator: driver %.0f%% CPU, workers %.0f%% CPU "
+                     "(max %.0f%%), %d of %d CPU-bound, RSS %.1f MiB",
+                     utilization.get('driver', 0.0) * 100,
+                     sum(workers) * 100, max(workers or [0.0]) * 100,
+                     len([u for u in workers if u >= self.cpu_bound]),
+                     len(workers),
+                     sum(s['rss'] for s in self.stats.values()) / 1048576.0)
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run,
+                                        name='procstat-sampler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the sampling thread after a final sample."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.sample()
@@ -0,0 +1,160 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Profiling of the client side of the stress actions.
+
+Every worker profiles its runs with cProfile and samples the stack of
+the running action at a fixed interval. Both are written to the profile
+directory when the worker ends and merged by the driver into
+``profile.pstats`` (for ``python -m pstats`` or snakeviz) and
+``profile.collapsed`` (one ``frame;frame;... count`` line per stack, the
+input format of flamegraph.pl and speedscope).
+
+Only the thread running the action is profiled. The driver removes the
+profiles of earlier runs from the directory before the workers start,
+see :func:`clean`.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+import sys
+import threading
+
+PSTATS_SUFFIX = '.pstats'
+COLLAPSED_SUFFIX = '.collapsed'
+MERGED_NAME = 'profile'
+
+
+def _frame_label(code):
+    return '%s (%s:%d)' % (code.co_name,
+                           os.path.basename(code.co_filename),
+                           code.co_firstlineno)
+
+
+def collapse(frame):
+    """Returns the collapsed stack of a frame, outermost first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class WorkerProfiler(object):
+    """Profiles the runs of one worker.
+
+    Created in the driver and used in the forked worker, like
+    results.RecordWriter. ``path`` is the prefix of the files written
+    by :meth:`dump`, the pid is appended so recycled workers do not
+    overwrite each other.
+    """
+
+    def __init__(self, path, interval=0.01):
+        self.path = path
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._profile = None
+        self._thread = None
+        self._ident = None
+        self._active = threading.Event()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            if not self._active.is_set():
+                continue
+            frame = sys._current_frames().get(self._ident)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def __enter__(self):
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._ident = threading.get_ident()
+            self._thread = threading.Thread(target=self._sample,
+                                            name='profile-sampler')
+            self._thread.daemon = True
+            self._thread.start()
+        self._active.set()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profile.disable()
+        self._active.clear()
+
+    def dump(self):
+        """Stops profiling and writes the profile of this process."""
+        if self._profile is None:
+            return
+        self._profile.disable()
+        self._active.clear()
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        prefix = '%s-%d' % (self.path, os.getpid())
+        self._profile.dump_stats(prefix + PSTATS_SUFFIX)
+        write_collapsed(prefix + COLLAPSED_SUFFIX, self.stacks)
+        self._profile = None
+
+
+def write_collapsed(path, stacks):
+    with open(path, 'w') as f:
+        for stack, count in sorted(stacks.items()):
+            f.write('%s %d\n' % (stack, count))
+
+
+def read_collapsed(path, stacks=None):
+    if stacks is None:
+        stacks = collections.Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _sep, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def clean(profile_dir):
+    """Removes the worker and merged profiles of a directory."""
+    for name in os.listdir(profile_dir):
+        if name.endswith((PSTATS_SUFFIX, COLLAPSED_SUFFIX)):
+            os.remove(os.path.join(profile_dir, name))
+
+
+def merge(profile_dir):
+    """Merges the worker profiles of a directory.
+
+    Writes ``profile.pstats`` and ``profile.collapsed`` and returns the
+    merged pstats.Stats, or None if no worker wrote a profile.
+    """
+    stats = None
+    stacks = collections.Counter()
+    for name in sorted(os.listdir(profile_dir)):
+        if name.startswith(MERGED_NAME + '.'):
+            continue
+        path = os.path.join(profile_dir, name)
+        if name.endswith(PSTATS_SUFFIX):
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+        elif name.endswith(COLLAPSED_SUFFIX):
+            read_collapsed(path, stacks)
+    if stats is None:
+        return None
+    merged = os.path.join(profile_dir, MERGED_NAME)
+    stats.dump_stats(merged + PSTATS_SUFFIX)
+    write_collapsed(merged + COLLAPSED_SUFFIX, stacks)
+    return stats
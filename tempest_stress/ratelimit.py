@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import fnmatch
+import multiprocessing
+import time
+
+from oslo_log import log as logging
+
+from tempest_stress import api_hooks
+from tempest_stress import stressaction
+
+LOG = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    """Token bucket shared by all processes forked after its creation.
+
+    ``rate`` tokens per second are added up to ``burst`` tokens.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        # [tokens, time of the last refill]
+        self._state = multiprocessing.RawArray('d', [self.burst, time.time()])
+        self._lock = multiprocessing.Lock()
+
+    def acquire(self):
+        """Takes one token, blocking until one is available.
+
+        Returns the time in seconds spent waiting.
+        """
+        start = time.time()
+        blocked = False
+        while True:
+            with self._lock:
+                now = time.time()
+                tokens = min(self.burst, self._state[0] +
+                             (now - self._state[1]) * self.rate)
+                self._state[1] = now
+                if tokens >= 1:
+                    self._state[0] = tokens - 1
+                    return now - start if blocked else 0.0
+                self._state[0] = tokens
+                wait = (1 - tokens) / self.rate
+            blocked = True
+            time.sleep(wait)
+
+
+class RateLimiter(object):
+    """API hook drawing a token for every request of the REST clients.
+
+    ``limits`` is a list of ``(service, operation, bucket)``, the service
+    is matched against ``RestClient.service`` and the operation against
+    ``"<METHOD> <path>"`` (IDs normalized, see
+    :func:`api_hooks.normalize_path`), both as shell-style patterns. An
+    operation of None limits the whole service. A request draws from
+    every matching bucket.
+    """
+
+    def __init__(self, limits):
+        self.limits = limits
+
+    @classmethod
+    def from_config(cls, values):
+        """Builds the limiter from ``api_rate_limit`` option values.
+
+        Values have the format ``SERVICE[ OPERATION]=RATE[/BURST]``, e.g.
+        ``compute=20`` or ``compute POST */servers=2/5``. RATE has to be
+        positive and BURST at least 1.
+        """
+        limits = []
+        for value in values:
+            key, _sep, rate = value.rpartition('=')
+            service, _sep, operation = key.strip().partition(' ')
+            rate, _sep, burst = rate.partition('/')
+            try:
+                rate = float(rate)
+                burst = float(burst) if burst else None
+            except ValueError:
+                rate = None
+            if (not service or rate is None or rate <= 0 or
+                    (burst is not None and burst < 1)):
+                raise ValueError("Invalid api_rate_limit: %s" % value)
+            bucket = TokenBucket(rate, burst)
+            limits.append((service, operation.strip() or None, bucket))
+            LOG.info("Rate limit for %s %s: %s/s", service, operation or '*',
+                     rate)
+        return cls(limits)
+
+    def _buckets(self, service, method, url):
+        operation = '%s %s' % (method.upper(), api_hooks.normalize_path(url))
+        for l_service, l_operation, bucket in self.limits:
+            if not fnmatch.fnmatchcase(service or '', l_service):
+                continue
+            if (l_operation is None or
+                    fnmatch.fnmatchcase(operation, l_operation)):
+                yield bucket
+
+    def __call__(self, client, method, url, call):
+        waited = 0.0
+        for bucket in self._buckets(client.service, method, url):
+            waited += bucket.acquire()
+        if waited > 0:
+            stressaction.record_metric('throttle_wait', waited)
+        return call()
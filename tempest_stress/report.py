@@ -0,0 +1,238 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Vectorized report of the results recorded by a stress run.
+
+The record files are memory-mapped as NumPy structured arrays and all
+statistics are computed with array operations, so runs with tens of
+millions of records are summarized in seconds. The columns of all
+record files are loaded into memory together, about 32 bytes per
+record. NumPy is an optional dependency (``pip install
+tempest_stress[report]``).
+"""
+
+import html
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tempest_stress import results
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _record_dtype():
+    dtype = np.dtype([('time', '<f8'), ('value', '<f8'), ('action', '<u2'),
+                      ('name', '<u2'), ('error', '<u2'), ('pad', 'V2')])
+    if dtype.itemsize != results.RECORD.size:
+        raise RuntimeError("The record dtype (%d bytes) does not match "
+                           "the record format (%d bytes)" %
+                           (dtype.itemsize, results.RECORD.size))
+    return dtype
+
+
+class RunData(object):
+    """The records of all workers of a run as flat column arrays.
+
+    ``action``, ``name`` and ``error`` index into the run wide tables of
+    the same name, ``worker`` into ``workers`` (one per record file).
+    The record files are read through memory maps, but the columns of
+    all of them are concatenated into arrays in memory.
+    """
+
+    def __init__(self, results_dir):
+        if np is None:
+            raise RuntimeError("The report needs NumPy, install it with "
+                               "'pip install tempest_stress[report]'")
+        dtype = _record_dtype()
+        self.run = results.load_run(results_dir)
+        self.actions = []
+        self.names = [results.RUN_NAME]
+        self.errors = ['']
+        self.workers = []
+        columns = dict((c, []) for c in ('time', 'value', 'action', 'name',
+                                         'error', 'worker'))
+        for path, tables in results.record_files(results_dir):
+            count = os.path.getsize(path) // dtype.itemsize
+            if not count:
+                continue
+            records = np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+            worker = len(self.workers)
+            self.workers.append(os.path.basename(path))
+            columns['time'].append(records['time'])
+            columns['value'].append(records['value'])
+            for column in ('action', 'name', 'error'):
+                table = getattr(self, column + 's')
+                lut = np.array([self._index(table, v)
+                                for v in tables[column + 's']],
+                               dtype=np.int32)
+                columns[column].append(lut[records[column]])
+            columns['worker'].append(np.full(count, worker, dtype=np.int32))
+        for column, parts in columns.items():
+            if parts:
+                value = np.concatenate(parts)
+            else:
+                value = np.empty(0, dtype=np.float64 if column in
+                                 ('time', 'value') else np.int32)
+            setattr(self, column, value)
+
+    @staticmethod
+    def _index(table, value):
+        try:
+            return table.index(value)
+        except ValueError:
+            table.append(value)
+            return len(table) - 1
+
+    def __len__(self):
+        return len(self.time)
+
+
+def _groups(keys):
+    """Returns (key, index array) of every distinct key."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    unique, starts = np.unique(sorted_keys, return_index=True)
+    bounds = list(starts[1:]) + [len(order)]
+    return [(key, order[start:end])
+            for key, start, end in zip(unique, starts, bounds)]
+
+
+def _latency_stats(values):
+    stats = {'count': int(len(values)),
+             'mean': float(values.mean()),
+             'min': float(values.min()),
+             'max': float(values.max())}
+    for pct, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats['p%d' % pct] = float(value)
+    return stats
+
+
+def build_report(data, interval=10.0):
+    """Computes the report of a run as a JSON serializable dict."""
+    report = {'records': len(data), 'interval': interval, 'actions': {}}
+    if not len(data):
+        return report
+    n_workers = len(data.workers)
+    is_run = data.name == 0
+    start = float(data.time.min())
+    report['start'] = start
+    report['end'] = float(data.time.max())
+    bins = int((report['end'] - start) // interval) + 1
+
+    for action_id, index in _groups(data.action):
+        action = data.actions[action_id]
+        runs = index[data.name[index] == 0]
+        ok_runs = runs[data.error[runs] == 0]
+        entry = {'runs': int(len(runs)),
+                 'fails': int(len(runs) - len(ok_runs)),
+                 'phases': {}, 'errors': {}}
+        # per phase (run duration and metrics) latency percentiles
+        ok = index[data.error[index] == 0]
+        for name_id, phase in _groups(data.name[ok]):
+            entry['phases'][data.names[name_id]] = _latency_stats(
+                data.value[ok[phase]])
+        # error breakdown
+        err_ids, err_counts = np.unique(data.error[runs], return_counts=True)
+        for err_id, count in zip(err_ids, err_counts):
+            if err_id:
+                entry['errors'][data.errors[err_id]] = int(count)
+        # successful runs per interval
+        slots = ((data.time[ok_runs] - start) // interval).astype(np.int64)
+        entry['throughput'] = (np.bincount(slots, minlength=bins) /
+                               interval).tolist()
+        # runs per worker and Jain's fairness index
+        per_worker = np.bincount(data.worker[runs], minlength=n_workers)
+        per_worker = per_worker[per_worker > 0]
+        if len(per_worker):
+            entry['fairness'] = {
+                'workers': int(len(per_worker)),
+                'min_runs': int(per_worker.min()),
+                'max_runs': int(per_worker.max()),
+                'jain_index': float(per_worker.sum() ** 2 /
+                                    (len(per_worker) *
+                                     (per_worker.astype(np.float64) ** 2)
+                                     .sum()))}
+        report['actions'][action] = entry
+    report['runs'] = int(is_run.sum())
+    report['fails'] = int((is_run & (data.error != 0)).sum())
+    return report
+
+
+def write_json(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def _svg_series(series, interval, width=640, height=160):
+    if not series:
+        return ''
+    top = max(series) or 1.0
+    step = width / float(max(len(series) - 1, 1))
+    points = ' '.join('%.1f,%.1f' % (i * step,
+                                     height - value / top * height)
+                      for i, value in enumerate(series))
+    return ('<svg width="%d" height="%d" viewBox="0 -10 %d %d">'
+            '<polyline fill="none" stroke="#36c" stroke-width="1.5" '
+            'points="%s"/><text x="0" y="0" font-size="10">%.2f/s</text>'
+            '<text x="%d" y="%d" font-size="10" text-anchor="end">'
+            '%ds</text></svg>' % (width, height + 20, width, height + 20,
+                                  points, top, width, height + 10,
+                                  len(series) * interval))
+
+
+def write_html(report, path):
+    """Writes a self-contained HTML page (inline CSS and SVG) of a report."""
+    esc = html.escape
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8">'
+             '<title>Stress run report</title><style>'
+             'body{font-family:sans-serif;margin:2em}'
+             'table{border-collapse:collapse;margin-bottom:1em}'
+             'td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}'
+             'th:first-child,td:first-child{text-align:left}'
+             '</style></head><body><h1>Stress run report</h1>',
+             '<p>%d records, %d runs (%d failed)</p>' % (
+                 report['records'], report.get('runs', 0),
+                 report.get('fails', 0))]
+    for action, entry in sorted(report['actions'].items()):
+        parts.append('<h2>%s</h2><p>%d runs (%d failed)</p>' % (
+            esc(action), entry['runs'], entry['fails']))
+        parts.append('<table><tr><th>phase</th><th>count</th><th>mean</th>' +
+                     ''.join('<th>p%d</th>' % p for p in PERCENTILES) +
+                     '<th>max</th></tr>')
+        for phase, stats in sorted(entry['phases'].items()):
+            keys = ['mean'] + ['p%d' % p for p in PERCENTILES] + ['max']
+            parts.append('<tr><td>%s</td><td>%d</td>' % (
+                esc(phase), stats['count']))
+            parts.append(''.join('<td>%.3f</td>' % stats[k] for k in keys))
+            parts.append('</tr>')
+        parts.append('</table>')
+        if entry['errors']:
+            parts.append('<table><tr><th>error</th><th>count</th></tr>')
+            for error, count in sorted(entry['errors'].items(),
+                                       key=lambda e: -e[1]):
+                parts.append('<tr><td>%s</td><td>%d</td></tr>' % (
+                    esc(error), count))
+            parts.append('</table>')
+        if 'fairness' in entry:
+            parts.append('<p>Workers: %(workers)d, runs per worker '
+                         '%(min_runs)d - %(max_runs)d, Jain fairness index '
+                         '%(jain_index).3f</p>' % entry['fairness'])
+        parts.append('<p>Successful runs per second</p>')
+        parts.append(_svg_series(entry['throughput'], report['interval']))
+    parts.append('</body></html>')
+    with open(path, 'w') as f:
+        f.write(''.join(parts))
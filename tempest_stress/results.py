@@ -0,0 +1,217 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Per-iteration results of a stress run.
+
+A results directory contains ``run.json`` with the metadata of every
+driver invocation (``steps``) and one record file per worker. A record
+file is a sequence of fixed size little-endian records::
+
+    time    float64  epoch time the record was taken
+    value   float64  duration of the run or metric sample in seconds
+    action  uint16   index into the ``actions`` table
+    name    uint16   index into the ``names`` table (0 is ``run``)
+    error   uint16   index into the ``errors`` table (0 is success)
+
+The tables are kept in a JSON file next to it (``<file>.json``).
+"""
+
+import json
+import os
+import struct
+import time
+
+RECORD = struct.Struct('<ddHHHxx')
+RECORD_SUFFIX = '.rec'
+RUN_FILE = 'run.json'
+RUN_NAME = 'run'
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.rename(tmp_path, path)
+
+
+class RecordWriter(object):
+    """Appends the records of one worker to its record file.
+
+    The file is opened on first use, so the writer can be created in the
+    driver and used in the forked worker. An existing file is continued
+    with its tables, e.g. by the replacement of a recycled worker.
+    Records are buffered and written every ``flush_records`` records or
+    ``flush_interval`` seconds.
+    """
+
+    def __init__(self, path, step=0, worker=0, flush_records=1000,
+                 flush_interval=5):
+        self.path = path
+        self.step = step
+        self.worker = worker
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.tables = {'actions': [], 'names': [RUN_NAME], 'errors': ['']}
+        self._set_indexes()
+        self._buffer = []
+        self._file = None
+        self._tables_changed = True
+        self._last_flush = time.time()
+
+    def _set_indexes(self):
+        self._indexes = dict((table, dict((v, i) for i, v in
+                                          enumerate(values)))
+                             for table, values in self.tables.items())
+
+    def _open(self):
+        try:
+            with open(self.path + '.json') as f:
+                meta = json.load(f)
+        except IOError:
+            pass
+        else:
+            for table in self.tables:
+                self.tables[table] = meta[table]
+            self._set_indexes()
+        self._file = open(self.path, 'ab')
+
+    def _index(self, table, value):
+        index = self._indexes[table].get(value)
+        if index is None:
+            index = len(self.tables[table])
+            self.tables[table].append(value)
+            self._indexes[table][value] = index
+            self._tables_changed = True
+        return index
+
+    def record(self, action, name, value, error=None, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if self._file is None:
+            self._open()
+        self._buffer.append(RECORD.pack(
+            timestamp, value, self._index('actions', action),
+            self._index('names', name), self._index('errors', error or '')))
+        if (len(self._buffer) >= self.flush_records or
+                timestamp - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            self._open()
+        if self._tables_changed:
+            meta = dict(self.tables, step=self.step, worker=self.worker)
+            _write_json(self.path + '.json', meta)
+            self._tables_changed = False
+        self._file.write(b''.join(self._buffer))
+        self._file.flush()
+        self._buffer = []
+        self._last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+def add_step(results_dir, **step):
+    """Adds the metadata of a driver invocation to ``run.json``.
+
+    Returns the index of the new step.
+    """
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+    run = load_run(results_dir)
+    run['steps'].append(step)
+    _write_json(os.path.join(results_dir, RUN_FILE), run)
+    return len(run['steps']) - 1
+
+
+def update_step(results_dir, index, **values):
+    run = load_run(results_dir)
+    run['steps'][index].update(values)
+    _write_json(os.path.join(results_dir, RUN_FILE), run)
+
+
+def load_run(results_dir):
+    try:
+        with open(os.path.join(results_dir, RUN_FILE)) as f:
+            return json.load(f)
+    except IOError:
+        return {'steps': []}
+
+
+def record_files(results_dir):
+    """Returns (path, tables) of every record file of a run."""
+    files = []
+    for name in sorted(os.listdir(results_dir)):
+        if name.endswith(RECORD_SUFFIX):
+            path = os.path.join(results_dir, name)
+            with open(path + '.json') as f:
+                files.append((path, json.load(f)))
+    return files
+
+
+def iter_records(results_dir):
+    """Yields (step, worker, action, name, time, value, error) tuples."""
+    for path, tables in record_files(results_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        # a crashed worker may leave a partial record at the end
+        data = data[:len(data) - len(data) % RECORD.size]
+        for timestamp, value, action, name, error in RECORD.iter_unpack(
+                data):
+            yield (tables['step'], tables['worker'],
+                   tables['actions'][action], tables['names'][name],
+                   timestamp, value, tables['errors'][error])
+
+
+def step_durations(run):
+    durations = []
+    for step in run['steps']:
+        if step.get('start') is None or step.get('end') is None:
+            durations.append(0.0)
+        else:
+            durations.append(max(step['end'] - step['start'], 0.0))
+    return durations
+
+
+def summarize(results_dir):
+    """Returns the per action statistics of a run.
+
+    Maps every action to a dict with the sorted ``latencies`` of its
+    successful runs, the number of ``runs`` and ``fails``, the
+    ``duration`` of the steps it ran in and its ``throughput`` in
+    successful runs per second.
+    """
+    durations = step_durations(load_run(results_dir))
+    actions = {}
+    for step, _worker, action, name, _time, value, error in iter_records(
+            results_dir):
+        if name != RUN_NAME:
+            continue
+        stats = actions.setdefault(action, {'latencies': [], 'runs': 0,
+                                            'fails': 0, 'steps': set()})
+        stats['runs'] += 1
+        stats['steps'].add(step)
+        if error:
+            stats['fails'] += 1
+        else:
+            stats['latencies'].append(value)
+    for stats in actions.values():
+        stats['latencies'].sort()
+        steps = stats.pop('steps')
+        stats['duration'] = sum(durations[s] for s in steps
+                                if s < len(durations))
+        stats['throughput'] = (len(stats['latencies']) / stats['duration']
+                               if stats['duration'] else 0.0)
+    return actions
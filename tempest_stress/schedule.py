@@ -0,0 +1,110 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Record and replay of the schedule of a stress run.
+
+While recording results, every worker seeds the ``random`` module with a
+fresh seed before each run, so the resource names of
+``data_utils.rand_name`` and any other use of ``random`` are reproducible,
+and writes one line per run to its schedule file
+``<step>-<test>-<worker>.schedule`` in the results directory::
+
+    <start offset in seconds> <seed> <action>
+
+The offset is relative to the start of the driver invocation. A replay
+starts the same tests and workers and every worker re-issues the runs of
+its schedule at the same offsets with the same seeds and, for action
+mixes, the same actions.
+"""
+
+import os
+import re
+
+from tempest_stress import results
+
+SUFFIX = '.schedule'
+_NAME_RE = re.compile(r'^(\d+)-(\d+)-(\d+)%s$' % re.escape(SUFFIX))
+
+
+def new_seed():
+    return int.from_bytes(os.urandom(4), 'little')
+
+
+def schedule_path(results_dir, step, t_number, p_number):
+    return os.path.join(results_dir, '%d-%d-%d%s' % (step, t_number,
+                                                     p_number, SUFFIX))
+
+
+class ScheduleWriter(object):
+    """Appends the runs of one worker to its schedule file.
+
+    Like results.RecordWriter it is created in the driver and opened on
+    first use in the worker. ``epoch`` is the start time offsets are
+    relative to.
+    """
+
+    def __init__(self, path, epoch):
+        self.path = path
+        self.epoch = epoch
+        self._file = None
+
+    def record(self, start, seed, action):
+        if self._file is None:
+            # line buffered, a crashed worker loses no runs
+            self._file = open(self.path, 'a', buffering=1)
+        self._file.write('%.6f %d %s\n' % (start - self.epoch, seed, action))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Replay(object):
+    """The schedule of one worker and the epoch to replay it from."""
+
+    def __init__(self, entries, epoch):
+        self.entries = entries
+        self.epoch = epoch
+
+
+def read(path):
+    """Returns the (offset, seed, action) entries of a schedule file."""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            offset, seed, action = line.rstrip('\n').split(' ', 2)
+            entries.append((float(offset), int(seed), action))
+    return entries
+
+
+def load(results_dir, step=None):
+    """Loads the schedules of a step (default: the last) of a run.
+
+    Returns the step metadata from ``run.json`` and a dict mapping
+    ``(test number, worker number)`` to the schedule of the worker.
+    """
+    run = results.load_run(results_dir)
+    if not run['steps']:
+        raise ValueError("No run recorded in %s" % results_dir)
+    if step is None:
+        step = len(run['steps']) - 1
+    schedules = {}
+    for name in os.listdir(results_dir):
+        match = _NAME_RE.match(name)
+        if match and int(match.group(1)) == step:
+            schedules[(int(match.group(2)), int(match.group(3)))] = read(
+                os.path.join(results_dir, name))
+    if not schedules:
+        raise ValueError("No schedule recorded for step %d in %s" %
+                         (step, results_dir))
+    return run['steps'][step], schedules
@@ -0,0 +1,86 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Batches of servers created, watched and deleted together.
+
+A batch is identified by the filters of list_servers matching its
+servers, so a whole batch is polled and deleted with one list call per
+poll interval instead of one call per server.
+"""
+
+import time
+
+from tempest import config
+from tempest.lib import exceptions as lib_exc
+
+CONF = config.CONF
+
+
+def list_batch(servers_client, filters):
+    return servers_client.list_servers(detail=True, **filters)['servers']
+
+
+def create_batch(servers_client, name, count, min_count=None, **kwargs):
+    """Requests ``count`` servers with one multi-create request.
+
+    Returns the filters matching the batch and the number of servers
+    expected, ``min_count`` (default ``count``).
+    """
+    min_count = min_count or count
+    body = servers_client.create_server(
+        name=name, min_count=min_count, max_count=count,
+        return_reservation_id=True, **kwargs)
+    return {'reservation_id': body['reservation_id']}, min_count
+
+
+def wait_for_batch(servers_client, filters, expected, start, poll_interval):
+    """Waits until all servers of the batch are ACTIVE or in ERROR.
+
+    Returns the time every server was seen ACTIVE and the fault message
+    of every server in ERROR, both by server ID.
+    """
+    active = {}
+    errors = {}
+    while True:
+        servers = list_batch(servers_client, filters)
+        now = time.time()
+        for server in servers:
+            if server['status'] == 'ACTIVE':
+                active.setdefault(server['id'], now)
+            elif server['status'] == 'ERROR':
+                errors.setdefault(server['id'], server.get(
+                    'fault', {}).get('message', ''))
+        if (len(servers) >= expected and
+                len(active) + len(errors) >= len(servers)):
+            return active, errors
+        if now - start > CONF.compute.build_timeout:
+            raise lib_exc.TimeoutException(
+                "%d of %d servers of the batch ACTIVE and %d in ERROR "
+                "after %s seconds" % (len(active), expected, len(errors),
+                                      CONF.compute.build_timeout))
+        time.sleep(poll_interval)
+
+
+def delete_batch(servers_client, filters, poll_interval):
+    """Deletes the servers of the batch and waits until they are gone."""
+    for server in list_batch(servers_client, filters):
+        try:
+            servers_client.delete_server(server['id'])
+        except lib_exc.NotFound:
+            pass
+    start = time.time()
+    while list_batch(servers_client, filters):
+        if time.time() - start > CONF.compute.build_timeout:
+            raise lib_exc.TimeoutException(
+                "Servers of the batch not deleted after %s seconds" %
+                CONF.compute.build_timeout)
+        time.sleep(poll_interval)
@@ -0,0 +1,151 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Service level criteria of the actions of a stress test.
+
+A test entry (or an entry of a ``mix``) may carry an ``sla`` dict::
+
+    "sla": {"min_ops_per_second": 0.5,
+            "max_p95": 30,
+            "max_p99": 60,
+            "max_error_rate": 0.05,
+            "window": 300}
+
+``min_ops_per_second`` is the least number of successful runs per
+second of the action across all its workers, ``max_p<N>`` the highest
+allowed N-th percentile of the duration of its successful runs in
+seconds and ``max_error_rate`` the highest allowed fraction of failed
+runs. The criteria are checked over the whole run and, with a
+``window`` in seconds, in every full window of the run as well. A
+window (or a run) without successful runs fails the latency criteria.
+"""
+
+import re
+
+from tempest_stress import compare
+
+MIN_OPS = 'min_ops_per_second'
+MAX_ERROR_RATE = 'max_error_rate'
+WINDOW = 'window'
+_PERCENTILE_RE = re.compile(r'^max_p(\d+(?:\.\d+)?)$')
+
+
+def validate(sla):
+    """Raises ValueError if ``sla`` has an unknown or invalid criterion."""
+    for key, limit in sla.items():
+        if key not in (MIN_OPS, MAX_ERROR_RATE, WINDOW) and not (
+                _PERCENTILE_RE.match(key)):
+            raise ValueError("Unknown SLA criterion %s" % key)
+        if not isinstance(limit, (int, float)) or limit < 0:
+            raise ValueError("Invalid limit %r of SLA criterion %s" %
+                             (limit, key))
+    if sla.get(WINDOW) == 0:
+        raise ValueError("The SLA window must not be 0")
+
+
+def entry_slas(tests):
+    """Returns the ``sla`` dicts of all test and mix entries."""
+    slas = []
+    for test in tests:
+        for entry in [test] + list(test.get('mix', [])):
+            if 'sla' in entry:
+                slas.append(entry['sla'])
+    return slas
+
+
+def _measure(samples, duration):
+    latencies = sorted(value for value, error in samples if not error)
+    return {'ops': len(latencies) / duration if duration > 0 else 0.0,
+            'error_rate': ((len(samples) - len(latencies)) /
+                           float(len(samples)) if samples else 0.0),
+            'latencies': latencies}
+
+
+def _check(sla, measured):
+    """Returns (criterion, limit, value, passed) per criterion of ``sla``."""
+    checks = []
+    for key, limit in sorted(sla.items()):
+        if key == WINDOW:
+            continue
+        if key == MIN_OPS:
+            value = measured['ops']
+            checks.append(('ops/s >=', limit, value, value >= limit))
+        elif key == MAX_ERROR_RATE:
+            value = measured['error_rate']
+            checks.append(('error rate <=', limit, value, value <= limit))
+        else:
+            pct = _PERCENTILE_RE.match(key).group(1)
+            value = compare.percentile(measured['latencies'], float(pct))
+            checks.append(('p%s <=' % pct, limit, value,
+                           value is not None and value <= limit))
+    return checks
+
+
+def _worst(criterion, values):
+    if None in values:
+        return None
+    if criterion.endswith('>='):
+        return min(values)
+    return max(values)
+
+
+def evaluate(slas, runs, start, end):
+    """Checks the SLA criteria against the runs of a stress test.
+
+    ``slas`` maps an action to its criteria, ``runs`` yields the
+    (action, end time, duration, error) of every run between ``start``
+    and ``end``. Returns one row per action and criterion over the
+    whole run and, if the action has a ``window``, one summarizing all
+    windows with the worst value of a window and the numbers of the
+    ``failed`` windows.
+    """
+    samples = dict((action, []) for action in slas)
+    for action, timestamp, value, error in runs:
+        if action in samples:
+            samples[action].append((timestamp, value, error))
+    rows = []
+    for action, sla in sorted(slas.items()):
+        action_samples = samples[action]
+        overall = _measure([(value, error)
+                            for _t, value, error in action_samples],
+                           end - start)
+        for criterion, limit, value, passed in _check(sla, overall):
+            rows.append({'action': action, 'scope': 'overall',
+                         'criterion': criterion, 'limit': limit,
+                         'value': value, 'passed': passed})
+        window = sla.get(WINDOW)
+        if not window:
+            continue
+        windows = [[] for _ in range(int((end - start) // window))]
+        for timestamp, value, error in action_samples:
+            index = int((timestamp - start) // window)
+            if 0 <= index < len(windows):
+                windows[index].append((value, error))
+        checks = [_check(sla, _measure(window_samples, window))
+                  for window_samples in windows]
+        if not checks:
+            continue
+        for index, (criterion, limit, _v, _p) in enumerate(checks[0]):
+            values = [check[index][2] for check in checks]
+            failed = [number for number, check in enumerate(checks)
+                      if not check[index][3]]
+            rows.append({'action': action,
+                         'scope': '%d windows of %ss' % (len(checks),
+                                                         window),
+                         'criterion': criterion, 'limit': limit,
+                         'value': _worst(criterion, values),
+                         'passed': not failed, 'failed': failed})
+    return rows
+
+
+def passed(rows):
+    return all(row['passed'] for row in rows)
@@ -0,0 +1,163 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import socket
+import threading
+import time
+
+from oslo_log import log as logging
+import paramiko
+from tempest.lib import exceptions
+
+LOG = logging.getLogger(__name__)
+
+# seconds between the connection attempts
+CONNECT_INTERVAL = 2
+
+
+class StreamWatch(object):
+    """Follows the line based output of a long running guest command.
+
+    A reader thread keeps the last received line and the time it was
+    received, so callers can wait for a guest side event without polling
+    over new SSH connections.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.line = None
+        self.changed_at = None
+        self.closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._read)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _read(self):
+        try:
+            for line in self.channel.makefile('rb'):
+                with self._cond:
+                    self.line = line.decode('utf-8').rstrip('\n')
+                    self.changed_at = time.time()
+                    self._cond.notify_all()
+        except Exception:
+            LOG.exception("Reading the guest event stream failed")
+        finally:
+            with self._cond:
+                self.closed = True
+                self._cond.notify_all()
+
+    def wait_for(self, predicate, timeout):
+        """Waits until ``predicate(line)`` is true for the last line.
+
+        Returns the time the matching line was received or None if the
+        timeout expired or the stream ended before.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while self.line is None or not predicate(self.line):
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.closed:
+                    return None
+                self._cond.wait(remaining)
+            return self.changed_at
+
+    def close(self):
+        self.channel.close()
+        self._thread.join(1)
+
+
+class SSHSession(object):
+    """A single SSH connection to a guest shared by many commands.
+
+    ``client`` is a ``tempest.lib.common.ssh.Client``; only its public
+    connection attributes (host, port, username, credentials and
+    timeouts) are used to establish the connection, retried until its
+    ``timeout``. Every command then runs in its own channel over the
+    same transport. Proxied (ssh-over-ssh) clients are not supported.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._ssh = None
+        self._watches = []
+
+    def _get_transport(self):
+        if self._ssh is not None:
+            transport = self._ssh.get_transport()
+            if transport is not None and transport.is_active():
+                return transport
+            self._ssh.close()
+        self._ssh = self._connect()
+        return self._ssh.get_transport()
+
+    def _connect(self):
+        client = self.client
+        if getattr(client, 'proxy_client', None) is not None:
+            raise ValueError("SSH sessions over a proxy client are not "
+                             "supported")
+        deadline = time.time() + client.timeout
+        attempts = 0
+        while True:
+            ssh = paramiko.SSHClient()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            try:
+                ssh.connect(client.host, port=client.port,
+                            username=client.username,
+                            password=client.password, pkey=client.pkey,
+                            key_filename=client.key_filename,
+                            look_for_keys=client.look_for_keys,
+                            timeout=client.channel_timeout,
+                            allow_agent=getattr(client, 'ssh_allow_agent',
+                                                True))
+                return ssh
+            except (EOFError, socket.error, paramiko.SSHException) as exc:
+                ssh.close()
+                attempts += 1
+                if time.time() + CONNECT_INTERVAL > deadline:
+                    raise exceptions.SSHTimeout(host=client.host,
+                                                user=client.username,
+                                                password=client.password)
+                LOG.debug("SSH connection to %s@%s failed (%s), attempt "
+                          "%d", client.username, client.host, exc, attempts)
+                time.sleep(CONNECT_INTERVAL)
+
+    def exec_command(self, cmd):
+        channel = self._get_transport().open_session()
+        with channel:
+            channel.exec_command(cmd)
+            channel.shutdown_write()
+            out_data = channel.makefile('rb').read().decode('utf-8')
+            err_data = channel.makefile_stderr('rb').read().decode('utf-8')
+            exit_status = channel.recv_exit_status()
+        if exit_status != 0:
+            raise exceptions.SSHExecCommandFailed(
+                command=cmd, exit_status=exit_status,
+                stderr=err_data, stdout=out_data)
+        return out_data
+
+    def watch(self, cmd):
+        """Starts ``cmd`` on the guest and returns a StreamWatch for it."""
+        channel = self._get_transport().open_session()
+        channel.exec_command(cmd)
+        channel.shutdown_write()
+        watch = StreamWatch(channel)
+        self._watches.append(watch)
+        return watch
+
+    def close(self):
+        for watch in self._watches:
+            watch.close()
+        self._watches = []
+        if self._ssh is not None:
+            self._ssh.close()
+            self._ssh = None
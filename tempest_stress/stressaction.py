@@ -13,10 +13,99 @@
 #    under the License.
 
 import abc
+import contextlib
+import os
+import random
 import signal
 import sys
+import threading
+import time
+import traceback
 
 from oslo_log import log as logging
+from tempest.lib import exceptions
+
+from tempest_stress import failures
+from tempest_stress import histogram
+from tempest_stress import http_pool
+from tempest_stress import results
+from tempest_stress import schedule as run_schedule
+
+# The action executed by this (worker) process
+_current_action = None
+
+# Exit code of a worker that retired to be replaced by a fresh process
+RECYCLE_EXIT_CODE = 3
+
+
+def record_metric(name, value):
+    """Records a metric sample for the action running in this process.
+
+    This is meant for code outside of an action, e.g. REST client hooks.
+    Samples are dropped when no action is running.
+    """
+    if _current_action is not None:
+        _current_action.add_metric(name, value)
+
+
+def record_api_call(endpoint, status, latency):
+    """Records one API call for the action running in this process.
+
+    ``status`` is the HTTP status or, if the request failed, the name of
+    the exception. Calls are dropped when no action is running.
+    """
+    if _current_action is not None:
+        _current_action.add_api_call(endpoint, status, latency)
+
+
+def _is_rate_limited(exc):
+    if isinstance(exc, exceptions.RateLimitExceeded):
+        return True
+    resp = getattr(exc, 'resp', None)
+    return getattr(resp, 'status', None) == 429
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, IndexError, ValueError):
+        return 0
+
+
+def aggregate_metrics(metrics, samples):
+    """Adds metric samples to the (count, total, min, max) aggregates.
+
+    ``samples`` maps a metric name to a list of values, ``metrics`` is
+    updated in place and returned.
+    """
+    for name, values in samples.items():
+        count, total, low, high = metrics.get(name, (0, 0.0, None, None))
+        count += len(values)
+        total += sum(values)
+        low = min(values) if low is None else min([low] + values)
+        high = max(values) if high is None else max([high] + values)
+        metrics[name] = (count, total, low, high)
+    return metrics
+
+
+def aggregate_api_calls(calls, samples):
+    """Merges per endpoint API call statistics, ``calls`` is returned.
+
+    Every endpoint maps to a latency histogram (see
+    :mod:`tempest_stress.histogram`) with the number of ``errors`` and
+    the count of every status in ``statuses``.
+    """
+    for name, sample in samples.items():
+        entry = calls.setdefault(name, dict(histogram.new(), errors=0,
+                                            statuses={}))
+        histogram.merge(entry, sample)
+        entry['errors'] += sample['errors']
+        for status, count in sample['statuses'].items():
+            entry['statuses'][status] = entry['statuses'].get(status,
+                                                              0) + count
+    return calls
 
 
 class StressAction(object, metaclass=abc.ABCMeta):
@@ -27,14 +116,30 @@ class StressAction(object, metaclass=abc.ABCMeta):
         self.manager = manager
         self.max_runs = max_runs
         self.stop_on_error = stop_on_error
+        self.recorder = None
+        self.profiler = None
+        self.schedule = None
+        self._metrics = {}
+        self._api_calls = {}
+        # actions running requests in threads record from all of them
+        self._record_lock = threading.Lock()
 
     def _shutdown_handler(self, signal, frame):
         try:
             self.tearDown()
         except Exception:
             self.logger.exception("Error while tearDown")
+        self._close_outputs()
         sys.exit(0)
 
+    def _close_outputs(self):
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.profiler is not None:
+            self.profiler.dump()
+        if self.schedule is not None:
+            self.schedule.close()
+
     @property
     def action(self):
         """This methods returns the action.
@@ -43,6 +148,79 @@ class StressAction(object, metaclass=abc.ABCMeta):
         """
         return self.__class__.__name__
 
+    def add_metric(self, name, value):
+        """Record one sample of an action specific metric.
+
+        Samples are aggregated per name and handed over to the driver
+        after each run, e.g. ``self.add_metric('ssh_reachable', 4.2)``.
+        """
+        with self._record_lock:
+            self._metrics.setdefault(name, []).append(value)
+            if self.recorder is not None:
+                self.recorder.record(self.action, name, value)
+
+    def add_api_call(self, endpoint, status, latency):
+        """Record the latency of one API call of the action."""
+        with self._record_lock:
+            entry = self._api_calls.setdefault(
+                endpoint, dict(histogram.new(), errors=0, statuses={}))
+            histogram.add(entry, latency)
+            status = str(status)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            error = None
+            if not status.isdigit():
+                error = status
+            elif int(status) >= 400:
+                error = 'HTTP %s' % status
+            if error:
+                entry['errors'] += 1
+            if self.recorder is not None:
+                self.recorder.record(self.action, 'api ' + endpoint, latency,
+                                     error)
+
+    def _ran_action(self):
+        """Returns the name of the action of the last run."""
+        return self.action
+
+    def _replay(self, action):
+        """Prepares the next run to replay a run of ``action``."""
+
+    def _record_run(self, duration, error):
+        if self.recorder is not None:
+            self.recorder.record(self._ran_action(), results.RUN_NAME,
+                                 duration, error)
+
+    def _record_failure(self, shared_statistic, exc):
+        """Counts a failed run by signature, logging the first tracebacks."""
+        sig = failures.signature(exc)
+        tb_text = None
+        if failures.should_log(sig):
+            self.logger.exception("Failure in run")
+            tb_text = ''.join(traceback.format_exception(
+                type(exc), exc, exc.__traceback__))
+        else:
+            self.logger.debug("Failure in run: %s", sig)
+        shared_statistic['failures'] = failures.record(
+            shared_statistic.get('failures', {}), sig, self._ran_action(),
+            tb_text)
+
+    def _flush_metrics(self, shared_statistic):
+        if self._metrics:
+            shared_statistic['metrics'] = aggregate_metrics(
+                shared_statistic.get('metrics', {}), self._metrics)
+            self._metrics = {}
+        if self._api_calls:
+            shared_statistic['api_calls'] = aggregate_api_calls(
+                shared_statistic.get('api_calls', {}), self._api_calls)
+            self._api_calls = {}
+        requests, opened = http_pool.take_counters()
+        if requests or opened:
+            connections = shared_statistic.get('connections',
+                                               {'requests': 0, 'opened': 0})
+            connections['requests'] += requests
+            connections['opened'] += opened
+            shared_statistic['connections'] = connections
+
     def setUp(self, **kwargs):
         """Initialize test structures/resources
 
@@ -61,33 +239,219 @@ class StressAction(object, metaclass=abc.ABCMeta):
         """
         self.logger.debug("tearDown")
 
-    def execute(self, shared_statistic):
+    def _should_recycle(self, runs, recycle_runs, recycle_rss):
+        if recycle_runs and runs >= recycle_runs:
+            self.logger.info("Recycle worker after %d runs", runs)
+            return True
+        if recycle_rss:
+            rss = current_rss()
+            if rss > recycle_rss:
+                self.logger.info("Recycle worker after %d runs, RSS %d "
+                                 "bytes exceeds %d", runs, rss, recycle_rss)
+                return True
+        return False
+
+    def execute(self, shared_statistic, recorder=None, recycle_runs=None,
+                recycle_rss=None, profiler=None, schedule=None, replay=None,
+                budget=None, breaker=None):
         """This is the main execution entry point called by the driver.
 
         We register a signal handler to allow us to tearDown gracefully,
-        and then exit. We also keep track of how many runs we do.
+        and then exit. We also keep track of how many runs we do and,
+        if a ``recorder`` (results.RecordWriter) is given, record the
+        duration of every run. With a ``profiler``
+        (profiling.WorkerProfiler) every run is profiled.
+
+        After ``recycle_runs`` runs of this process, or once its resident
+        set size exceeds ``recycle_rss`` bytes, the action is torn down
+        and the process exits with RECYCLE_EXIT_CODE, so the driver
+        replaces it with a fresh one continuing the same statistics.
+
+        With a ``schedule`` (schedule.ScheduleWriter) every run is seeded
+        and recorded, with a ``replay`` (schedule.Replay) the recorded
+        runs are re-issued at their offsets and the worker ends when the
+        schedule is done. With a ``budget`` (budget.RunBudget) every run
+        is claimed from it and the worker ends once it is exhausted. With
+        a ``breaker`` (breaker.CircuitBreaker) every run is counted and
+        the worker waits before a run while the breaker holds it back,
+        recording the time waited as the ``breaker_wait`` metric.
         """
+        global _current_action
         signal.signal(signal.SIGHUP, self._shutdown_handler)
         signal.signal(signal.SIGTERM, self._shutdown_handler)
+        _current_action = self
+        self.recorder = recorder
+        self.profiler = profiler
+        self.schedule = schedule
+        profiling = profiler or contextlib.nullcontext()
+        runs = 0
+        entries = None
+        if replay is not None:
+            # NOTE: a recycled worker continues after the runs done
+            entries = iter(replay.entries[shared_statistic['runs']:])
 
         while self.max_runs is None or (shared_statistic['runs'] <
                                         self.max_runs):
-            self.logger.debug("Trigger new run (run %d)" %
+            self.logger.debug("Trigger new run (run %d)",
                               shared_statistic['runs'])
+            seed = None
+            if entries is not None:
+                entry = next(entries, None)
+                if entry is None:
+                    break
+                offset, seed, action = entry
+                delay = replay.epoch + offset - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                self._replay(action)
+            if breaker is not None:
+                waited = breaker.wait()
+                if waited:
+                    self.add_metric('breaker_wait', waited)
+            if budget is not None and not budget.claim():
+                break
+            if entries is None and schedule is not None:
+                seed = run_schedule.new_seed()
+            if seed is not None:
+                random.seed(seed)
+            start = time.time()
+            error = None
+            limited = False
             try:
-                self.run()
-            except Exception:
-                shared_statistic['fails'] += 1
-                self.logger.exception("Failure in run")
+                with profiling:
+                    self.run()
+            except Exception as exc:
+                error = exc.__class__.__name__
+                limited = _is_rate_limited(exc)
+                if limited:
+                    # NOTE: rate limited runs are not failures of the cloud
+                    shared_statistic['throttled'] = (
+                        shared_statistic.get('throttled', 0) + 1)
+                    self.logger.warning("Run rate limited by the API: %s",
+                                        exc)
+                else:
+                    shared_statistic['fails'] += 1
+                    self._record_failure(shared_statistic, exc)
             finally:
+                duration = time.time() - start
+                self._record_run(duration, error)
+                if breaker is not None and not limited:
+                    breaker.record(duration, error is not None)
+                if schedule is not None:
+                    schedule.record(start, seed, self._ran_action())
                 shared_statistic['runs'] += 1
+                self._flush_metrics(shared_statistic)
                 if self.stop_on_error and (shared_statistic['fails'] > 1):
                     self.logger.warning("Stop process due to"
                                         "\"stop-on-error\" argument")
                     self.tearDown()
+                    self._close_outputs()
                     sys.exit(1)
+            runs += 1
+            if self.max_runs is not None and (shared_statistic['runs'] >=
+                                              self.max_runs):
+                break
+            if self._should_recycle(runs, recycle_runs, recycle_rss):
+                try:
+                    self.tearDown()
+                except Exception:
+                    self.logger.exception("Error while tearDown")
+                self._close_outputs()
+                sys.exit(RECYCLE_EXIT_CODE)
+        self._close_outputs()
 
     @abc.abstractmethod
     def run(self):
         """This method is where the stress test code runs."""
         return
+
+
+class ActionMix(StressAction):
+    """Runs one of several actions per iteration, chosen by weight.
+
+    All actions share the worker of the mix. Next to the overall ``runs``
+    and ``fails``, the statistics of every action are kept in the
+    ``actions`` entry of the shared statistic.
+    """
+
+    def __init__(self, manager, actions, weights, max_runs=None,
+                 stop_on_error=False):
+        super(ActionMix, self).__init__(manager, max_runs, stop_on_error)
+        self.actions = actions
+        self.weights = weights
+        self._random = None
+        self._shared_statistic = None
+        self._last_action = None
+        self._replay_action = None
+
+    @property
+    def action(self):
+        return 'mix(%s)' % ','.join(a.action for a in self.actions)
+
+    def execute(self, shared_statistic, recorder=None, recycle_runs=None,
+                recycle_rss=None, profiler=None, schedule=None, replay=None,
+                budget=None, breaker=None):
+        self._shared_statistic = shared_statistic
+        # NOTE: seed in the worker, all workers are forked from the driver
+        self._random = random.Random()
+        for action in self.actions:
+            action.recorder = recorder
+        super(ActionMix, self).execute(shared_statistic, recorder,
+                                       recycle_runs, recycle_rss, profiler,
+                                       schedule, replay, budget, breaker)
+
+    def _ran_action(self):
+        return self._last_action.action
+
+    def _replay(self, action):
+        for candidate in self.actions:
+            if candidate.action == action:
+                self._replay_action = candidate
+                return
+        raise ValueError("Action %s is not part of %s" % (action,
+                                                          self.action))
+
+    def _account(self, action, exc):
+        """Counts a run of ``action`` like execute() counts the mix run."""
+        actions = self._shared_statistic.get('actions', {})
+        stats = actions.setdefault(action.action,
+                                   {'runs': 0, 'fails': 0, 'metrics': {}})
+        stats['runs'] += 1
+        if exc is not None:
+            if _is_rate_limited(exc):
+                stats['throttled'] = stats.get('throttled', 0) + 1
+            else:
+                stats['fails'] += 1
+        aggregate_metrics(stats['metrics'], action._metrics)
+        action._metrics = {}
+        # API calls are reported per endpoint, not per action
+        aggregate_api_calls(self._api_calls, action._api_calls)
+        action._api_calls = {}
+        self._shared_statistic['actions'] = actions
+
+    def run(self):
+        global _current_action
+        if self._replay_action is not None:
+            action = self._replay_action
+            self._replay_action = None
+        else:
+            action = self._random.choices(self.actions, self.weights)[0]
+        self._last_action = action
+        _current_action = action
+        try:
+            action.run()
+        except Exception as exc:
+            self._account(action, exc)
+            raise
+        else:
+            self._account(action, None)
+        finally:
+            _current_action = self
+
+    def tearDown(self):
+        for action in self.actions:
+            try:
+                action.tearDown()
+            except Exception:
+                self.logger.exception("Error while tearDown of %s",
+                                      action.action)
@@ -0,0 +1,190 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+from tempest.lib import exceptions
+
+from tempest_stress.actions import server_create_destroy
+from tempest_stress.actions import ssh_floating
+from tempest_stress.actions import volume_attach_delete
+from tempest_stress.actions import volume_create_delete
+from tempest_stress import admission
+
+
+class TestAdmission(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestAdmission, self).setUp()
+        admission.configure({admission.INSTANCES: 2, admission.VOLUMES: 0})
+        self.addCleanup(admission.configure, {})
+
+    def test_limit(self):
+        admission.acquire(admission.INSTANCES)
+        admission.acquire(admission.INSTANCES)
+        self.assertRaises(RuntimeError, admission.acquire,
+                          admission.INSTANCES, 0.01)
+        admission.release(admission.INSTANCES)
+        admission.acquire(admission.INSTANCES, 0.01)
+
+    def test_batch(self):
+        admission.acquire(admission.INSTANCES)
+        self.assertRaises(RuntimeError, admission.acquire,
+                          admission.INSTANCES, 0.01, count=2)
+        # the slots taken before the timeout are given back
+        admission.acquire(admission.INSTANCES, 0.01)
+        admission.release(admission.INSTANCES, 2)
+        admission.acquire(admission.INSTANCES, 0.01, count=2)
+        self.assertRaises(ValueError, admission.acquire,
+                          admission.INSTANCES, count=3)
+        self.assertEqual(2, admission.limit(admission.INSTANCES))
+        self.assertEqual(0, admission.limit(admission.VOLUMES))
+
+    def test_unlimited(self):
+        for _ in range(5):
+            self.assertEqual(0.0, admission.acquire(admission.VOLUMES))
+        admission.release(admission.VOLUMES)
+
+
+@mock.patch('tempest.common.waiters.wait_for_server_termination')
+class TestServerSlots(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestServerSlots, self).setUp()
+        admission.configure({admission.INSTANCES: 1})
+        self.addCleanup(admission.configure, {})
+        self.client = mock.Mock()
+        self.client.create_server.return_value = {'server': {'id': 's1'}}
+        self.client.show_server.return_value = {'server': {'id': 's1'}}
+
+    def _slot_free(self):
+        try:
+            admission.acquire(admission.INSTANCES, 0.01)
+        except RuntimeError:
+            return False
+        admission.release(admission.INSTANCES)
+        return True
+
+    def test_create_delete(self, wait_termination):
+        admission.create_server(self.client, name='vm')
+        self.assertFalse(self._slot_free())
+        self.client.delete_server.side_effect = exceptions.NotFound()
+        admission.delete_server(self.client, 's1')
+        wait_termination.assert_called_once_with(self.client, 's1')
+        self.assertTrue(self._slot_free())
+
+    def test_create_failed(self, wait_termination):
+        self.client.create_server.side_effect = exceptions.ServerFault()
+        self.assertRaises(exceptions.ServerFault, admission.create_server,
+                          self.client, name='vm')
+        self.assertTrue(self._slot_free())
+
+    def test_delete_failed(self, wait_termination):
+        admission.create_server(self.client, name='vm')
+        wait_termination.side_effect = exceptions.TimeoutException()
+        admission.delete_server_quietly(self.client, 's1')
+        # the server may still exist
+        self.assertFalse(self._slot_free())
+
+    def _action(self, cls, **kwargs):
+        action = cls(mock.MagicMock())
+        action.manager.servers_client = self.client
+        action.setUp(**kwargs)
+        return action
+
+    @mock.patch('tempest.common.waiters.wait_for_server_status')
+    def test_server_create_destroy_not_active(self, wait_status,
+                                              wait_termination):
+        wait_status.side_effect = exceptions.TimeoutException()
+        action = self._action(server_create_destroy.ServerCreateDestroyTest)
+        self.assertRaises(exceptions.TimeoutException, action.run)
+        self.client.delete_server.assert_called_once_with('s1')
+        self.assertTrue(self._slot_free())
+
+    @mock.patch('tempest.common.waiters.wait_for_server_status')
+    def test_ssh_floating_check_failed(self, wait_status, wait_termination):
+        action = self._action(ssh_floating.FloatingStress, new_vm=True,
+                              new_sec_group=True, new_floating=True,
+                              verify=['check_port_ssh'])
+        action.check_port_ssh = mock.Mock(side_effect=RuntimeError())
+        self.assertRaises(RuntimeError, action.run)
+        self.client.delete_server.assert_called_once_with('s1')
+        self.assertTrue(self._slot_free())
+
+    @mock.patch('tempest.common.waiters.wait_for_server_status')
+    def test_volume_attach_delete_attach_failed(self, wait_status,
+                                                wait_termination):
+        action = self._action(volume_attach_delete.VolumeAttachDeleteTest)
+        action.manager.volumes_client.create_volume.return_value = {
+            'volume': {'id': 'v1'}}
+        self.client.attach_volume.side_effect = exceptions.Conflict()
+        self.assertRaises(exceptions.Conflict, action.run)
+        self.client.delete_server.assert_called_once_with('s1')
+        action.manager.volumes_client.delete_volume.assert_called_once_with(
+            'v1')
+        self.assertTrue(self._slot_free())
+
+
+class TestVolumeSlots(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestVolumeSlots, self).setUp()
+        admission.configure({admission.VOLUMES: 2})
+        self.addCleanup(admission.configure, {})
+        self.client = mock.Mock()
+        self.client.create_volume.side_effect = [
+            {'volume': {'id': 'v1'}}, {'volume': {'id': 'v2'}}]
+
+    def _free_slots(self):
+        for free in range(2):
+            try:
+                admission.acquire(admission.VOLUMES, 0.01)
+            except RuntimeError:
+                admission.release(admission.VOLUMES, free)
+                return free
+        admission.release(admission.VOLUMES, 2)
+        return 2
+
+    def test_create_delete(self):
+        admission.create_volume(self.client, size=1)
+        admission.create_volume(self.client, size=1)
+        self.assertEqual(0, self._free_slots())
+        self.client.delete_volume.side_effect = [exceptions.NotFound(), None]
+        admission.delete_volumes(self.client, ['v1', 'v2'])
+        self.client.wait_for_resource_deletion.assert_has_calls(
+            [mock.call('v1'), mock.call('v2')])
+        self.assertEqual(2, self._free_slots())
+
+    def test_create_failed(self):
+        self.client.create_volume.side_effect = exceptions.ServerFault()
+        self.assertRaises(exceptions.ServerFault, admission.create_volume,
+                          self.client, size=1)
+        self.assertEqual(2, self._free_slots())
+
+    def test_delete_failed(self):
+        admission.create_volume(self.client, size=1)
+        self.client.wait_for_resource_deletion.side_effect = (
+            exceptions.TimeoutException())
+        admission.delete_volume_quietly(self.client, 'v1')
+        # the volume may still exist
+        self.assertEqual(1, self._free_slots())
+
+    def test_volume_create_delete_not_available(self):
+        action = volume_create_delete.VolumeCreateDeleteTest(
+            mock.MagicMock())
+        action.manager.volumes_client = self.client
+        self.client.wait_for_volume_status.side_effect = (
+            exceptions.TimeoutException())
+        self.assertRaises(exceptions.TimeoutException, action.run)
+        self.client.delete_volume.assert_called_once_with('v1')
+        self.assertEqual(2, self._free_slots())
@@ -0,0 +1,53 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+
+from tempest_stress import attachments
+from tempest_stress import stressaction
+
+
+class NoopAction(stressaction.StressAction):
+    def run(self):
+        pass
+
+
+class TestAttachments(base.BaseTestCase):
+
+    def test_attach_detach(self):
+        action = NoopAction(mock.Mock())
+        volume_ids = ['v1', 'v2', 'v3']
+        attachments.attach_volumes(action, 's1', volume_ids, host='cmp-1')
+        attachments.detach_volumes(action, 's1', volume_ids, host='cmp-1')
+
+        servers_client = action.manager.servers_client
+        servers_client.attach_volume.assert_has_calls(
+            [mock.call('s1', volumeId=v) for v in volume_ids],
+            any_order=True)
+        self.assertEqual(3, servers_client.detach_volume.call_count)
+        self.assertEqual(3, len(action._metrics['attach_latency']))
+        self.assertEqual(3, len(action._metrics['detach_latency']))
+        self.assertEqual(action._metrics['attachments_per_second'],
+                         action._metrics['attachments_per_second[cmp-1]'])
+
+    def test_fan_out_error(self):
+        def call(volume_id):
+            if volume_id == 'v2':
+                raise ValueError(volume_id)
+            calls.append(volume_id)
+        calls = []
+        self.assertRaises(ValueError, attachments.fan_out, call,
+                          ['v1', 'v2', 'v3'])
+        # the other volumes are still handled
+        self.assertEqual(['v1', 'v3'], sorted(calls))
@@ -0,0 +1,80 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+
+from tempest_stress import breaker
+
+
+class TestCircuitBreaker(base.BaseTestCase):
+
+    def _runs(self, circuit, count, failed=False, duration=1.0):
+        for _ in range(count):
+            circuit.record(duration, failed)
+
+    def test_pause_and_recover(self):
+        circuit = breaker.CircuitBreaker(60, max_error_rate=0.2,
+                                         min_runs=5, cooldown=30,
+                                         throttle_delay=0.5)
+        circuit.check(now=0)
+        self._runs(circuit, 4, failed=True)
+        # too few runs to decide
+        self.assertEqual(breaker.CLOSED, circuit.check(now=10))
+        self._runs(circuit, 4)
+        self.assertEqual(breaker.OPEN, circuit.check(now=20))
+        self.assertFalse(circuit._closed.is_set())
+        self.assertEqual(breaker.OPEN, circuit.check(now=40))
+        self.assertEqual(breaker.HALF_OPEN, circuit.check(now=50))
+        self.assertTrue(circuit._closed.is_set())
+        self.assertEqual(0.5, circuit._delay.value)
+        # the failures before the breaker opened no longer count
+        self._runs(circuit, 5)
+        self.assertEqual(breaker.CLOSED, circuit.check(now=60))
+        self.assertEqual(0.0, circuit._delay.value)
+        self.assertEqual([breaker.OPEN, breaker.HALF_OPEN, breaker.CLOSED],
+                         [c['state'] for c in circuit.changes])
+        self.assertEqual(40, circuit.time_open(100))
+        self.assertFalse(circuit.aborted)
+
+    def test_latency_throttle(self):
+        circuit = breaker.CircuitBreaker(60, max_latency=2.0, min_runs=2,
+                                         action=breaker.THROTTLE,
+                                         throttle_delay=3.0)
+        circuit.check(now=0)
+        self._runs(circuit, 2, duration=1.0)
+        self.assertEqual(breaker.CLOSED, circuit.check(now=10))
+        # the runs of the first check slide out of the window
+        self._runs(circuit, 2, duration=5.0)
+        self.assertEqual(breaker.OPEN, circuit.check(now=70))
+        self.assertTrue(circuit._closed.is_set())
+        self.assertEqual(3.0, circuit._delay.value)
+        self.assertEqual(5.0, circuit.changes[0]['latency'])
+
+    def test_abort(self):
+        circuit = breaker.CircuitBreaker(60, max_error_rate=0.0,
+                                         min_runs=1, action=breaker.ABORT)
+        circuit.check(now=0)
+        self._runs(circuit, 1, failed=True)
+        circuit.check(now=1)
+        self.assertTrue(circuit.aborted)
+        self.assertRaises(ValueError, breaker.CircuitBreaker, 60,
+                          action='retry')
+
+    @mock.patch('time.sleep')
+    def test_wait(self, sleep):
+        circuit = breaker.CircuitBreaker(60)
+        self.assertEqual(0.0, circuit.wait())
+        circuit._delay.value = 2.0
+        circuit.wait()
+        sleep.assert_called_once_with(2.0)
@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from tempest_stress import checkpoint
+from tempest_stress.cmd import run_stress
+from tempest_stress import histogram
+
+
+class TestCheckpoint(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestCheckpoint, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'checkpoint.json')
+
+    def _statistic(self):
+        return {'runs': 3, 'fails': 1,
+                'metrics': {'latency': (2, 3.0, 1.0, 2.0)},
+                'api_calls': {'compute GET /servers': dict(
+                    histogram.add(histogram.new(), 0.5), errors=0,
+                    statuses={'200': 1})}}
+
+    def test_round_trip(self):
+        statistic = self._statistic()
+        checkpoint.save(self.path, {'elapsed': 10.0, 'processes': [
+            {'t_number': 0, 'p_number': 1, 'statistic': statistic}]})
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+        data = checkpoint.load(self.path)
+        self.assertEqual(10.0, data['elapsed'])
+        self.assertEqual(statistic, data['processes'][0]['statistic'])
+
+    def test_version(self):
+        with open(self.path, 'w') as f:
+            json.dump({'version': 0, 'processes': []}, f)
+        self.assertRaises(ValueError, checkpoint.load, self.path)
+
+    def test_checkpointer(self):
+        states = iter(range(10))
+        checkpointer = checkpoint.Checkpointer(
+            self.path, 0.01, lambda: {'state': next(states),
+                                      'processes': []})
+        checkpointer.start()
+        checkpointer.stop(finished=True)
+        data = checkpoint.load(self.path)
+        self.assertTrue(data['finished'])
+        self.assertGreaterEqual(data['state'], 0)
+
+    @mock.patch('tempest_stress.driver.stress_openstack', return_value=0)
+    def test_resume_serial(self, stress_openstack):
+        tests = [{'action': 'a'}, {'action': 'b'}, {'action': 'c'}]
+        checkpoint.save(self.path, {
+            'tests': tests[1:2], 'duration': 100, 'elapsed': 40.0,
+            'max_runs': None, 'budget': 5, 'results_dir': None,
+            'serial': {'tests': tests, 'index': 1, 'duration': 100,
+                       'budget': 15},
+            'processes': [{'t_number': 0, 'p_number': 0,
+                           'statistic': {'runs': 2, 'fails': 0}}]})
+        ns = run_stress.parser.parse_args(['--resume', self.path])
+        self.assertEqual(0, run_stress.resume_run(ns))
+        resumed, remaining = stress_openstack.call_args_list
+        self.assertEqual((tests[1:2], 60.0), resumed[0][:2])
+        self.assertEqual(3, resumed[1]['budget'])
+        self.assertEqual((tests[2:], 100), remaining[0][:2])
+        self.assertEqual(5, remaining[1]['budget'])
+        self.assertEqual(2, remaining[1]['serial']['index'])
+
+        # a crash between two tests continues with the next one
+        stress_openstack.reset_mock()
+        data = checkpoint.load(self.path)
+        checkpoint.save(self.path, dict(data, finished=True))
+        self.assertEqual(0, run_stress.resume_run(ns))
+        self.assertEqual([tests[2:]], [c[0][0] for c in
+                                       stress_openstack.call_args_list])
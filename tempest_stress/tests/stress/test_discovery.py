@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+from oslotest import base
+
+from tempest_stress import discovery
+
+BASE_MODULE = """
+from tempest.lib import decorators
+from tempest import test
+
+
+class BaseStressTest(test.BaseTestCase):
+
+    @decorators.attr(type=['stress', 'gate'])
+    def test_inherited(self):
+        pass
+
+    @test.stresstest(class_setup_per='action', allow_inheritance=True)
+    def test_allowed(self):
+        pass
+"""
+
+TEST_MODULE = """
+from pkg import base
+
+
+class StressTest(base.BaseStressTest):
+
+    @decorators.attr(type='stress')
+    def test_own(self):
+        pass
+
+    def test_not_stress(self):
+        pass
+"""
+
+
+class TestStressTestIndex(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestStressTestIndex, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+        self.index_path = os.path.join(self.path, 'index.json')
+        pkg = os.path.join(self.path, 'pkg')
+        os.mkdir(pkg)
+        for name, source in (('__init__.py', ''), ('base.py', BASE_MODULE),
+                             ('test_stress.py', TEST_MODULE)):
+            with open(os.path.join(pkg, name), 'w') as f:
+                f.write(source)
+
+    def _discover(self, **kwargs):
+        index = discovery.StressTestIndex(self.path, self.index_path)
+        index.load()
+        index.update()
+        index.save()
+        return index, dict(index.stress_tests(**kwargs))
+
+    def test_discover(self):
+        _index, tests = self._discover()
+        self.assertEqual(['pkg.test_stress.StressTest.test_allowed',
+                          'pkg.test_stress.StressTest.test_own'],
+                         sorted(tests))
+        self.assertEqual(
+            'action',
+            tests['pkg.test_stress.StressTest.test_allowed']
+            ['class_setup_per'])
+
+    def test_discover_inherited_and_filtered(self):
+        _index, tests = self._discover(filter_attr='gate',
+                                       call_inherited=True)
+        self.assertEqual(['pkg.test_stress.StressTest.test_inherited'],
+                         list(tests))
+
+    def test_index_reused(self):
+        index, _tests = self._discover()
+        self.assertEqual(3, index.scanned)
+        index, _tests = self._discover()
+        self.assertEqual(0, index.scanned)
+        with open(os.path.join(self.path, 'pkg', 'test_stress.py'),
+                  'a') as f:
+            f.write('\n# changed\n')
+        index, _tests = self._discover()
+        self.assertEqual(1, index.scanned)
@@ -0,0 +1,93 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import multiprocessing
+import signal
+import time
+from unittest import mock
+
+from oslotest import base
+
+from tempest_stress import driver
+
+
+def _hang(ready):
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    ready.set()
+    time.sleep(60)
+
+
+class TestDriver(base.BaseTestCase):
+
+    def test_action_statistics_of_mix(self):
+        action_stats = {'runs': 3, 'fails': 1, 'metrics': {}}
+        process = {'action': 'mix(A,B)',
+                   'statistic': {'runs': 3, 'fails': 1,
+                                 'metrics': {'breaker_wait': (1, 2.0, 2.0,
+                                                              2.0)},
+                                 'actions': {'A': action_stats}}}
+        self.assertEqual(
+            [('A', action_stats),
+             ('mix(A,B)', {'runs': 3, 'fails': 1,
+                           'metrics': {'breaker_wait': (1, 2.0, 2.0,
+                                                        2.0)}})],
+            driver._action_statistics(process))
+        del process['statistic']['metrics']
+        self.assertEqual([('A', action_stats)],
+                         driver._action_statistics(process))
+
+    def test_build_mix_weights(self):
+        for weights in ([0, 0], [2, -1]):
+            test = {'mix': [{'action': 'a.A', 'weight': weights[0]},
+                            {'action': 'b.B', 'weight': weights[1]}]}
+            self.assertRaises(ValueError, driver._build_action, test,
+                              None, None, False)
+
+    def test_action_slas(self):
+        test_run = mock.Mock(action='A')
+        test_run.actions = [mock.Mock(action='A'), mock.Mock(action='B')]
+        action_slas = {}
+        driver._action_slas({'sla': {'max_p95': 1}}, test_run, action_slas)
+        driver._action_slas({'mix': [{'sla': {'max_p95': 1}},
+                                     {'sla': {'max_p99': 2}}]},
+                            test_run, action_slas)
+        self.assertEqual({'A': {'max_p95': 1}, 'B': {'max_p99': 2}},
+                         action_slas)
+        self.assertRaises(ValueError, driver._action_slas,
+                          {'sla': {'max_p95': 2}}, test_run, action_slas)
+
+    def _processes(self, *targets):
+        processes = []
+        for target, args in targets:
+            process = multiprocessing.Process(target=target, args=args)
+            process.start()
+            processes.append({'process': process})
+        patcher = mock.patch.object(driver, 'processes', processes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return processes
+
+    def test_terminate_without_waiting(self):
+        processes = self._processes((time.sleep, (60,)), (time.sleep, (60,)))
+        processes[0]['process'].terminate()
+        processes[0]['process'].join()
+        start = time.time()
+        driver.terminate_all_processes(check_interval=20)
+        self.assertLess(time.time() - start, 10)
+        self.assertFalse(any(p['process'].is_alive() for p in processes))
+
+    def test_terminate_kills_hanging(self):
+        ready = multiprocessing.Event()
+        processes = self._processes((_hang, (ready,)))
+        ready.wait(10)
+        driver.terminate_all_processes(check_interval=0.5)
+        self.assertEqual(-signal.SIGKILL, processes[0]['process'].exitcode)
@@ -0,0 +1,84 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+from unittest import mock
+
+import fixtures
+from oslotest import base
+
+from tempest_stress import failures
+from tempest_stress import stressaction
+
+
+class FailingAction(stressaction.StressAction):
+    def run(self):
+        server_id = random.randint(0, 2 ** 32 - 1)
+        raise ValueError("Server %08x-0000-4000-8000-%012d at 10.0.0.%d "
+                         "failed" % (server_id, server_id, server_id % 250))
+
+
+class TestFailures(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestFailures, self).setUp()
+        self.useFixture(fixtures.MockPatchObject(failures, '_logged', {}))
+        self.useFixture(fixtures.MockPatchObject(failures, '_lock', None))
+        self.useFixture(fixtures.MockPatchObject(failures, '_manager', None))
+        self.useFixture(fixtures.MockPatchObject(failures,
+                                                 '_max_tracebacks', 2))
+
+    def test_normalize(self):
+        self.assertEqual(
+            "Server <id> (req-<id>) at <ip> took <n>s",
+            failures.normalize("Server 0b5ed3c4-2f1e-4a6b-9c7d-8e9f0a1b2c3d"
+                               " (req-4f3a2b1c-0d9e-8f7a-6b5c-4d3e2f1a0b9c)"
+                               "\n  at 192.168.1.20:8774 took 12.5s"))
+
+    def test_signature(self):
+        try:
+            FailingAction(None).run()
+        except ValueError as exc:
+            sig = failures.signature(exc)
+        self.assertRegex(sig, r"^ValueError: Server <id> at <ip> failed "
+                              r"\(at test_failures.py:\d+ in run\)$")
+
+    def test_execute(self):
+        statistic = {'runs': 0, 'fails': 0}
+        action = FailingAction(None, max_runs=5)
+        with mock.patch.object(action.logger, 'exception') as log_exception:
+            action.execute(statistic)
+        self.assertEqual(5, statistic['fails'])
+        self.assertEqual(2, log_exception.call_count)
+        (sig, entry), = statistic['failures'].items()
+        self.assertEqual(5, entry['count'])
+        self.assertEqual({'FailingAction': 5}, entry['actions'])
+        self.assertEqual(2, len(entry['tracebacks']))
+        self.assertIn('Traceback', entry['tracebacks'][0])
+
+        merged = failures.merge({}, statistic['failures'], 3)
+        failures.merge(merged, statistic['failures'], 3)
+        self.assertEqual(10, merged[sig]['count'])
+        self.assertEqual(3, len(merged[sig]['tracebacks']))
+
+    @mock.patch('multiprocessing.Manager')
+    def test_configure_shutdown(self, manager):
+        first, second = manager.side_effect = [mock.Mock(), mock.Mock()]
+        failures.configure(1)
+        failures.configure(1)
+        # the manager of a previous configuration is stopped
+        first.shutdown.assert_called_once_with()
+        self.assertFalse(second.shutdown.called)
+        failures.shutdown()
+        second.shutdown.assert_called_once_with()
+        self.assertIsNone(failures._manager)
+        self.assertEqual({}, failures._logged)
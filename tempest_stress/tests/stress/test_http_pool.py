@@ -0,0 +1,72 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from http import server
+import threading
+from unittest import mock
+
+from oslotest import base
+from tempest.lib.common import http
+
+from tempest_stress import http_pool
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpPool(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestHttpPool, self).setUp()
+        self.server = server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://127.0.0.1:%d/v2.1/servers' % (
+            self.server.server_address[1])
+        http_pool.take_counters()
+
+    def test_reuse(self):
+        pooling = http_pool.Pooling(maxsize=2)
+        clients = [mock.Mock(http_obj=http.ClosingHttp(timeout=10))
+                   for _ in range(2)]
+        for _ in range(3):
+            for client in clients:
+                resp, body = pooling(
+                    client, 'GET', self.url,
+                    lambda: client.http_obj.request(self.url, 'GET'))
+                self.assertEqual(200, resp.status)
+                self.assertEqual(b'{}', body)
+        self.assertIsInstance(clients[0].http_obj, http_pool.KeepAliveHttp)
+        self.assertIs(clients[0].http_obj, clients[1].http_obj)
+        self.assertEqual((6, 1), http_pool.take_counters())
+        self.assertEqual((0, 0), http_pool.take_counters())
+
+    def test_settings(self):
+        pooling = http_pool.Pooling()
+        verified = pooling.pool_for(http.ClosingHttp(timeout=10))
+        self.assertIsNot(verified, pooling.pool_for(http.ClosingHttp(
+            disable_ssl_certificate_validation=True, timeout=10)))
+        self.assertIs(verified, pooling.pool_for(verified))
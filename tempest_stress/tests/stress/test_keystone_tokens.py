@@ -0,0 +1,65 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+import fixtures
+from oslotest import base
+from tempest.lib import exceptions
+
+from tempest_stress.actions import keystone_tokens
+
+
+class TestKeystoneTokens(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestKeystoneTokens, self).setUp()
+        self.client = mock.Mock()
+        self.client.get_credentials.side_effect = [
+            mock.Mock(user_id='u%d' % i, project_id='p%d' % i,
+                      tenant_id='p%d' % i, password='pass')
+            for i in range(3)]
+        patcher = mock.patch('tempest_stress.accounts.credentials_client',
+                             return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = mock.Mock()
+        self.manager.token_v3_client.get_token.side_effect = (
+            lambda **kwargs: 'token-%s' % kwargs['user_id'])
+
+    def test_run(self):
+        action = keystone_tokens.KeystoneTokenTest(self.manager)
+        action.setUp(users=3)
+        self.assertEqual(3, self.client.create_user.call_count)
+        action.run()
+
+        identity = self.manager.identity_v3_client
+        self.assertEqual(sorted(['token-u0', 'token-u1', 'token-u2']),
+                         sorted(c[0][0] for c in
+                                identity.delete_token.call_args_list))
+        self.assertEqual(3, len(action._metrics['token_issue']))
+        self.assertEqual(3, len(action._metrics['token_validate']))
+        self.assertEqual(1, len(action._metrics['tokens_per_second']))
+
+        identity.show_token.side_effect = exceptions.NotFound()
+        self.assertRaises(exceptions.NotFound, action.run)
+
+        action.tearDown()
+        self.assertEqual(3, self.client.delete_user.call_count)
+        self.assertEqual(3, self.client.delete_project.call_count)
+
+    def test_identity_v2(self):
+        self.useFixture(fixtures.MockPatchObject(
+            keystone_tokens.CONF, 'identity', mock.Mock(auth_version='v2')))
+        action = keystone_tokens.KeystoneTokenTest(self.manager)
+        self.assertRaises(exceptions.InvalidConfiguration, action.setUp)
+        self.assertFalse(self.client.create_user.called)
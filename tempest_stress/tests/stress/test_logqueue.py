@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import multiprocessing
+
+from oslotest import base
+
+from tempest_stress import logqueue
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super(CaptureHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _worker(log_queue):
+    logqueue.install(log_queue, capacity=2, interval=60)
+    logger = logging.getLogger('tempest_stress.test_logqueue.worker')
+    # NOTE: the capture handler of the test runs in the driver only
+    logger.handlers = []
+    logger.propagate = True
+    logger.setLevel(logging.DEBUG)
+    for run in range(4):
+        logger.debug("Trigger new run (run %d)", run)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failure in run")
+    logqueue.drain()
+
+
+class TestLogQueue(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestLogQueue, self).setUp()
+        self.capture = CaptureHandler()
+        logger = logging.getLogger('tempest_stress.test_logqueue.worker')
+        logger.addHandler(self.capture)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, self.capture)
+        self.addCleanup(setattr, logger, 'propagate', True)
+
+    def test_worker_logs_through_driver(self):
+        log_queue = multiprocessing.Queue()
+        listener = logqueue.LogListener(log_queue)
+        listener.start()
+        worker = multiprocessing.Process(target=_worker, args=(log_queue,))
+        worker.start()
+        worker.join()
+        listener.stop()
+
+        self.assertEqual(0, worker.exitcode)
+        messages = [record.getMessage() for record in self.capture.records]
+        # the buffer is full after two records, the other debug records
+        # are dropped but the error is kept
+        self.assertEqual(["Trigger new run (run 0)",
+                          "Trigger new run (run 1)",
+                          "Failure in run"], messages)
+        self.assertIn("ValueError: boom", self.capture.records[2].exc_text)
+        self.assertEqual({worker.pid: 2}, dict(listener.dropped))
@@ -0,0 +1,44 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+from oslotest import base
+
+from tempest_stress import prober
+
+
+class TestProber(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestProber, self).setUp()
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(8)
+        self.addCleanup(self.listener.close)
+        self.port = self.listener.getsockname()[1]
+
+    def test_tcp_reachable(self):
+        result = prober.Prober(timeout=1).wait_for_tcp(['127.0.0.1'],
+                                                       self.port, 1)
+        self.assertEqual(['127.0.0.1'], list(result))
+        self.assertIsNotNone(result['127.0.0.1'])
+
+    def test_tcp_unreachable(self):
+        self.listener.close()
+        result = prober.Prober(timeout=0.1, interval=0.1).wait_for_tcp(
+            ['127.0.0.1'], self.port, 0.3)
+        self.assertIsNone(result['127.0.0.1'])
+
+    def test_icmp_checksum(self):
+        packet = prober._icmp_echo_packet(0x1234, 1)
+        self.assertEqual(0, prober._checksum(packet))
@@ -0,0 +1,62 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+from oslotest import base
+import testtools
+
+from tempest_stress import procstat
+
+
+class TestProcStat(base.BaseTestCase):
+
+    @testtools.skipUnless(os.path.exists('/proc/self/stat'),
+                          "/proc is not available")
+    def test_read(self):
+        usage = procstat.read(os.getpid())
+        self.assertGreater(usage['rss'], 0)
+        self.assertGreater(usage['fds'], 0)
+        self.assertGreaterEqual(usage['cpu'], 0)
+        self.assertIn('voluntary_ctxt_switches', usage)
+
+    def test_read_gone(self):
+        self.assertIsNone(procstat.read('no-such-process'))
+
+    def test_sampler(self):
+        pids = {'driver': 1, 0: 2}
+        usage = {1: {'cpu': 1.0, 'rss': 10, 'fds': 3,
+                     'voluntary_ctxt_switches': 5,
+                     'nonvoluntary_ctxt_switches': 1},
+                 2: {'cpu': 2.0, 'rss': 20, 'fds': 4,
+                     'voluntary_ctxt_switches': 7,
+                     'nonvoluntary_ctxt_switches': 2}}
+        sampler = procstat.Sampler(lambda: pids, reader=lambda pid:
+                                   dict(usage[pid]))
+        self.assertEqual({}, sampler.sample(now=100.0))
+        usage[2]['cpu'] = 12.0
+        usage[1]['cpu'] = 2.0
+        self.assertEqual({'driver': 0.1, 0: 1.0},
+                         sampler.sample(now=110.0))
+        # the worker was recycled, the counters are carried over
+        pids[0] = 3
+        usage[3] = {'cpu': 0.5, 'rss': 15, 'fds': 4,
+                    'voluntary_ctxt_switches': 1,
+                    'nonvoluntary_ctxt_switches': 0}
+        sampler.sample(now=120.0)
+        stats = sampler.stats[0]
+        self.assertEqual(12.5, stats['cpu'])
+        self.assertEqual(8, stats['voluntary_ctxt_switches'])
+        self.assertEqual(1, stats['busy'])
+        self.assertEqual(1, stats['samples'])
+        self.assertEqual(20, stats['max_rss'])
+        self.assertEqual(15, stats['rss'])
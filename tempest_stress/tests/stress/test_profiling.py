@@ -0,0 +1,68 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import time
+
+import fixtures
+from oslotest import base
+
+from tempest_stress import profiling
+from tempest_stress import stressaction
+
+
+class BusyAction(stressaction.StressAction):
+    def run(self):
+        end = time.time() + 0.05
+        while time.time() < end:
+            pass
+
+
+class TestProfiling(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestProfiling, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+
+    def test_profile_runs(self):
+        profiler = profiling.WorkerProfiler(os.path.join(self.path, '0-0'),
+                                            interval=0.005)
+        BusyAction(manager=None, max_runs=4).execute(
+            {'runs': 0, 'fails': 0}, profiler=profiler)
+        prefix = os.path.join(self.path, '0-0-%d' % os.getpid())
+        self.assertTrue(os.path.exists(prefix + profiling.PSTATS_SUFFIX))
+        stats = profiling.merge(self.path)
+        self.assertTrue(any(func[2] == 'run' for func in stats.stats))
+        stacks = profiling.read_collapsed(os.path.join(
+            self.path, 'profile' + profiling.COLLAPSED_SUFFIX))
+        self.assertTrue(any('run (test_profiling.py' in stack
+                            for stack in stacks))
+
+    def test_merge_collapsed(self):
+        for name, count in (('a', 2), ('b', 3)):
+            profiling.write_collapsed(
+                os.path.join(self.path, name + profiling.COLLAPSED_SUFFIX),
+                {'main;f': count})
+        stacks = profiling.read_collapsed(os.path.join(
+            self.path, 'a' + profiling.COLLAPSED_SUFFIX))
+        profiling.read_collapsed(os.path.join(
+            self.path, 'b' + profiling.COLLAPSED_SUFFIX), stacks)
+        self.assertEqual({'main;f': 5}, dict(stacks))
+        self.assertIsNone(profiling.merge(self.path))
+
+    def test_clean(self):
+        for name in ('0-0-1' + profiling.PSTATS_SUFFIX,
+                     '0-0-1' + profiling.COLLAPSED_SUFFIX,
+                     'profile' + profiling.COLLAPSED_SUFFIX, 'notes.txt'):
+            open(os.path.join(self.path, name), 'w').close()
+        profiling.clean(self.path)
+        self.assertEqual(['notes.txt'], os.listdir(self.path))
@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslotest import base
+
+from tempest_stress import api_hooks
+from tempest_stress import ratelimit
+
+
+class FakeClient(object):
+    service = 'compute'
+
+
+class TestRateLimiter(base.BaseTestCase):
+
+    def test_normalize_path(self):
+        self.assertEqual(
+            '/v2.1/servers/{id}/os-volume_attachments/{id}',
+            api_hooks.normalize_path(
+                'http://nova:8774/v2.1/servers/'
+                '2d7c8a7e-7d2b-4c36-a0c7-62a8e1a6fa07/'
+                'os-volume_attachments/0c3ef3d4f2b04b4c8d3b2fd86e0e6f9a'
+                '?all_tenants=1'))
+
+    def test_from_config(self):
+        limiter = ratelimit.RateLimiter.from_config(
+            ['compute=20', 'compute POST */servers=2/5'])
+        self.assertEqual([('compute', None), ('compute', 'POST */servers')],
+                         [(s, o) for s, o, _b in limiter.limits])
+        self.assertEqual(5, limiter.limits[1][2].burst)
+        for value in ('compute', 'compute=0', 'compute=-1', 'compute=x',
+                      'compute=2/0.5'):
+            self.assertRaises(ValueError, ratelimit.RateLimiter.from_config,
+                              [value])
+
+    def test_matching_buckets(self):
+        limiter = ratelimit.RateLimiter.from_config(
+            ['compute=20', 'compute POST */servers=2', 'volume*=5'])
+        buckets = list(limiter._buckets('compute', 'post',
+                                        'http://nova/v2.1/servers'))
+        self.assertEqual(2, len(buckets))
+        buckets = list(limiter._buckets('compute', 'GET',
+                                        'http://nova/v2.1/servers/1'))
+        self.assertEqual(1, len(buckets))
+
+    def test_token_bucket(self):
+        bucket = ratelimit.TokenBucket(rate=50, burst=1)
+        self.assertEqual(0.0, bucket.acquire())
+        self.assertGreater(bucket.acquire(), 0.0)
+
+    def test_hook(self):
+        limiter = ratelimit.RateLimiter.from_config(['compute=1000'])
+        self.assertEqual('result', limiter(FakeClient(), 'GET', 'http://x/',
+                                           lambda: 'result'))
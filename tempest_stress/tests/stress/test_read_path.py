@@ -0,0 +1,71 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+
+from tempest_stress.actions import read_path
+from tempest_stress import admission
+
+
+class FakeServersClient(object):
+    def __init__(self, count):
+        self.servers = [{'id': 's%02d' % i, 'status': 'ACTIVE'}
+                        for i in range(count)]
+        self.list_calls = []
+
+    def create_server(self, **kwargs):
+        return {'reservation_id': 'r-1'}
+
+    def list_servers(self, detail=False, **params):
+        self.list_calls.append(params)
+        servers = self.servers
+        if 'marker' in params:
+            index = [s['id'] for s in servers].index(params['marker'])
+            servers = servers[index + 1:]
+        if 'limit' in params:
+            servers = servers[:params['limit']]
+        return {'servers': servers}
+
+    def show_server(self, server_id):
+        return {'server': {'id': server_id}}
+
+    def delete_server(self, server_id):
+        self.servers = [s for s in self.servers if s['id'] != server_id]
+
+
+class TestReadPath(base.BaseTestCase):
+
+    def test_run(self):
+        # the read fixtures do not take admission slots
+        admission.configure({admission.INSTANCES: 1})
+        self.addCleanup(admission.configure, {})
+        manager = mock.Mock()
+        manager.servers_client = FakeServersClient(25)
+        action = read_path.ReadPathTest(manager)
+        action.setUp(servers=25, page_sizes=[0, 10], shows=3,
+                     poll_interval=0)
+        self.assertEqual(25, len(action.server_ids))
+        action.run()
+
+        metrics = action._metrics
+        self.assertEqual([25], metrics['list_servers[page=all] items'])
+        # 10 + 10 + 5, the last page is shorter than the limit
+        self.assertEqual([10, 10, 5], metrics['list_servers[page=10] items'])
+        self.assertEqual(1, len(metrics['list_servers[status]']))
+        self.assertEqual(3, len(metrics['show_server']))
+        self.assertEqual(1, len(metrics['requests_per_second']))
+        self.assertNotIn('list_volumes[page=all]', metrics)
+
+        action.tearDown()
+        self.assertEqual([], manager.servers_client.servers)
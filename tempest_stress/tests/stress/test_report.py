@@ -0,0 +1,82 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+
+import fixtures
+from oslotest import base
+import testtools
+
+from tempest_stress import report
+from tempest_stress import results
+
+
+@testtools.skipIf(report.np is None, "NumPy is not installed")
+class TestReport(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestReport, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+
+    def _write_worker(self, worker, records):
+        writer = results.RecordWriter(
+            os.path.join(self.path, '0-0-%d%s' % (worker,
+                                                  results.RECORD_SUFFIX)),
+            worker=worker)
+        for args in records:
+            writer.record(*args)
+        writer.close()
+
+    def test_build_report(self):
+        # the worker tables differ and have to be mapped to the run tables
+        self._write_worker(0, [('A', 'run', 1.0, None, 100.0),
+                               ('A', 'phase', 0.5, None, 100.5),
+                               ('A', 'run', 3.0, None, 115.0),
+                               ('A', 'run', 9.0, 'Timeout', 116.0)])
+        self._write_worker(1, [('B', 'run', 2.0, 'Boom', 101.0),
+                               ('A', 'run', 2.0, None, 102.0)])
+        run_report = report.build_report(report.RunData(self.path),
+                                         interval=10.0)
+        self.assertEqual(6, run_report['records'])
+        self.assertEqual(5, run_report['runs'])
+        self.assertEqual(2, run_report['fails'])
+        action = run_report['actions']['A']
+        self.assertEqual(4, action['runs'])
+        self.assertEqual(1, action['fails'])
+        self.assertEqual({'Timeout': 1}, action['errors'])
+        self.assertEqual(3, action['phases']['run']['count'])
+        self.assertEqual(2.0, action['phases']['run']['p50'])
+        self.assertEqual(1, action['phases']['phase']['count'])
+        self.assertEqual([0.2, 0.1], action['throughput'])
+        self.assertEqual({'workers': 2, 'min_runs': 1, 'max_runs': 3,
+                          'jain_index': 0.8}, action['fairness'])
+        self.assertEqual({'Boom': 1}, run_report['actions']['B']['errors'])
+
+    def test_write(self):
+        self._write_worker(0, [('A<b>', 'run', 1.0, None, 100.0)])
+        run_report = report.build_report(report.RunData(self.path))
+        json_path = os.path.join(self.path, 'report.json')
+        html_path = os.path.join(self.path, 'report.html')
+        report.write_json(run_report, json_path)
+        report.write_html(run_report, html_path)
+        with open(json_path) as f:
+            self.assertEqual(1, json.load(f)['runs'])
+        with open(html_path) as f:
+            page = f.read()
+        self.assertIn('A&lt;b&gt;', page)
+        self.assertIn('<svg', page)
+
+    def test_empty_run(self):
+        run_report = report.build_report(report.RunData(self.path))
+        self.assertEqual({'records': 0, 'interval': 10.0, 'actions': {}},
+                         run_report)
@@ -0,0 +1,93 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+from oslotest import base
+
+from tempest_stress import compare
+from tempest_stress import results
+
+
+class TestResults(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestResults, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+
+    def _write_run(self, latencies, duration=10.0, fails=0):
+        step = results.add_step(self.path, start=None, end=None)
+        writer = results.RecordWriter(
+            os.path.join(self.path, '%d-0-0%s' % (step,
+                                                  results.RECORD_SUFFIX)),
+            step=step)
+        for latency in latencies:
+            writer.record('Action', results.RUN_NAME, latency)
+            writer.record('Action', 'metric', latency / 2)
+        for _ in range(fails):
+            writer.record('Action', results.RUN_NAME, 1.0, 'RuntimeError')
+        writer.close()
+        results.update_step(self.path, step, start=100.0,
+                            end=100.0 + duration)
+
+    def test_summarize(self):
+        self._write_run([3.0, 1.0, 2.0], fails=1)
+        summary = results.summarize(self.path)
+        self.assertEqual(['Action'], list(summary))
+        self.assertEqual([1.0, 2.0, 3.0], summary['Action']['latencies'])
+        self.assertEqual(4, summary['Action']['runs'])
+        self.assertEqual(1, summary['Action']['fails'])
+        self.assertEqual(0.3, summary['Action']['throughput'])
+
+    def test_iter_records(self):
+        self._write_run([1.0])
+        records = list(results.iter_records(self.path))
+        self.assertEqual([(0, 0, 'Action', 'run', 1.0, ''),
+                          (0, 0, 'Action', 'metric', 0.5, '')],
+                         [r[:4] + r[5:] for r in records])
+
+
+class TestCompare(base.BaseTestCase):
+
+    def _summary(self, latencies, throughput):
+        return {'Action': {'latencies': sorted(latencies), 'runs':
+                           len(latencies), 'fails': 0,
+                           'throughput': throughput}}
+
+    def test_percentile(self):
+        self.assertEqual(2.5, compare.percentile([1, 2, 3, 4], 50))
+        self.assertIsNone(compare.percentile([], 50))
+
+    def test_downsample(self):
+        self.assertEqual([0, 50, 100],
+                         compare.downsample(list(range(101)), 3))
+
+    def test_mann_whitney(self):
+        slow = [1.0 + i / 10.0 for i in range(50)]
+        fast = [i / 10.0 for i in range(50)]
+        self.assertLess(compare.mann_whitney_greater(slow, fast), 0.01)
+        self.assertGreater(compare.mann_whitney_greater(fast, slow), 0.99)
+        self.assertGreater(compare.mann_whitney_greater(fast, fast), 0.4)
+
+    def test_compare_regression(self):
+        fast = [1.0 + i / 100.0 for i in range(100)]
+        slow = [v * 1.5 for v in fast]
+        baseline = compare.make_baseline(self._summary(fast, 10.0))
+        rows = compare.compare(baseline, self._summary(fast, 10.0))
+        self.assertFalse(rows[0]['regressed'])
+        rows = compare.compare(baseline, self._summary(slow, 10.0))
+        self.assertTrue(rows[0]['regressed'])
+        rows = compare.compare(baseline, self._summary(fast, 5.0))
+        self.assertTrue(rows[0]['regressed'])
+        rows = compare.compare(baseline, {})
+        self.assertTrue(rows[0]['missing'])
@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import fixtures
+from oslotest import base
+from tempest.lib.common.utils import data_utils
+
+from tempest_stress import results
+from tempest_stress import schedule
+from tempest_stress import stressaction
+
+
+class NamingAction(stressaction.StressAction):
+    names = []
+
+    def run(self):
+        self.names.append(data_utils.rand_name(self.__class__.__name__))
+
+
+class OtherNamingAction(NamingAction):
+    pass
+
+
+class TestSchedule(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSchedule, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path
+        NamingAction.names = []
+
+    def _mix(self, max_runs=None):
+        return stressaction.ActionMix(
+            None, [NamingAction(None), OtherNamingAction(None)], [1, 1],
+            max_runs=max_runs)
+
+    def test_record_and_replay(self):
+        results.add_step(self.path, tests=[], duration=1, max_runs=6)
+        epoch = time.time()
+        writer = schedule.ScheduleWriter(
+            schedule.schedule_path(self.path, 0, 0, 1), epoch)
+        self._mix(max_runs=6).execute({'runs': 0, 'fails': 0},
+                                      schedule=writer)
+        recorded = NamingAction.names
+        self.assertEqual(6, len(recorded))
+
+        step, schedules = schedule.load(self.path)
+        self.assertEqual(6, step['max_runs'])
+        entries = schedules[(0, 1)]
+        self.assertEqual([name.split('-')[1] for name in recorded],
+                         [action for _offset, _seed, action in entries])
+        self.assertEqual(sorted(entries), entries)
+
+        NamingAction.names = []
+        stats = {'runs': 0, 'fails': 0}
+        self._mix().execute(stats, replay=schedule.Replay(entries,
+                                                          time.time()))
+        self.assertEqual(recorded, NamingAction.names)
+        self.assertEqual(6, stats['runs'])
+
+    def test_load_without_schedule(self):
+        self.assertRaises(ValueError, schedule.load, self.path)
+        results.add_step(self.path, tests=[])
+        self.assertRaises(ValueError, schedule.load, self.path)
@@ -0,0 +1,81 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+from tempest import exceptions
+
+from tempest_stress.actions import server_bulk_create
+from tempest_stress import admission
+
+
+def _server(server_id, status, fault=None):
+    server = {'id': server_id, 'status': status}
+    if fault:
+        server['fault'] = {'message': fault}
+    return server
+
+
+class TestServerBulkCreate(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestServerBulkCreate, self).setUp()
+        admission.configure({admission.INSTANCES: 3})
+        self.addCleanup(admission.configure, {})
+
+    def _action(self, cls, polls):
+        manager = mock.Mock()
+        manager.servers_client.create_server.return_value = {
+            'reservation_id': 'r-1'}
+        manager.servers_client.list_servers.side_effect = [
+            {'servers': servers} for servers in polls]
+        action = cls(manager)
+        action.setUp(batch_size=2, poll_interval=0)
+        return action
+
+    def test_bulk_create(self):
+        building = [_server('a', 'BUILD'), _server('b', 'BUILD')]
+        done = [_server('a', 'ACTIVE'), _server('b', 'ACTIVE')]
+        action = self._action(server_bulk_create.ServerBulkCreateTest,
+                              [building, done, done, []])
+        action.run()
+
+        client = action.manager.servers_client
+        client.create_server.assert_called_once_with(
+            name=mock.ANY, imageRef=mock.ANY, flavorRef=mock.ANY,
+            min_count=2, max_count=2, return_reservation_id=True)
+        client.list_servers.assert_called_with(detail=True,
+                                               reservation_id='r-1')
+        self.assertEqual(2, client.delete_server.call_count)
+        self.assertEqual(2, len(action._metrics['server_active']))
+        self.assertEqual([0.0], action._metrics['scheduling_failure_rate'])
+        self.assertEqual(1, len(action._metrics['batch_spread']))
+
+    def test_scheduling_failure(self):
+        done = [_server('a', 'ACTIVE'),
+                _server('b', 'ERROR', 'No valid host was found. ')]
+        action = self._action(server_bulk_create.ServerConcurrentCreateTest,
+                              [done, done, []])
+        self.assertRaises(exceptions.BuildErrorException, action.run)
+
+        client = action.manager.servers_client
+        self.assertEqual(2, client.create_server.call_count)
+        self.assertEqual(2, client.delete_server.call_count)
+        self.assertEqual([0.5], action._metrics['build_failure_rate'])
+        self.assertEqual([0.5], action._metrics['scheduling_failure_rate'])
+        # the slots of the batch are given back
+        admission.acquire(admission.INSTANCES, 0.01, count=3)
+
+    def test_batch_exceeds_limit(self):
+        action = server_bulk_create.ServerBulkCreateTest(mock.Mock())
+        self.assertRaises(ValueError, action.setUp, batch_size=4)
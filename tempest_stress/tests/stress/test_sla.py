@@ -0,0 +1,60 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslotest import base
+
+from tempest_stress import sla
+
+
+class TestSLA(base.BaseTestCase):
+
+    def _runs(self):
+        # one run per second for 100 seconds, slow and failing from 60s on
+        for second in range(100):
+            if second < 60:
+                yield 'Action', 1000.0 + second, 1.0, ''
+            else:
+                yield 'Action', 1000.0 + second, 5.0, (
+                    'BuildErrorException' if second % 2 else '')
+
+    def _rows(self, criteria):
+        rows = sla.evaluate({'Action': criteria}, self._runs(), 1000.0,
+                            1100.0)
+        return dict(((row['scope'], row['criterion']), row) for row in rows)
+
+    def test_overall(self):
+        rows = self._rows({'min_ops_per_second': 0.5, 'max_p95': 10,
+                           'max_error_rate': 0.1})
+        self.assertEqual(0.8, rows[('overall', 'ops/s >=')]['value'])
+        self.assertTrue(rows[('overall', 'ops/s >=')]['passed'])
+        self.assertTrue(rows[('overall', 'p95 <=')]['passed'])
+        self.assertEqual(0.2, rows[('overall', 'error rate <=')]['value'])
+        self.assertFalse(rows[('overall', 'error rate <=')]['passed'])
+
+    def test_windows(self):
+        rows = self._rows({'max_p99': 2, 'window': 20})
+        self.assertFalse(rows[('overall', 'p99 <=')]['passed'])
+        windowed = rows[('5 windows of 20s', 'p99 <=')]
+        self.assertEqual(5.0, windowed['value'])
+        self.assertEqual([3, 4], windowed['failed'])
+        self.assertFalse(sla.passed(rows.values()))
+
+    def test_validate(self):
+        sla.validate({'max_p99.9': 3, 'window': 60})
+        self.assertRaises(ValueError, sla.validate, {'max_latency': 3})
+        self.assertRaises(ValueError, sla.validate, {'max_p95': 'fast'})
+        self.assertEqual(
+            [{'max_p95': 1}, {'max_error_rate': 0}],
+            sla.entry_slas([{'action': 'a', 'sla': {'max_p95': 1}},
+                            {'mix': [{'action': 'b'},
+                                     {'action': 'c',
+                                      'sla': {'max_error_rate': 0}}]}]))
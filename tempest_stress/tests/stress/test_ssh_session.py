@@ -0,0 +1,85 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import socket
+from unittest import mock
+
+from oslotest import base
+from tempest.lib.common import ssh
+from tempest.lib import exceptions
+
+from tempest_stress import ssh_session
+
+
+class FakeChannel(object):
+    def __init__(self, output):
+        self.output = output
+        self.closed = False
+
+    def makefile(self, mode):
+        return io.BytesIO(self.output)
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreamWatch(base.BaseTestCase):
+
+    def test_wait_for_line(self):
+        channel = FakeChannel(b'vda;\nvda;vdb;\n')
+        watch = ssh_session.StreamWatch(channel)
+        self.addCleanup(watch.close)
+        seen_at = watch.wait_for(lambda line: 'vdb' in line, 1)
+        self.assertIsNotNone(seen_at)
+        self.assertEqual('vda;vdb;', watch.line)
+
+    def test_wait_for_stream_closed(self):
+        watch = ssh_session.StreamWatch(FakeChannel(b'vda;\n'))
+        self.addCleanup(watch.close)
+        self.assertIsNone(watch.wait_for(lambda line: 'vdb' in line, 5))
+        self.assertTrue(watch.closed)
+
+
+class TestSSHSession(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSSHSession, self).setUp()
+        self.client = ssh.Client('10.0.0.5', 'cirros', password='secret',
+                                 timeout=10)
+        patcher = mock.patch('paramiko.SSHClient')
+        self.ssh_client = patcher.start()
+        self.addCleanup(patcher.stop)
+        sleep = mock.patch('time.sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_connect_retries(self):
+        connection = self.ssh_client.return_value
+        connection.connect.side_effect = [socket.error(), None]
+        session = ssh_session.SSHSession(self.client)
+        session._get_transport()
+        self.assertEqual(2, connection.connect.call_count)
+        connection.connect.assert_called_with(
+            '10.0.0.5', port=22, username='cirros', password='secret',
+            pkey=None, key_filename=None, look_for_keys=False,
+            timeout=10.0, allow_agent=True)
+        # the live transport is reused
+        session._get_transport()
+        self.assertEqual(2, connection.connect.call_count)
+
+    @mock.patch('time.time')
+    def test_connect_timeout(self, now):
+        now.side_effect = [0, 0, 9]
+        self.ssh_client.return_value.connect.side_effect = socket.error()
+        session = ssh_session.SSHSession(self.client)
+        self.assertRaises(exceptions.SSHTimeout, session._get_transport)
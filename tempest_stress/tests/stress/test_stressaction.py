@@ -13,8 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import os
+
+import fixtures
+from tempest.lib import exceptions
 import tempest.test
 
+from tempest_stress import breaker
+from tempest_stress import budget
+from tempest_stress import results
 import tempest_stress.stressaction as stressaction
 
 
@@ -31,11 +38,23 @@ class FakeStressAction(stressaction.StressAction):
         return self._run_called
 
 
+class FakeStressActionMetric(stressaction.StressAction):
+    def run(self):
+        self.add_metric('latency', 2.0)
+        self.add_metric('latency', 4.0)
+
+
 class FakeStressActionFailing(stressaction.StressAction):
     def run(self):
         raise Exception('FakeStressActionFailing raise exception')
 
 
+class FakeStressActionLimited(stressaction.StressAction):
+    def run(self):
+        stressaction.record_metric('throttle_wait', 1.0)
+        raise exceptions.RateLimitExceeded()
+
+
 class TestStressAction(tempest.test.BaseTestCase):
     def _bulid_stats_dict(self, runs=0, fails=0):
         return {'runs': runs, 'fails': fails}
@@ -62,3 +81,101 @@ class TestStressAction(tempest.test.BaseTestCase):
         stressAction.execute(stats)
         self.assertEqual(stats['runs'], 1)
         self.assertEqual(stats['fails'], 1)
+
+    def testStressTestRunWithMetrics(self):
+        stressAction = FakeStressActionMetric(manager=None, max_runs=2)
+        stats = self._bulid_stats_dict()
+        stressAction.execute(stats)
+        self.assertEqual(stats['runs'], 2)
+        self.assertEqual(stats['metrics'], {'latency': (4, 12.0, 2.0, 4.0)})
+
+    def testStressActionMix(self):
+        ok = FakeStressActionMetric(manager=None)
+        failing = FakeStressActionFailing(manager=None)
+        mix = stressaction.ActionMix(None, [ok, failing], [1, 1],
+                                     max_runs=40)
+        stats = self._bulid_stats_dict()
+        mix.execute(stats)
+        self.assertEqual(stats['runs'], 40)
+        actions = stats['actions']
+        self.assertEqual(40, actions['FakeStressActionMetric']['runs'] +
+                         actions['FakeStressActionFailing']['runs'])
+        self.assertEqual(stats['fails'],
+                         actions['FakeStressActionFailing']['fails'])
+        self.assertEqual(actions['FakeStressActionMetric']['runs'] * 2,
+                         actions['FakeStressActionMetric']['metrics']
+                         ['latency'][0])
+
+    def testStressTestRunRecorded(self):
+        path = self.useFixture(fixtures.TempDir()).path
+        recorder = results.RecordWriter(os.path.join(path, 'w.rec'))
+        stressAction = FakeStressActionFailing(manager=None, max_runs=2)
+        stressAction.execute(self._bulid_stats_dict(), recorder)
+        records = list(results.iter_records(path))
+        self.assertEqual(2, len(records))
+        self.assertEqual(('FakeStressActionFailing', 'run'),
+                         records[0][2:4])
+        self.assertEqual('Exception', records[0][6])
+
+    def testStressTestRecycle(self):
+        path = self.useFixture(fixtures.TempDir()).path
+        stats = self._bulid_stats_dict()
+        for action in (FakeStressActionFailing, FakeStressActionMetric):
+            # the replacement worker continues the statistic and records
+            recorder = results.RecordWriter(os.path.join(path, 'w.rec'))
+            stressAction = action(manager=None, max_runs=10)
+            self.useFixture(fixtures.MockPatchObject(stressAction,
+                                                     'tearDown'))
+            exc = self.assertRaises(SystemExit, stressAction.execute, stats,
+                                    recorder, recycle_runs=3)
+            self.assertEqual(stressaction.RECYCLE_EXIT_CODE, exc.code)
+            self.assertTrue(stressAction.tearDown.called)
+        stressAction = FakeStressAction(manager=None, max_runs=7)
+        stressAction.execute(stats, results.RecordWriter(
+            os.path.join(path, 'w.rec')), recycle_runs=3)
+        self.assertEqual(7, stats['runs'])
+        self.assertEqual(3, stats['fails'])
+        records = list(results.iter_records(path))
+        self.assertEqual(
+            ['FakeStressActionFailing'] * 3 +
+            ['FakeStressActionMetric'] * 3 * 3 +
+            ['FakeStressAction'],
+            [r[2] for r in records])
+        self.assertEqual('Exception', records[0][6])
+        self.assertEqual('', records[3][6])
+
+    def testStressTestRunBudget(self):
+        shared = budget.RunBudget(5)
+        first = self._bulid_stats_dict()
+        FakeStressAction(manager=None, max_runs=3).execute(first,
+                                                           budget=shared)
+        second = self._bulid_stats_dict()
+        FakeStressAction(manager=None).execute(second, budget=shared)
+        self.assertEqual(3, first['runs'])
+        self.assertEqual(2, second['runs'])
+        self.assertEqual(0, shared.left)
+        self.assertFalse(shared.claim())
+
+    def testStressTestRunBreaker(self):
+        circuit = breaker.CircuitBreaker(60)
+        stats = self._bulid_stats_dict()
+        FakeStressActionFailing(manager=None, max_runs=3).execute(
+            stats, breaker=circuit)
+        FakeStressAction(manager=None, max_runs=2).execute(
+            self._bulid_stats_dict(), breaker=circuit)
+        self.assertEqual([5.0, 3.0], list(circuit._counters[:2]))
+
+    def testStressActionMixRateLimited(self):
+        mix = stressaction.ActionMix(
+            None, [FakeStressActionFailing(manager=None),
+                   FakeStressActionLimited(manager=None)], [1, 1],
+            max_runs=20)
+        stats = self._bulid_stats_dict()
+        mix.execute(stats)
+        actions = stats['actions']
+        self.assertEqual(stats['fails'],
+                         actions['FakeStressActionFailing']['fails'])
+        self.assertEqual(0, actions['FakeStressActionLimited']['fails'])
+        self.assertEqual(stats.get('throttled', 0),
+                         actions['FakeStressActionLimited'].get('throttled',
+                                                                0))
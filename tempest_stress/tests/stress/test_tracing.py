@@ -0,0 +1,75 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslotest import base
+
+from tempest_stress import histogram
+from tempest_stress import stressaction
+from tempest_stress import tracing
+
+
+class TracedAction(stressaction.StressAction):
+    def run(self):
+        client = mock.Mock(service='compute')
+        ok = mock.Mock(return_value=(mock.Mock(status=202), b''))
+        tracing.trace(client, 'post', 'http://nova/v2.1/servers', ok)
+        missing = mock.Mock(return_value=(mock.Mock(status=404), b''))
+        tracing.trace(client, 'GET',
+                      'http://nova/v2.1/servers/'
+                      'f3b7a2c4-5d6e-4f70-8a9b-0c1d2e3f4a5b', missing)
+        tracing.trace(client, 'GET', 'http://nova/v2.1/flavors',
+                      mock.Mock(side_effect=IOError))
+
+
+class TestHistogram(base.BaseTestCase):
+
+    def test_percentile(self):
+        hist = histogram.new()
+        for i in range(1, 1001):
+            histogram.add(hist, i / 1000.0)
+        self.assertEqual(1000, hist['count'])
+        for pct in (50, 95, 99):
+            value = histogram.percentile(hist, pct)
+            self.assertLessEqual(pct / 100.0, value)
+            self.assertLess(value, pct / 100.0 * histogram.GROWTH)
+        self.assertEqual(1.0, histogram.percentile(hist, 100))
+        self.assertIsNone(histogram.percentile(histogram.new(), 50))
+
+    def test_merge(self):
+        first = histogram.add(histogram.new(), 0.5)
+        histogram.merge(first, histogram.add(histogram.new(), 2.0))
+        self.assertEqual(2, first['count'])
+        self.assertEqual(2.0, first['max'])
+        self.assertLessEqual(0.5, histogram.percentile(first, 50))
+        self.assertLess(histogram.percentile(first, 50),
+                        0.5 * histogram.GROWTH)
+
+
+class TestTracing(base.BaseTestCase):
+
+    def test_trace(self):
+        stats = {'runs': 0, 'fails': 0}
+        TracedAction(manager=None, max_runs=2).execute(stats)
+        calls = stats['api_calls']
+        self.assertEqual(['compute GET /v2.1/flavors',
+                          'compute GET /v2.1/servers/{id}',
+                          'compute POST /v2.1/servers'], sorted(calls))
+        self.assertEqual(2, calls['compute POST /v2.1/servers']['count'])
+        self.assertEqual({'202': 2},
+                         calls['compute POST /v2.1/servers']['statuses'])
+        self.assertEqual(2, calls['compute GET /v2.1/servers/{id}']['errors'])
+        self.assertEqual({'OSError': 2},
+                         calls['compute GET /v2.1/flavors']['statuses'])
+        # the failed request fails the run
+        self.assertEqual(2, stats['fails'])
@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import unittest
+
+import fixtures
+from oslotest import base
+
+from tempest_stress.actions import unit_test
+
+
+class FakeTestClass(object):
+    setup_calls = 0
+    teardown_calls = 0
+    usable = True
+
+    @classmethod
+    def setUpClass(cls):
+        cls.setup_calls += 1
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.teardown_calls += 1
+
+    @classmethod
+    def check(cls):
+        return cls.usable
+
+
+class ConcurrentCalls(object):
+    """Test method of the test class built by TestConcurrency."""
+
+    def test_call(self):
+        # both instances have to run at the same time to pass the barrier
+        self.barrier.wait()
+        self.threads.add(threading.get_ident())
+        if self.should_fail:
+            type(self).should_fail = False
+            self.fail("instance failed")
+
+
+class TestFixtureCache(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestFixtureCache, self).setUp()
+        self.klass = type('FakeTest', (FakeTestClass,), {})
+
+    def test_reuse(self):
+        cache = unit_test.FixtureCache(self.klass)
+        for _ in range(3):
+            cache.acquire()
+        self.assertEqual(1, self.klass.setup_calls)
+        cache.release()
+        self.assertEqual(1, self.klass.teardown_calls)
+
+    def test_max_uses(self):
+        cache = unit_test.FixtureCache(self.klass, max_uses=2)
+        for _ in range(5):
+            cache.acquire()
+        self.assertEqual(3, self.klass.setup_calls)
+        self.assertEqual(2, self.klass.teardown_calls)
+
+    def test_check_invalidates(self):
+        cache = unit_test.FixtureCache(self.klass, check=self.klass.check)
+        cache.acquire()
+        self.klass.usable = False
+        cache.acquire()
+        self.assertEqual(2, self.klass.setup_calls)
+        self.assertEqual(1, self.klass.teardown_calls)
+
+    def test_release_dirty(self):
+        cache = unit_test.FixtureCache(self.klass)
+        cache.acquire()
+        cache.release(dirty=True)
+        cache.acquire()
+        self.assertEqual(2, self.klass.setup_calls)
+        self.assertEqual(0, self.klass.teardown_calls)
+
+
+class TestConcurrency(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestConcurrency, self).setUp()
+        # NOTE: built here so the test runner does not collect it
+        self.klass = type('ConcurrentTest',
+                          (ConcurrentCalls, unittest.TestCase),
+                          {'barrier': threading.Barrier(2, timeout=10),
+                           'threads': set(), 'should_fail': False})
+        self.useFixture(fixtures.MockPatch(__name__ + '.ConcurrentTest',
+                                           self.klass, create=True))
+        self.action = unit_test.UnitTest(None)
+        self.action.setUp(
+            test_method=__name__ + '.ConcurrentTest.test_call',
+            class_setup_per='application', concurrency=2)
+        self.addCleanup(self.action.tearDown)
+
+    def test_instances_run_concurrently(self):
+        self.action.run()
+        self.assertEqual(2, len(self.klass.threads))
+
+    def test_failure_raised(self):
+        self.klass.should_fail = True
+        self.assertRaisesRegex(RuntimeError, 'instance failed',
+                               self.action.run)
+        self.assertEqual(2, len(self.klass.threads))
@@ -0,0 +1,79 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+import fixtures
+from oslotest import base
+from tempest.lib import exceptions
+
+from tempest_stress.actions import volume_attach_verify
+from tempest_stress import admission
+from tempest_stress import attachments
+
+
+class TestVolumeVerifyStress(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestVolumeVerifyStress, self).setUp()
+        for name in ('wait_for_server_status',
+                     'wait_for_server_termination'):
+            self.useFixture(fixtures.MockPatch(
+                'tempest.common.waiters.' + name))
+        self.useFixture(fixtures.MockPatch('tempest.lib.common.ssh.Client'))
+        admission.configure({admission.VOLUMES: 2,
+                             admission.INSTANCES: 1})
+        self.addCleanup(admission.configure, {})
+        self.manager = mock.MagicMock()
+        servers_client = self.manager.servers_client
+        servers_client.create_server.return_value = {'server': {'id': 's1'}}
+        servers_client.show_server.return_value = {
+            'server': {'id': 's1', attachments.HOST_ATTR: 'cmp-1'}}
+        self.manager.volumes_client.create_volume.side_effect = [
+            {'volume': {'id': 'v1'}}, {'volume': {'id': 'v2'}}]
+        floating_client = self.manager.compute_floating_ips_client
+        floating_client.show_floating_ip.return_value = {
+            'floating_ip': {'instance_id': None}}
+
+    def test_persistent_volumes(self):
+        action = volume_attach_verify.VolumeVerifyStress(self.manager)
+        action.setUp(new_volume=False, volumes=2, enable_ssh_verify=False)
+        self.assertEqual(['v1', 'v2'], action.volume_ids)
+        self.assertEqual('cmp-1', action.host)
+
+        action.run()
+        servers_client = self.manager.servers_client
+        servers_client.attach_volume.assert_has_calls(
+            [mock.call('s1', volumeId='v1'), mock.call('s1', volumeId='v2')],
+            any_order=True)
+        self.assertEqual(1, len(
+            action._metrics['attachments_per_second[cmp-1]']))
+
+        action.tearDown()
+        volumes_client = self.manager.volumes_client
+        volumes_client.delete_volume.assert_has_calls(
+            [mock.call('v1'), mock.call('v2')], any_order=True)
+        servers_client.delete_server.assert_called_once_with('s1')
+        # all slots were given back
+        admission.acquire(admission.VOLUMES, 0.01, count=2)
+        admission.acquire(admission.INSTANCES, 0.01)
+
+    def test_new_volumes_attach_failed(self):
+        action = volume_attach_verify.VolumeVerifyStress(self.manager)
+        action.setUp(volumes=2, enable_ssh_verify=False)
+        self.manager.servers_client.attach_volume.side_effect = (
+            exceptions.Conflict())
+        self.assertRaises(exceptions.Conflict, action.run)
+        self.assertEqual([], action.volume_ids)
+        self.manager.volumes_client.delete_volume.assert_has_calls(
+            [mock.call('v1'), mock.call('v2')], any_order=True)
+        admission.acquire(admission.VOLUMES, 0.01, count=2)
@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Latency tracing of the API calls made by the stress actions.
+
+The tracer is a REST client hook (see :mod:`tempest_stress.api_hooks`)
+timing every HTTP request. Calls are keyed by endpoint, i.e. the service
+name, the method and the path with IDs replaced by ``{id}``, e.g.
+``compute POST /v2.1/servers``.
+"""
+
+import time
+
+from tempest_stress import api_hooks
+from tempest_stress import stressaction
+
+
+def endpoint(client, method, url):
+    return '%s %s %s' % (client.service or '-', method.upper(),
+                         api_hooks.normalize_path(url))
+
+
+def trace(client, method, url, call):
+    """The REST client hook recording the latency of each call."""
+    status = None
+    start = time.time()
+    try:
+        resp, body = call()
+        status = resp.status
+        return resp, body
+    except Exception as exc:
+        status = exc.__class__.__name__
+        raise
+    finally:
+        stressaction.record_api_call(endpoint(client, method, url), status,
+                                     time.time() - start)